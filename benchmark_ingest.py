@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+감지 이벤트 수신 벤치마크
+/api/detection/report에 JSON(base64), multipart, 원본 바디(image/jpeg) 형식으로
+같은 이미지를 보내 처리량과 최대 메모리 사용량(tracemalloc)을 비교합니다.
+INGEST_WORKERS=0으로 실행하면 수신 워커 없이 요청 스레드에서 바로 저장합니다.
+
+서버를 띄우지 않고 Flask 테스트 클라이언트로 요청을 보내며,
+이벤트/이미지는 임시 디렉토리에 기록됩니다.
+
+사용 방법:
+    python3 benchmark_ingest.py --image-kb 300 --requests 200
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+METADATA = {
+    'camera_id': 1,
+    'location': '본관 1층 입구',
+    'detected_objects': ['person', 'cigarette'],
+    'confidence': 0.95,
+}
+
+
+def make_request_factories(image_bytes):
+    """
+    형식별로 테스트 클라이언트 요청 인자를 만드는 함수
+
+    base64 인코딩/JSON 직렬화는 클라이언트 쪽 비용이므로 미리 만들어 둡니다.
+    """
+    json_body = json.dumps(dict(METADATA, image_base64=base64.b64encode(image_bytes).decode('ascii')))
+    metadata_json = json.dumps(METADATA)
+
+    return {
+        'json_base64': (len(json_body), lambda: {
+            'data': json_body,
+            'content_type': 'application/json',
+        }),
+        'multipart': (len(image_bytes) + len(metadata_json), lambda: {
+            'data': {'metadata': metadata_json, 'image': (io.BytesIO(image_bytes), 'frame.jpg', 'image/jpeg')},
+            'content_type': 'multipart/form-data',
+        }),
+        'raw_jpeg': (len(image_bytes), lambda: {
+            'data': image_bytes,
+            'content_type': 'image/jpeg',
+            'headers': {'X-Detection-Metadata': metadata_json},
+        }),
+    }
+
+
+def run_format(server, client, make_kwargs, num_requests):
+    """
+    한 형식으로 num_requests번 전송
+
+    수신 워커를 쓰는 경우 대기열이 모두 처리될 때까지의 시간까지 포함합니다.
+
+    Returns:
+        tuple: (초당 요청 수, 실행 중 최대 메모리 KB, 429 응답 수)
+    """
+    client.post('/api/detection/report', **make_kwargs())  # 워밍업
+    if server.ingest_pool:
+        server.ingest_pool.join()
+
+    throttled = 0
+    requests = [make_kwargs() for _ in range(num_requests)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    for kwargs in requests:
+        response = client.post('/api/detection/report', **kwargs)
+        if response.status_code == 429:
+            throttled += 1
+        elif response.status_code not in (201, 202):
+            raise RuntimeError(f'Unexpected response {response.status_code}: {response.get_data(as_text=True)}')
+    if server.ingest_pool:
+        server.ingest_pool.join()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return num_requests / elapsed, peak / 1024, throttled
+
+
+def main():
+    parser = argparse.ArgumentParser(description='감지 이벤트 수신 벤치마크')
+    parser.add_argument('--image-kb', type=int, default=300, help='이미지 크기 (KB)')
+    parser.add_argument('--requests', type=int, default=200, help='형식별 요청 수')
+    args = parser.parse_args()
+
+    # camera_server는 현재 디렉토리에 detection_events/를 만들므로 임시 디렉토리에서 가져옴
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(prefix='ingest_bench_')
+    os.chdir(workdir)
+    import camera_server
+
+    image_bytes = np.random.default_rng(0).integers(0, 256, args.image_kb * 1024, dtype=np.uint8).tobytes()
+    client = camera_server.app.test_client()
+
+    print("=" * 60)
+    print(f"이미지 {args.image_kb} KB, 형식별 요청 {args.requests}회 (작업 디렉토리: {workdir})")
+    print("=" * 60)
+    for name, (body_size, make_kwargs) in make_request_factories(image_bytes).items():
+        rate, peak_kb, throttled = run_format(camera_server, client, make_kwargs, args.requests)
+        throughput_mb = rate * body_size / (1024 * 1024)
+        print(f"{name:12s}: {rate:8.1f} req/s, {throughput_mb:7.1f} MB/s, "
+              f"본문 {body_size / 1024:7.1f} KB, 최대 메모리 {peak_kb:8.1f} KB, 429 {throttled}건")
+    print("=" * 60)
+
+    if camera_server.ingest_pool:
+        camera_server.ingest_pool.stop()
+    camera_server.event_log.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+감지 파이프라인 오프라인 재생 벤치마크
+카메라/화면 없이 녹화 영상이나 이미지 폴더를 전처리 → 추론 → 후처리 → 추적 → 경고 판단 순서로 흘려보내고,
+단계별 지연 시간 백분위수, 처리량, 최대 메모리(RSS)를 JSON으로 출력합니다.
+어느 리눅스 PC에서나 같은 입력으로 반복 실행해서 성능 저하를 잡을 수 있습니다.
+
+프레임 시각은 실제 시간이 아니라 --fps 기준 가상 시각(프레임 번호 / fps)을 사용하므로,
+처리 속도와 관계없이 추적/경고 판단 결과가 매번 같습니다.
+
+사용 방법:
+    python3 benchmark_pipeline.py detection_events/ --model final_detection416.onnx --swap-rb
+    python3 benchmark_pipeline.py clip.mp4 --detect-every 3 --output bench.json --min-fps 5
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+from detector_engine import DEFAULT_LABELS, DetectorEngine, OnnxRuntimeBackend
+from frame_sources import iter_frames
+from motion_gate import MotionGate
+from object_tracker import ObjectTracker, max_dwell
+from temporal_aggregator import TemporalAggregator
+
+STAGES = ['decode', 'preprocess', 'inference', 'postprocess', 'tracking', 'alert', 'total']
+
+
+def latency_summary(values):
+    """지연 시간 목록(ms)의 평균/백분위수/최대"""
+    if not values:
+        return {'count': 0}
+    values = np.asarray(values)
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p90': round(float(np.percentile(values, 90)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb():
+    """프로세스 최대 RSS (MB, 리눅스 ru_maxrss는 KB 단위)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class AlertLogic:
+    """raspberry_pi_onnx_detection.py와 같은 경고 판단 (사람 트랙 머문 시간 + 사람/담배 동시 감지 시간)"""
+
+    def __init__(self, labels, conf_threshold=0.4, detection_window=10, required_duration=3, max_gap=2.0):
+        self.person_id = labels.index("Person")
+        self.cigarette_id = labels.index("Cigarette")
+        self.conf_threshold = conf_threshold
+        self.detection_window = detection_window
+        self.required_duration = required_duration
+        self.presence = TemporalAggregator(["Smoking"], window=detection_window, max_gap=max_gap)
+
+        # 통계
+        self.warning_frames = 0
+        self.guide_frames = 0
+
+    def update(self, tracks, detections, timestamp):
+        """
+        Args:
+            tracks: 추적기 결과 (사람 머문 시간용)
+            detections: 이번 프레임의 원본 감지 결과 (감지하지 않은 프레임은 None)
+            timestamp: 프레임 시각 (초)
+
+        Returns:
+            str 또는 None: 'warning', 'guide' 또는 None
+        """
+        if detections is not None:
+            confident = detections.class_ids[detections.scores >= self.conf_threshold]
+            smoking_seen = np.any(confident == self.person_id) and np.any(confident == self.cigarette_id)
+            self.presence.update(timestamp, {"Smoking"} if smoking_seen else ())
+
+        person_duration = max_dwell(tracks, [self.person_id])
+        smoking_duration = min(person_duration, self.presence.presence("Smoking", self.detection_window))
+        if smoking_duration >= self.required_duration:
+            self.warning_frames += 1
+            return 'warning'
+        if person_duration >= self.required_duration:
+            self.guide_frames += 1
+            return 'guide'
+        return None
+
+
+def run_benchmark(args):
+    """재생 벤치마크 실행 후 보고서 반환"""
+    load_started = time.perf_counter()
+    engine = DetectorEngine(
+        OnnxRuntimeBackend(args.model, args.width, args.height, swap_rb=args.swap_rb,
+                           intra_op_threads=args.threads, cache_dir=args.cache_dir, warmup_runs=args.warmup),
+        DEFAULT_LABELS, args.track_low, args.nms
+    )
+    load_ms = (time.perf_counter() - load_started) * 1000
+    tracker = ObjectTracker(high_threshold=args.conf, low_threshold=args.track_low, new_track_threshold=args.conf)
+    motion_gate = MotionGate() if args.motion_gate else None
+    alerts = AlertLogic(DEFAULT_LABELS, args.conf)
+
+    timings = {stage: [] for stage in STAGES}
+    frames = 0
+    detected_frames = 0
+    detections = 0
+    rss_after_load = peak_rss_mb()
+
+    source = iter_frames(args.sources, args.stride, args.max_frames)
+    started = time.perf_counter()
+    while True:
+        frame_started = time.perf_counter()
+        item = next(source, None)
+        if item is None:
+            break
+        _, frame = item
+        decoded = time.perf_counter()
+        timestamp = frames / args.fps
+        timings['decode'].append((decoded - frame_started) * 1000)
+
+        detect_now = frames % args.detect_every == 0
+        if detect_now and motion_gate is not None:
+            detect_now = motion_gate.should_infer(frame, active=len(tracker) > 0, now=timestamp)
+
+        if detect_now:
+            result = engine.detect(frame)[0]
+            stage_times = engine.last_timings
+            for stage in ('preprocess', 'inference', 'postprocess'):
+                timings[stage].append(stage_times[stage] * 1000)
+            detected_frames += 1
+            detections += len(result.boxes)
+            tracking_started = time.perf_counter()
+            tracks = tracker.update(result, timestamp)
+        else:
+            result = None
+            tracking_started = time.perf_counter()
+            tracks = tracker.predict(timestamp)
+        tracked = time.perf_counter()
+        timings['tracking'].append((tracked - tracking_started) * 1000)
+
+        alerts.update(tracks, result, timestamp)
+        finished = time.perf_counter()
+        timings['alert'].append((finished - tracked) * 1000)
+        timings['total'].append((finished - frame_started) * 1000)
+        frames += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'model': args.model,
+        'session': engine.backend.session.session_info,
+        'model_load_ms': round(load_ms, 1),
+        'sources': args.sources,
+        'frames': frames,
+        'detected_frames': detected_frames,
+        'detections': detections,
+        'detect_every': args.detect_every,
+        'motion_gate': motion_gate.stats() if motion_gate is not None else None,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'detector_fps': round(detected_frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {stage: latency_summary(values) for stage, values in timings.items()},
+        'alerts': {
+            'warning_frames': alerts.warning_frames,
+            'guide_frames': alerts.guide_frames,
+        },
+        'tracker': tracker.stats(),
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_after_model_load_mb': rss_after_load,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='감지 파이프라인 오프라인 재생 벤치마크')
+    parser.add_argument('sources', nargs='+', help='영상 파일 또는 이미지 폴더')
+    parser.add_argument('--model', default='final_detection416.onnx', help='ONNX 모델 경로')
+    parser.add_argument('--width', type=int, default=416, help='입력 너비 (동적 크기 모델용)')
+    parser.add_argument('--height', type=int, default=416, help='입력 높이 (동적 크기 모델용)')
+    parser.add_argument('--swap-rb', action='store_true', help='BGR → RGB 변환 (raspberry_pi_onnx_detection.py 모델)')
+    parser.add_argument('--conf', type=float, default=0.4, help='신뢰도 임계값')
+    parser.add_argument('--track-low', type=float, default=0.1, help='추적기 2차 연결용 낮은 신뢰도 임계값')
+    parser.add_argument('--nms', type=float, default=0.4, help='NMS IoU 임계값')
+    parser.add_argument('--threads', type=int, default=None, help='추론 스레드 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--cache-dir', default=None, help='최적화 모델 캐시 디렉토리 (기본값: 사용 안 함)')
+    parser.add_argument('--warmup', type=int, default=3, help='워밍업 실행 횟수')
+    parser.add_argument('--detect-every', type=int, default=1, help='N프레임마다 감지 (나머지는 추적기 예측)')
+    parser.add_argument('--motion-gate', action='store_true', help='움직임 게이트 사용')
+    parser.add_argument('--fps', type=float, default=15.0, help='가상 프레임 시각 계산용 FPS')
+    parser.add_argument('--stride', type=int, default=1, help='영상에서 N프레임마다 1장 사용')
+    parser.add_argument('--max-frames', type=int, default=None, help='최대 프레임 수')
+    parser.add_argument('--output', help='JSON 보고서 저장 경로 (기본값: 표준 출력)')
+    parser.add_argument('--min-fps', type=float, default=None, help='처리량이 이 값보다 낮으면 종료 코드 1')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        parser.error(f'모델 파일이 없습니다: {args.model}')
+    args.detect_every = max(1, args.detect_every)
+
+    report = run_benchmark(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"📝 Report saved: {args.output} ({report['frames']} frames, {report['throughput_fps']} FPS, "
+              f"peak RSS {report['peak_rss_mb']} MB)")
+    else:
+        print(text)
+
+    if args.min_fps is not None and report['throughput_fps'] < args.min_fps:
+        print(f"❌ Throughput {report['throughput_fps']} FPS is below --min-fps {args.min_fps}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+후처리 벤치마크
+기존 행 단위 파이썬 루프와 벡터화된 postprocess_yolov8()의 속도를 비교합니다.
+
+사용 방법:
+    python3 benchmark_postprocess.py --candidates 8400 --classes 4 --runs 50
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from detection_postprocess import postprocess_yolov8
+
+
+def legacy_postprocess(outputs, conf_threshold=0.4, nms_threshold=0.4):
+    """기존 detection_simple.postprocess() 구현 (비교용)"""
+    output = outputs[0][0]
+    output = output.T
+
+    boxes = []
+    scores = []
+    class_ids = []
+
+    for detection in output:
+        x, y, w, h = detection[0:4]
+        class_scores = detection[4:]
+        class_id = np.argmax(class_scores)
+        confidence = class_scores[class_id]
+
+        if confidence >= conf_threshold:
+            boxes.append([x - w/2, y - h/2, w, h])
+            scores.append(float(confidence))
+            class_ids.append(class_id)
+
+    if len(boxes) > 0:
+        indices = cv2.dnn.NMSBoxes(boxes, scores, conf_threshold, nms_threshold)
+        if len(indices) > 0:
+            indices = indices.flatten()
+            return [boxes[i] for i in indices], [scores[i] for i in indices], [class_ids[i] for i in indices]
+
+    return [], [], []
+
+
+def make_fake_output(num_candidates, num_classes, num_objects, input_size, seed=0):
+    """
+    YOLOv8 출력과 비슷한 가짜 텐서 생성
+
+    대부분은 낮은 점수의 배경 후보이고, num_objects개의 물체 주변에 높은 점수 후보가 몰려 있습니다.
+    """
+    rng = np.random.default_rng(seed)
+    output = np.empty((1, 4 + num_classes, num_candidates), dtype=np.float32)
+    output[0, 0:2] = rng.uniform(0, input_size, (2, num_candidates))
+    output[0, 2:4] = rng.uniform(10, input_size / 4, (2, num_candidates))
+    output[0, 4:] = rng.uniform(0, 0.2, (num_classes, num_candidates))
+
+    for _ in range(num_objects):
+        cols = rng.choice(num_candidates, 20, replace=False)
+        center = rng.uniform(50, input_size - 50, 2)
+        output[0, 0:2, cols] = center + rng.normal(0, 3, (20, 2))
+        output[0, 2:4, cols] = rng.uniform(40, 60, (20, 2))
+        output[0, 4 + rng.integers(num_classes), cols] = rng.uniform(0.5, 0.95, 20)
+
+    return output
+
+
+def time_it(fn, runs):
+    """fn을 runs번 실행하고 평균/최소 시간(ms) 반환"""
+    fn()  # 워밍업
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sum(timings) / len(timings), min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLOv8 후처리 벤치마크')
+    parser.add_argument('--candidates', type=int, default=8400, help='후보 수 (640: 8400, 416: 3549)')
+    parser.add_argument('--classes', type=int, default=4, help='클래스 수')
+    parser.add_argument('--objects', type=int, default=5, help='가짜 물체 수')
+    parser.add_argument('--runs', type=int, default=50, help='반복 횟수')
+    parser.add_argument('--input-size', type=int, default=640, help='입력 크기')
+    args = parser.parse_args()
+
+    outputs = [make_fake_output(args.candidates, args.classes, args.objects, args.input_size)]
+
+    legacy_mean, legacy_min = time_it(lambda: legacy_postprocess(outputs), args.runs)
+    vector_mean, vector_min = time_it(lambda: postprocess_yolov8(outputs[0]), args.runs)
+
+    legacy_count = len(legacy_postprocess(outputs)[0])
+    vector_count = len(postprocess_yolov8(outputs[0]).boxes)
+
+    print("=" * 60)
+    print(f"후보 {args.candidates}개, 클래스 {args.classes}개, 반복 {args.runs}회")
+    print("=" * 60)
+    print(f"기존 루프:   평균 {legacy_mean:8.3f} ms / 최소 {legacy_min:8.3f} ms (감지 {legacy_count}개)")
+    print(f"벡터화 버전: 평균 {vector_mean:8.3f} ms / 최소 {vector_min:8.3f} ms (감지 {vector_count}개)")
+    print(f"속도 향상: {legacy_mean / vector_mean:.1f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
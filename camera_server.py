@@ -11,8 +11,14 @@ import time
 import os
 import json
 import base64
-from datetime import datetime, timedelta
+from datetime import datetime
 import uuid
+from inference_scheduler import InferenceScheduler
+from frame_channel import FrameChannel
+from mjpeg_broadcaster import MjpegBroadcaster, limit_send_buffer, parse_stream_options
+from event_store import EventStore
+from event_log import EventLog
+from ingest_workers import IngestWorkerPool
 
 app = Flask(__name__)
 CORS(app)  # CORS 활성화 (Flutter 웹에서 접근 가능하도록)
@@ -31,9 +37,53 @@ DETECTION_EVENTS_DIR = 'detection_events'
 if not os.path.exists(DETECTION_EVENTS_DIR):
     os.makedirs(DETECTION_EVENTS_DIR)
 
-# 감지 이벤트 저장소 (메모리)
-detection_events = []
-detection_events_lock = threading.Lock()
+# 감지 이벤트 저장소 (메모리, 최근 1000개 + 상태/카메라 인덱스)
+event_store = EventStore(capacity=1000)
+
+# 감지 이벤트 영구 로그 (JSON Lines 추가 전용, 시작 시 event_store 복원)
+EVENT_LOG_PATH = os.path.join(DETECTION_EVENTS_DIR, 'events.jsonl')
+EVENT_LOG_MAX_EVENTS = int(os.environ.get('EVENT_LOG_MAX_EVENTS', '50000'))
+EVENT_LOG_RETENTION_DAYS = int(os.environ.get('EVENT_LOG_RETENTION_DAYS', '30'))
+event_log = EventLog(EVENT_LOG_PATH)
+
+
+def load_event_log():
+    """
+    이벤트 로그 정리 후 최근 이벤트를 event_store에 복원
+
+    기존 이벤트별 JSON 파일이 남아 있으면 먼저 로그로 옮기고,
+    보존 기간/개수를 넘은 이벤트는 이미지 파일과 함께 삭제합니다.
+    """
+    event_log.import_legacy_files(DETECTION_EVENTS_DIR)
+
+    dropped = event_log.compact(max_events=EVENT_LOG_MAX_EVENTS, retention_days=EVENT_LOG_RETENTION_DAYS)
+    for event in dropped:
+        image_filename = event.get('image_filename')
+        if image_filename:
+            image_path = os.path.join(DETECTION_EVENTS_DIR, image_filename)
+            if os.path.exists(image_path):
+                os.remove(image_path)
+
+    # event_store의 시간 인덱스는 created_at 순서로 추가된다고 가정하므로 확인 후 필요하면 정렬
+    # (기존 파일에서 옮긴 이벤트는 로그 끝에 붙으므로 이전 이벤트보다 오래되었을 수 있음)
+    events = event_log.replay()
+    created = [event.get('created_at', '') for event in events]
+    if any(earlier > later for earlier, later in zip(created, created[1:])):
+        print("Event log is not in created_at order, sorting before restore")
+        events.sort(key=lambda event: event.get('created_at', ''))
+
+    # 메모리에는 최근 capacity개만 올림
+    for event in events[-event_store.capacity:]:
+        event_store.add(event)
+    print(f"Restored {len(event_store)} detection events from {EVENT_LOG_PATH}")
+
+
+load_event_log()
+
+# 서버 측 배치 추론 (DETECTION_MODEL_PATH 환경 변수가 있을 때만 활성화)
+DETECTION_MODEL_PATH = os.environ.get('DETECTION_MODEL_PATH')
+DETECTION_INTERVAL = float(os.environ.get('DETECTION_INTERVAL', '0.2'))
+inference_scheduler = None
 
 class CameraStream:
     """카메라 스트림 클래스"""
@@ -42,8 +92,9 @@ class CameraStream:
         self.source = source
         self.camera = None
         self.is_running = False
-        self.last_frame = None
-        self.frame_lock = threading.Lock()
+        # 새 프레임 게시 채널 (느린 클라이언트용으로 최근 5프레임 보관)
+        self.frame_channel = FrameChannel(history=5)
+        self.broadcaster = MjpegBroadcaster(self.frame_channel)
 
     def start(self):
         """카메라 스트림 시작"""
@@ -71,14 +122,24 @@ class CameraStream:
                 cv2.putText(frame, f'Camera {self.camera_id}', (10, 60),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
-                with self.frame_lock:
-                    self.last_frame = frame
+                self.frame_channel.publish(frame)
             time.sleep(0.033)  # ~30 FPS
 
     def get_frame(self):
         """현재 프레임 가져오기"""
-        with self.frame_lock:
-            return self.last_frame.copy() if self.last_frame is not None else None
+        _, frame = self.frame_channel.latest()
+        return frame.copy() if frame is not None else None
+
+    def get_latest_frame(self):
+        """
+        현재 프레임과 시퀀스 번호 가져오기 (복사 없음)
+
+        프레임은 매번 새 배열로 교체되므로 읽기 전용으로만 사용해야 합니다.
+
+        Returns:
+            tuple: (frame_seq, frame)
+        """
+        return self.frame_channel.latest()
 
     def stop(self):
         """카메라 스트림 정지"""
@@ -87,26 +148,31 @@ class CameraStream:
             self.camera.release()
             self.camera = None
 
-def generate_frames(camera_id):
+def list_cameras():
+    """(camera_id, CameraStream) 목록 스냅샷"""
+    with camera_lock:
+        return list(cameras.items())
+
+def start_inference_scheduler(model_path):
+    """서버 측 배치 추론 시작"""
+    global inference_scheduler
+    from detector_engine import DetectorEngine
+
+    engine = DetectorEngine.from_model(model_path)
+    inference_scheduler = InferenceScheduler(engine, list_cameras, interval=DETECTION_INTERVAL)
+    inference_scheduler.start()
+    print(f"서버 측 감지 활성화: {model_path} (주기 {DETECTION_INTERVAL}s)")
+
+def generate_frames(camera_id, drop_frames=True, profile=None, max_fps=None, adaptive=False):
     """프레임 생성기 (MJPEG 스트림용)"""
     camera = cameras.get(camera_id)
     if not camera:
         return
 
-    while camera.is_running:
-        frame = camera.get_frame()
-        if frame is None:
-            time.sleep(0.1)
-            continue
-
-        # JPEG로 인코딩
-        ret, buffer = cv2.imencode('.jpg', frame)
-        if not ret:
-            continue
-
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+    # 인코딩은 카메라/프로필당 한 번만 하고 같은 프로필의 클라이언트가 같은 바이트를 공유
+    yield from camera.broadcaster.stream(
+        lambda: camera.is_running, drop_frames, profile, max_fps, adaptive
+    )
 
 @app.route('/api/cameras', methods=['GET'])
 def get_cameras():
@@ -117,7 +183,8 @@ def get_cameras():
                 'id': cam_id,
                 'name': f'Camera {cam_id}',
                 'status': 'running' if cam.is_running else 'stopped',
-                'location': ['본관 1층 입구', '주차장', '후문'][cam_id - 1] if cam_id <= 3 else f'Zone {cam_id}'
+                'location': ['본관 1층 입구', '주차장', '후문'][cam_id - 1] if cam_id <= 3 else f'Zone {cam_id}',
+                'viewers': cam.broadcaster.viewers
             }
             for cam_id, cam in cameras.items()
         ]
@@ -159,11 +226,35 @@ def video_stream(camera_id):
     if camera_id not in cameras:
         return jsonify({'error': 'Camera not found'}), 404
 
+    # ?q=, ?w=, ?fps=, ?adaptive=1, ?drop=0 (mjpeg_broadcaster 참고)
+    try:
+        options = parse_stream_options(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid stream parameters'}), 400
+
+    # 적응형 모드는 쓰기 지연이 빨리 드러나도록 송신 버퍼를 줄임
+    if options['adaptive']:
+        limit_send_buffer(request.environ)
+
     return Response(
-        generate_frames(camera_id),
+        generate_frames(camera_id, **options),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
+@app.route('/api/camera/<int:camera_id>/detections')
+def get_camera_detections(camera_id):
+    """카메라의 최신 서버 측 감지 결과"""
+    if inference_scheduler is None:
+        return jsonify({'error': 'Server-side detection is disabled'}), 503
+
+    if camera_id not in cameras:
+        return jsonify({'error': 'Camera not found'}), 404
+
+    result = inference_scheduler.get_result(camera_id)
+    if result is None:
+        return jsonify({'camera_id': camera_id, 'detections': []})
+    return jsonify(result)
+
 @app.route('/api/camera/<int:camera_id>/capture', methods=['POST'])
 def capture_screenshot(camera_id):
     """스크린샷 캡처"""
@@ -228,12 +319,114 @@ def list_screenshots():
     screenshots.sort(key=lambda x: x['created'], reverse=True)
     return jsonify(screenshots)
 
+# 이미지 업로드 설정
+IMAGE_CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# 수신 워커 설정 (INGEST_WORKERS=0이면 요청 스레드에서 바로 저장하고 201 응답)
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', '4'))
+INGEST_QUEUE_SIZE = int(os.environ.get('INGEST_QUEUE_SIZE', '100'))
+
+
+def _parse_report_metadata(source):
+    """
+    폼 필드/쿼리 파라미터에서 이벤트 메타데이터 추출
+
+    'metadata' 필드가 있으면 JSON으로 해석하고, 없으면 개별 필드를 읽습니다.
+    detected_objects는 콤마로 구분된 문자열도 허용합니다.
+    """
+    if 'metadata' in source:
+        return json.loads(source['metadata'])
+
+    data = {}
+    if 'camera_id' in source:
+        data['camera_id'] = int(source['camera_id'])
+    for key in ('location', 'timestamp'):
+        if key in source:
+            data[key] = source[key]
+    if 'confidence' in source:
+        data['confidence'] = float(source['confidence'])
+    if 'detected_objects' in source:
+        data['detected_objects'] = [obj for obj in source['detected_objects'].split(',') if obj]
+    return data
+
+
+def _read_image(stream, max_bytes=MAX_IMAGE_BYTES, chunk_size=IMAGE_CHUNK_SIZE):
+    """
+    요청 스트림에서 이미지를 청크 단위로 읽음 (크기 상한 검사)
+
+    Returns:
+        bytes: 이미지 데이터
+
+    Raises:
+        ValueError: max_bytes를 넘는 경우
+    """
+    chunks = []
+    size = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise ValueError(f'Image larger than {max_bytes} bytes')
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def _image_filename(event_id):
+    """감지 이미지 파일명"""
+    timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f'detection_{event_id}_{timestamp_str}.jpg'
+
+
+def persist_detection(job):
+    """
+    감지 이벤트 저장 (수신 워커에서 실행)
+
+    이미지 디코딩/기록, 메모리 저장소 추가, 영구 로그 추가를 처리합니다.
+
+    Args:
+        job: {'event': 이벤트, 'image_bytes': bytes 또는 None, 'image_base64': str 또는 None}
+    """
+    event = job['event']
+    image_filename = event.get('image_filename')
+
+    if image_filename:
+        try:
+            image_data = job['image_bytes']
+            if image_data is None:
+                # Base64 디코딩
+                image_data = base64.b64decode(job['image_base64'])
+
+            # 파일 저장
+            with open(os.path.join(DETECTION_EVENTS_DIR, image_filename), 'wb') as f:
+                f.write(image_data)
+        except Exception as e:
+            print(f"Failed to save image: {e}")
+            event.pop('image_filename', None)
+            event.pop('image_url', None)
+
+    # 메모리 저장소(최근 1000개만 유지)와 영구 로그에 같은 순서로 추가
+    # created_at은 저장소가 잠금 안에서 기록하므로 워커가 끝나는 순서와 상관없이 시간순 유지
+    with persist_lock:
+        event_store.add(event)
+        # 영구 로그에 추가 (fsync는 그룹 커밋)
+        event_log.append(event)
+
+
+persist_lock = threading.Lock()
+ingest_pool = IngestWorkerPool(persist_detection, INGEST_QUEUE_SIZE, INGEST_WORKERS) if INGEST_WORKERS > 0 else None
+
+
 @app.route('/api/detection/report', methods=['POST'])
 def report_detection():
     """
     라즈베리파이에서 흡연 감지 결과 보고
 
-    Expected JSON format:
+    세 가지 형식을 지원합니다.
+
+    1) JSON (기존 방식, 이미지는 base64):
     {
         "camera_id": 1,
         "location": "본관 1층 입구",
@@ -242,9 +435,33 @@ def report_detection():
         "image_base64": "...",  # optional
         "timestamp": "2025-10-24T16:30:00"
     }
+
+    2) multipart/form-data:
+        metadata: 위 JSON에서 image_base64를 뺀 문자열 (또는 camera_id 등 개별 필드)
+        image: JPEG 파일 (optional)
+
+    3) Content-Type: image/jpeg 원본 바디:
+        메타데이터는 X-Detection-Metadata 헤더(JSON) 또는 쿼리 파라미터로 전달
+
+    요청 스레드는 검증 후 저장 작업을 대기열에 넣고 202를 응답합니다.
+    이벤트는 수신 워커가 저장한 뒤부터 목록 조회에 나타나며, 대기열이 가득 차면 429를 응답합니다.
     """
     try:
-        data = request.get_json()
+        image_bytes = None
+        content_type = request.mimetype
+
+        if content_type == 'multipart/form-data':
+            data = _parse_report_metadata(request.form)
+            image_file = request.files.get('image')
+            if image_file:
+                image_bytes = _read_image(image_file.stream)
+        elif content_type in ('image/jpeg', 'application/octet-stream'):
+            header = request.headers.get('X-Detection-Metadata')
+            data = json.loads(header) if header else _parse_report_metadata(request.args)
+            image_bytes = _read_image(request.stream)
+        else:
+            # JSON이 아닌 Content-Type은 None으로 받아서 아래 필수 필드 검증에서 400 응답
+            data = request.get_json(silent=True)
 
         # 필수 필드 검증
         if not data or 'camera_id' not in data:
@@ -262,78 +479,81 @@ def report_detection():
             'detected_objects': data.get('detected_objects', []),
             'confidence': data.get('confidence', 0.0),
             'timestamp': timestamp,
-            'status': 'pending',  # pending, processing, completed
-            'created_at': datetime.now().isoformat()
+            'status': 'pending'  # pending, processing, completed (created_at은 저장 시 기록)
         }
 
-        # 이미지 저장 (있는 경우)
-        image_filename = None
-        if 'image_base64' in data and data['image_base64']:
-            try:
-                # Base64 디코딩
-                image_data = base64.b64decode(data['image_base64'])
-
-                # 파일명 생성
-                timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-                image_filename = f'detection_{event_id}_{timestamp_str}.jpg'
-                image_path = os.path.join(DETECTION_EVENTS_DIR, image_filename)
-
-                # 파일 저장
-                with open(image_path, 'wb') as f:
-                    f.write(image_data)
-
-                event['image_filename'] = image_filename
-                event['image_url'] = f'/api/detection/image/{image_filename}'
-            except Exception as e:
-                print(f"Failed to save image: {e}")
-
-        # 메모리에 이벤트 추가
-        with detection_events_lock:
-            detection_events.append(event)
-
-            # 최근 1000개만 유지
-            if len(detection_events) > 1000:
-                detection_events[:] = detection_events[-1000:]
-
-        # JSON 파일로도 저장
-        json_filename = f'detection_{event_id}.json'
-        json_path = os.path.join(DETECTION_EVENTS_DIR, json_filename)
-
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(event, f, indent=2, ensure_ascii=False)
-
-        return jsonify({
+        image_base64 = data.get('image_base64') if image_bytes is None else None
+        if image_bytes or image_base64:
+            image_filename = _image_filename(event_id)
+            event['image_filename'] = image_filename
+            event['image_url'] = f'/api/detection/image/{image_filename}'
+
+        job = {'event': event, 'image_bytes': image_bytes or None, 'image_base64': image_base64}
+
+        if ingest_pool is None:
+            persist_detection(job)
+            return jsonify({
+                'success': True,
+                'event_id': event_id,
+                'message': 'Detection event recorded',
+                'event': event
+            }), 201
+
+        # 수신 워커가 event를 수정하므로(created_at 기록 등) 응답 본문은 대기열에 넣기 전에 만듦
+        accepted = jsonify({
             'success': True,
             'event_id': event_id,
-            'message': 'Detection event recorded',
+            'message': 'Detection event accepted',
             'event': event
-        }), 201
+        })
+        if not ingest_pool.submit(job):
+            response = jsonify({'error': 'Ingest queue is full, retry later'})
+            response.headers['Retry-After'] = '1'
+            return response, 429
 
+        return accepted, 202
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/detection/events', methods=['GET'])
 def get_detection_events():
-    """감지 이벤트 목록 조회"""
-    with detection_events_lock:
-        # 쿼리 파라미터
-        limit = request.args.get('limit', default=50, type=int)
-        status_filter = request.args.get('status', default=None, type=str)
-
-        # 필터링
-        events = detection_events.copy()
-
-        if status_filter:
-            events = [e for e in events if e.get('status') == status_filter]
+    """
+    감지 이벤트 목록 조회 (최신순)
+
+    Query parameters:
+        limit: 최대 개수 (기본값 50)
+        status: 상태 필터
+        camera_id: 카메라 필터
+        cursor: 이전 응답의 next_cursor (다음 페이지)
+        since / until: 생성 시각 범위 (ISO 8601)
+    """
+    limit = request.args.get('limit', default=50, type=int)
+    status_filter = request.args.get('status', default=None, type=str)
+    camera_filter = request.args.get('camera_id', default=None, type=int)
+    cursor = request.args.get('cursor', default=None, type=int)
+    since = request.args.get('since', default=None, type=str)
+    until = request.args.get('until', default=None, type=str)
 
-        # 최신순 정렬 후 제한
-        events.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        events = events[:limit]
+    try:
+        events, next_cursor = event_store.query(
+            status=status_filter,
+            camera_id=camera_filter,
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            until=until
+        )
+    except ValueError as e:
+        return jsonify({'error': f'Invalid time range: {e}'}), 400
 
-        return jsonify({
-            'total': len(events),
-            'events': events
-        })
+    return jsonify({
+        'total': len(events),
+        'events': events,
+        'next_cursor': next_cursor
+    })
 
 @app.route('/api/detection/image/<filename>')
 def get_detection_image(filename):
@@ -347,17 +567,16 @@ def get_detection_image(filename):
 @app.route('/api/status')
 def status():
     """서버 상태"""
-    with detection_events_lock:
-        recent_detections = len([e for e in detection_events
-                                if datetime.fromisoformat(e['created_at']) >
-                                datetime.now() - timedelta(hours=1)])
+    recent_detections = event_store.count_recent()
 
     return jsonify({
         'status': 'running',
         'timestamp': datetime.now().isoformat(),
         'active_cameras': len([c for c in cameras.values() if c.is_running]),
-        'total_detection_events': len(detection_events),
-        'recent_detections_1h': recent_detections
+        'total_detection_events': len(event_store),
+        'recent_detections_1h': recent_detections,
+        'inference': inference_scheduler.stats() if inference_scheduler else None,
+        'ingest': ingest_pool.stats() if ingest_pool else None
     })
 
 @app.route('/')
@@ -375,6 +594,7 @@ def index():
                 <li>POST /api/camera/{id}/start - 카메라 시작</li>
                 <li>POST /api/camera/{id}/stop - 카메라 정지</li>
                 <li>GET /api/camera/{id}/stream - 비디오 스트림</li>
+                <li>GET /api/camera/{id}/detections - 서버 측 감지 결과</li>
                 <li>GET /api/status - 서버 상태</li>
             </ul>
             <h2>테스트:</h2>
@@ -383,17 +603,40 @@ def index():
     </html>
     """
 
+def init_server():
+    """
+    기본 카메라 초기화 및 서버 측 감지 시작
+
+    개발 서버(__main__)와 gunicorn(wsgi.py) 모두 프로세스 시작 시 한 번 호출합니다.
+    """
+    # 기본 카메라 3개 초기화
+    with camera_lock:
+        for i in range(1, 4):
+            cameras[i] = CameraStream(i, 0 if i == 1 else None)
+
+    if DETECTION_MODEL_PATH:
+        start_inference_scheduler(DETECTION_MODEL_PATH)
+
+def shutdown_server():
+    """대기 중인 이벤트 저장 후 로그 닫기"""
+    if ingest_pool:
+        ingest_pool.stop()
+    event_log.close()
+
 if __name__ == '__main__':
     print("=" * 60)
-    print("CCTV 카메라 스트리밍 서버 시작")
+    print("CCTV 카메라 스트리밍 서버 시작 (개발 서버)")
     print("=" * 60)
     print(f"서버 주소: http://localhost:5000")
     print(f"API 문서: http://localhost:5000")
+    print("운영 환경: gunicorn -c gunicorn.conf.py wsgi:app")
     print("=" * 60)
 
-    # 기본 카메라 3개 초기화
-    with camera_lock:
-        for i in range(1, 4):
-            cameras[i] = CameraStream(i, 0 if i == 1 else None)
+    init_server()
 
-    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
+    # 리로더를 쓰면 모듈이 두 번 로드되어 카메라/이벤트 로그가 중복으로 열리므로 끔
+    debug = os.environ.get('FLASK_DEBUG', '0') == '1'
+    try:
+        app.run(host='0.0.0.0', port=5000, debug=debug, use_reloader=False, threaded=True)
+    finally:
+        shutdown_server()
@@ -3,7 +3,7 @@ CCTV 카메라 스트리밍 서버 (더미 버전)
 웹캠 없이도 테스트용 영상을 생성합니다.
 """
 
-from flask import Flask, Response, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import cv2
 import numpy as np
@@ -11,6 +11,8 @@ import threading
 import time
 from datetime import datetime
 import math
+from frame_channel import FrameChannel
+from mjpeg_broadcaster import MjpegBroadcaster, limit_send_buffer, parse_stream_options
 
 app = Flask(__name__)
 CORS(app)
@@ -23,9 +25,9 @@ class DummyCameraStream:
     def __init__(self, camera_id):
         self.camera_id = camera_id
         self.is_running = False
-        self.last_frame = None
-        self.frame_lock = threading.Lock()
+        self.frame_channel = FrameChannel(history=5)
         self.frame_count = 0
+        self.broadcaster = MjpegBroadcaster(self.frame_channel, quality=80)
 
     def start(self):
         if self.is_running:
@@ -78,38 +80,32 @@ class DummyCameraStream:
                 cv2.putText(frame, 'REC', (560, 40),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
 
-            with self.frame_lock:
-                self.last_frame = frame
+            self.frame_channel.publish(frame)
 
             self.frame_count += 1
             time.sleep(0.033)  # ~30 FPS
 
     def get_frame(self):
-        with self.frame_lock:
-            return self.last_frame.copy() if self.last_frame is not None else None
+        _, frame = self.frame_channel.latest()
+        return frame.copy() if frame is not None else None
+
+    def get_latest_frame(self):
+        """현재 프레임과 시퀀스 번호 (복사 없음, 읽기 전용)"""
+        return self.frame_channel.latest()
 
     def stop(self):
         self.is_running = False
 
-def generate_frames(camera_id):
-    """프레임 생성기"""
+def generate_frames(camera_id, drop_frames=True, profile=None, max_fps=None, adaptive=False):
+    """프레임 생성기 (카메라당 1회 인코딩 공유)"""
     camera = cameras.get(camera_id)
     if not camera:
         return
 
-    while camera.is_running:
-        frame = camera.get_frame()
-        if frame is None:
-            time.sleep(0.1)
-            continue
-
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        if not ret:
-            continue
-
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+    # 인코딩은 카메라/프로필당 한 번만 하고 같은 프로필의 클라이언트가 같은 바이트를 공유
+    yield from camera.broadcaster.stream(
+        lambda: camera.is_running, drop_frames, profile, max_fps, adaptive
+    )
 
 @app.route('/api/cameras', methods=['GET'])
 def get_cameras():
@@ -158,8 +154,18 @@ def video_stream(camera_id):
     if camera_id not in cameras:
         return jsonify({'error': 'Camera not found'}), 404
 
+    # ?q=, ?w=, ?fps=, ?adaptive=1, ?drop=0 (mjpeg_broadcaster 참고)
+    try:
+        options = parse_stream_options(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid stream parameters'}), 400
+
+    # 적응형 모드는 쓰기 지연이 빨리 드러나도록 송신 버퍼를 줄임
+    if options['adaptive']:
+        limit_send_buffer(request.environ)
+
     return Response(
-        generate_frames(camera_id),
+        generate_frames(camera_id, **options),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
@@ -0,0 +1,191 @@
+"""
+이벤트 영상 백그라운드 기록/업로드
+감지 루프는 trigger()만 호출하고 바로 돌아가며, 워커 스레드가 링 버퍼의 이벤트 이전 프레임과
+이벤트 이후 프레임을 mp4로 인코딩한 뒤 업로드 함수를 호출합니다.
+
+워커는 링 버퍼 슬롯을 복사 없이 읽어서 바로 VideoWriter에 넘깁니다
+(OpenCV 인코딩은 GIL을 놓기 때문에 프로세스를 따로 띄울 필요가 없습니다).
+
+사용 예:
+    recorder = ClipRecorder(frame_buffer, upload_fn=lambda photo, video: ...)
+    recorder.trigger(snapshot_frame, 'snapshot.jpg', 'clip.mp4', fps=15)
+"""
+
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+
+class ClipRecorder:
+    """링 버퍼 기반 이벤트 영상 기록기"""
+
+    def __init__(self, ring_buffer, upload_fn=None, output_dir='.', post_event_seconds=3.0,
+                 fourcc='mp4v', max_pending=2):
+        """
+        Args:
+            ring_buffer: FrameRingBuffer 또는 JpegFrameRingBuffer (캡처 스레드가 계속 채움)
+            upload_fn: 기록이 끝난 파일을 올리는 함수 upload_fn(photo_path, video_path)
+            output_dir: 사진/영상 저장 디렉토리
+            post_event_seconds: 이벤트 이후 추가로 기록할 시간 (초)
+            fourcc: 영상 코덱
+            max_pending: 대기 가능한 이벤트 수 (가득 차면 새 이벤트는 버림)
+        """
+        self.ring_buffer = ring_buffer
+        self.upload_fn = upload_fn
+        self.output_dir = output_dir
+        self.post_event_seconds = post_event_seconds
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stats_lock = threading.Lock()
+
+        # 통계
+        self.clips = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_timings = {}
+        self._encode_time_total = 0.0
+        self._upload_time_total = 0.0
+
+        self._thread = threading.Thread(target=self._worker, name='clip-recorder', daemon=True)
+        self._thread.start()
+
+    def trigger(self, snapshot, photo_name, video_name, fps):
+        """
+        이벤트 영상 기록 요청 (블록하지 않음)
+
+        Args:
+            snapshot: 사진으로 저장할 프레임 (호출 측이 계속 그리는 배열이면 복사해서 전달)
+            photo_name: 사진 파일 이름
+            video_name: 영상 파일 이름
+            fps: 캡처 FPS (영상 재생 속도 및 이후 프레임 수 계산)
+
+        Returns:
+            bool: 요청 접수 여부 (대기열이 가득 차면 False)
+        """
+        job = {
+            'snapshot': snapshot,
+            'name': video_name,
+            'photo_name': photo_name,
+            'fps': fps if fps > 0 else 10.0,
+            'trigger_seq': self.ring_buffer.latest_seq,
+            'triggered_at': time.time(),
+        }
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            print(f"⚠️  Clip recorder busy, event dropped: {video_name}")
+            return False
+        return True
+
+    def _worker(self):
+        """대기열에서 이벤트를 꺼내 기록 후 업로드"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._record(job)
+            except Exception as e:
+                with self._stats_lock:
+                    self.failed += 1
+                print(f"❌ Clip recording failed ({job['name']}): {e}")
+
+    def _record(self, job):
+        """사진 저장, 이전/이후 프레임 인코딩, 업로드"""
+        fps = job['fps']
+        trigger_seq = job['trigger_seq']
+        post_frames = int(round(self.post_event_seconds * fps))
+        end_seq = trigger_seq + post_frames
+        photo_path = os.path.join(self.output_dir, job['photo_name'])
+        video_path = os.path.join(self.output_dir, job['name'])
+
+        started = time.time()
+        cv2.imwrite(photo_path, job['snapshot'])
+
+        writer = None
+        frame_count = 0
+        pre_count = 0
+        encode_time = 0.0
+        torn_before = self.ring_buffer.torn_frames
+        seq = None
+
+        def write(frame):
+            nonlocal writer, frame_count, encode_time
+            write_started = time.perf_counter()
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(video_path, self.fourcc, fps, (width, height))
+            writer.write(frame)
+            frame_count += 1
+            encode_time += time.perf_counter() - write_started
+
+        try:
+            # 이벤트 이전 프레임 (링 버퍼에 남아 있는 것)
+            for seq, _, frame in self.ring_buffer.iter_frames(end_seq=trigger_seq):
+                write(frame)
+            pre_count = frame_count
+
+            # 이벤트 이후 프레임 (도착하는 대로 기록, 카메라가 멈추면 중단)
+            next_seq = (seq + 1) if seq is not None else trigger_seq + 1
+            while next_seq <= end_seq:
+                if not self.ring_buffer.wait_for(next_seq, timeout=2.0):
+                    print(f"⚠️  No new frames for clip {job['name']}, stopping early")
+                    break
+                for seq, _, frame in self.ring_buffer.iter_frames(start_seq=next_seq, end_seq=end_seq):
+                    write(frame)
+                    next_seq = seq + 1
+        finally:
+            if writer is not None:
+                writer.release()
+
+        encoded = time.time()
+        timings = {
+            'name': job['name'],
+            'frames': frame_count,
+            'pre_event_frames': pre_count,
+            'post_event_frames': frame_count - pre_count,
+            'torn_frames': self.ring_buffer.torn_frames - torn_before,
+            'encode_ms': round(encode_time * 1000, 1),
+            # 이벤트 이후 프레임을 기다린 시간이 포함됨
+            'record_ms': round((encoded - started) * 1000, 1),
+            'upload_ms': 0.0,
+            'total_ms': 0.0,
+        }
+
+        if self.upload_fn:
+            self.upload_fn(photo_path, video_path if writer is not None else None)
+        finished = time.time()
+        timings['upload_ms'] = round((finished - encoded) * 1000, 1)
+        timings['total_ms'] = round((finished - job['triggered_at']) * 1000, 1)
+
+        with self._stats_lock:
+            self.clips += 1
+            self._encode_time_total += encode_time
+            self._upload_time_total += finished - encoded
+            self.last_timings = timings
+        print(f"🎬 Clip {job['name']}: {frame_count} frames ({pre_count} before / {frame_count - pre_count} after), "
+              f"encode {timings['encode_ms']}ms, record {timings['record_ms']}ms, upload {timings['upload_ms']}ms")
+
+    def stop(self, timeout=30.0):
+        """대기 중인 이벤트를 처리한 뒤 종료"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        """기록/업로드 횟수 및 평균 시간"""
+        with self._stats_lock:
+            return {
+                'clips': self.clips,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'pending': self._queue.qsize(),
+                'avg_encode_ms': round(self._encode_time_total / self.clips * 1000, 1) if self.clips else 0.0,
+                'avg_upload_ms': round(self._upload_time_total / self.clips * 1000, 1) if self.clips else 0.0,
+                'last': dict(self.last_timings),
+            }
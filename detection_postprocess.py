@@ -0,0 +1,128 @@
+"""
+YOLOv8 출력 후처리 (벡터화 버전)
+8400개 후보 행을 파이썬 루프 없이 NumPy 배열 연산 한 번으로 처리합니다.
+
+출력 텐서 형식: (1, 4 + 클래스 수, 후보 수) - [cx, cy, w, h, class scores...]
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# 감지 결과 (프레임 1장 기준)
+#   boxes:     (N, 4) float32 - [x1, y1, x2, y2]
+#   scores:    (N,)   float32
+#   class_ids: (N,)   int32
+Detections = namedtuple('Detections', ['boxes', 'scores', 'class_ids'])
+
+
+def empty_detections():
+    """빈 감지 결과 반환"""
+    return Detections(
+        np.zeros((0, 4), dtype=np.float32),
+        np.zeros((0,), dtype=np.float32),
+        np.zeros((0,), dtype=np.int32),
+    )
+
+
+def xywh_to_xyxy(xywh):
+    """
+    [cx, cy, w, h] 박스를 [x1, y1, x2, y2]로 변환
+
+    Args:
+        xywh: (N, 4) 배열
+
+    Returns:
+        np.ndarray: (N, 4) float32 배열
+    """
+    xywh = np.asarray(xywh, dtype=np.float32)
+    half_wh = xywh[:, 2:4] * 0.5
+    return np.concatenate((xywh[:, 0:2] - half_wh, xywh[:, 0:2] + half_wh), axis=1)
+
+
+def box_iou(box, boxes):
+    """
+    박스 1개와 여러 박스 사이의 IoU 계산
+
+    Args:
+        box: (4,) [x1, y1, x2, y2]
+        boxes: (N, 4) [x1, y1, x2, y2]
+
+    Returns:
+        np.ndarray: (N,) IoU
+    """
+    ix1 = np.maximum(box[0], boxes[:, 0])
+    iy1 = np.maximum(box[1], boxes[:, 1])
+    ix2 = np.minimum(box[2], boxes[:, 2])
+    iy2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def nms(boxes, scores, class_ids, iou_threshold=0.4, max_detections=300):
+    """
+    클래스별 NMS (Non-Maximum Suppression)
+
+    클래스마다 좌표를 겹치지 않게 이동시켜 한 번의 NMS로 클래스별 억제를 수행합니다.
+
+    Args:
+        boxes: (N, 4) [x1, y1, x2, y2]
+        scores: (N,) 신뢰도
+        class_ids: (N,) 클래스 ID
+        iou_threshold: IoU 임계값
+        max_detections: 최대 유지 개수
+
+    Returns:
+        np.ndarray: 유지할 인덱스 (신뢰도 내림차순)
+    """
+    if len(boxes) == 0:
+        return np.zeros((0,), dtype=np.int64)
+
+    offset = class_ids.astype(np.float32)[:, None] * (float(boxes.max()) + 1.0)
+    shifted = boxes + offset
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size > 0 and len(keep) < max_detections:
+        i = order[0]
+        keep.append(i)
+        if order.size == 1:
+            break
+        iou = box_iou(shifted[i], shifted[order[1:]])
+        order = order[1:][iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+def postprocess_yolov8(output, conf_threshold=0.4, nms_threshold=0.4, max_detections=300):
+    """
+    YOLOv8 ONNX 출력 후처리
+
+    Args:
+        output: 모델 출력 (1, 4 + nc, N) 또는 (4 + nc, N)
+        conf_threshold: 신뢰도 임계값
+        nms_threshold: NMS IoU 임계값
+        max_detections: 최대 감지 개수
+
+    Returns:
+        Detections: 입력 텐서 좌표계의 감지 결과
+    """
+    pred = np.asarray(output)
+    if pred.ndim == 3:
+        pred = pred[0]
+
+    # 후보별 최고 클래스 점수로 먼저 거른 뒤, 남은 열에만 argmax 수행
+    class_scores = pred[4:]
+    best_scores = class_scores.max(axis=0)
+    candidates = np.flatnonzero(best_scores >= conf_threshold)
+    if candidates.size == 0:
+        return empty_detections()
+
+    scores = best_scores[candidates].astype(np.float32)
+    class_ids = class_scores[:, candidates].argmax(axis=0).astype(np.int32)
+    boxes = xywh_to_xyxy(pred[:4, candidates].T)
+
+    keep = nms(boxes, scores, class_ids, nms_threshold, max_detections)
+    return Detections(boxes[keep], scores[keep], class_ids[keep])
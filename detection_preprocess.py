@@ -0,0 +1,113 @@
+"""
+YOLOv8 입력 전처리 (레터박스 + 사전 할당 텐서)
+
+프레임 비율을 유지한 채로 모델 입력 크기에 맞추고(레터박스),
+매 프레임마다 새 배열을 만들지 않도록 NCHW float32 텐서를 한 번만 할당해 재사용합니다.
+"""
+
+import cv2
+import numpy as np
+
+# YOLOv8 학습 시 사용하는 패딩 색상
+PAD_VALUE = 114
+
+
+class LetterboxPreprocessor:
+    """레터박스 전처리기 (입력 텐서 재사용)"""
+
+    def __init__(self, input_width=640, input_height=640, batch_size=1, swap_rb=False, pad_value=PAD_VALUE):
+        """
+        Args:
+            input_width: 모델 입력 너비
+            input_height: 모델 입력 높이
+            batch_size: 텐서 배치 크기 (여러 카메라 프레임을 한 번에 추론할 때)
+            swap_rb: True면 BGR <-> RGB 채널 순서를 바꿔서 텐서에 기록
+            pad_value: 레터박스 패딩 색상 값
+        """
+        self.input_width = input_width
+        self.input_height = input_height
+        self.batch_size = batch_size
+        self.pad_value = pad_value
+        self.channel_order = (2, 1, 0) if swap_rb else (0, 1, 2)
+
+        # 모델 입력 텐서 (N, 3, H, W) - 한 번만 할당
+        self.tensor = np.zeros((batch_size, 3, input_height, input_width), dtype=np.float32)
+
+        # 슬롯별 uint8 캔버스 및 원본 좌표 복원 정보
+        self._canvases = np.full((batch_size, input_height, input_width, 3), pad_value, dtype=np.uint8)
+        self._geometry = [None] * batch_size
+        self.scales = np.ones(batch_size, dtype=np.float32)
+        self.pads = np.zeros((batch_size, 2), dtype=np.float32)
+        self.source_sizes = np.zeros((batch_size, 2), dtype=np.int32)
+
+    def __call__(self, frame):
+        """
+        프레임 1장을 전처리하여 (1, 3, H, W) 텐서 반환
+
+        반환값은 내부 버퍼의 뷰이므로 다음 호출 시 덮어쓰여집니다.
+        """
+        self.load(frame, 0)
+        return self.tensor[:1]
+
+    def load(self, frame, index=0):
+        """
+        프레임을 텐서의 index번째 슬롯에 레터박스로 기록
+
+        Args:
+            frame: HWC uint8 이미지
+            index: 배치 슬롯 번호
+        """
+        height, width = frame.shape[:2]
+        scale = min(self.input_width / width, self.input_height / height)
+        new_width = int(round(width * scale))
+        new_height = int(round(height * scale))
+        pad_x = (self.input_width - new_width) // 2
+        pad_y = (self.input_height - new_height) // 2
+
+        canvas = self._canvases[index]
+        geometry = (width, height)
+        if self._geometry[index] != geometry:
+            # 프레임 크기가 바뀐 경우에만 패딩 영역을 다시 채움
+            canvas[...] = self.pad_value
+            self._geometry[index] = geometry
+
+        region = canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width]
+        if new_width == width and new_height == height:
+            np.copyto(region, frame)
+        else:
+            resized = cv2.resize(frame, (new_width, new_height), dst=region, interpolation=cv2.INTER_LINEAR)
+            if not np.shares_memory(resized, region):
+                region[...] = resized
+
+        # HWC uint8 -> CHW float32 [0, 1] (채널별로 기존 텐서에 직접 기록)
+        for dst_channel, src_channel in enumerate(self.channel_order):
+            np.multiply(canvas[:, :, src_channel], np.float32(1.0 / 255.0), out=self.tensor[index, dst_channel])
+
+        self.scales[index] = scale
+        self.pads[index] = (pad_x, pad_y)
+        self.source_sizes[index] = (width, height)
+
+    def scale_boxes(self, boxes, index=0):
+        """
+        모델 입력 좌표계의 박스를 원본 프레임 좌표로 변환 (제자리 연산)
+
+        Args:
+            boxes: (N, 4) float32 [x1, y1, x2, y2]
+            index: 배치 슬롯 번호
+
+        Returns:
+            np.ndarray: 변환된 boxes (같은 배열)
+        """
+        if len(boxes) == 0:
+            return boxes
+
+        pad_x, pad_y = self.pads[index]
+        width, height = self.source_sizes[index]
+        xs = boxes[:, 0::2]
+        ys = boxes[:, 1::2]
+        xs -= pad_x
+        ys -= pad_y
+        boxes /= self.scales[index]
+        np.clip(xs, 0, width, out=xs)
+        np.clip(ys, 0, height, out=ys)
+        return boxes
@@ -3,15 +3,19 @@
 Google Drive 기능 제외, Firebase 연동만 포함
 """
 import cv2
-import numpy as np
-import onnxruntime as ort
 from picamera2 import Picamera2
 import time
 import pygame
-from collections import deque
 from datetime import datetime
 import firebase_admin
 from firebase_admin import credentials, firestore
+from detector_engine import DetectorEngine, OnnxRuntimeBackend
+from motion_gate import MotionGate
+from object_tracker import ObjectTracker, empty_tracks, max_dwell
+from temporal_aggregator import TemporalAggregator
+from frame_pipeline import FramePipeline
+from event_outbox import EventOutbox, FirestoreOutboxSink, make_firestore_record
+from firestore_bulk_writer import FirestoreBulkWriter
 
 # ==================== 설정 ====================
 # ONNX 모델 설정
@@ -33,18 +37,29 @@ GUIDE_CYCLE = 15      # 안내 전체 주기 (초)
 WARNING_CYCLE = 31    # 경고 전체 주기 (초)
 
 # 감지 설정
-DETECTION_WINDOW = 10    # 감지 판단 윈도우 (초)
-REQUIRED_DURATION = 3    # 필요한 지속 시간 (초)
+DETECTION_WINDOW = 10    # 담배/연기 출현 시간을 세는 구간 (초)
+REQUIRED_DURATION = 3    # 같은 사람(트랙)이 머물러야 하는 시간 / 구간 안에서 담배·연기가 보여야 하는 시간 (초)
+PRESENCE_MAX_GAP = 2.0    # 감지 프레임 사이를 출현으로 채우는 최대 간격 (초, N프레임 간격보다 커야 함)
+
+# 추적 설정 (감지는 N프레임마다, 사이 프레임은 추적기가 위치 예측)
+DETECT_EVERY_N = 3
+TRACK_LOW_THRESHOLD = 0.1    # 추적기 2차 연결에 쓰는 낮은 신뢰도 감지까지 받음
+TRACK_BUFFER = 1.0           # 감지가 끊겨도 같은 트랙으로 유지할 시간 (초)
+
+# 움직임 게이트 설정 (정지 장면에서는 감지 생략)
+MOTION_GATE_ENABLED = True
+MOTION_KEEPALIVE = 2.0         # 변화가 없어도 감지할 주기 (초)
+MOTION_ACTIVE_KEEPALIVE = 0.5  # 물체가 감지된 상태일 때의 주기 (초)
+MOTION_STATS_INTERVAL = 60     # 게이트 통계 출력 주기 (초)
 
 # Firebase 설정
 FIREBASE_CREDENTIAL_PATH = "firebase-service-account.json"
 
-# ==================== 전역 변수 ====================
-person_detections = deque(maxlen=DETECTION_WINDOW)
-cigarette_detections = deque(maxlen=DETECTION_WINDOW)
-smoke_detections = deque(maxlen=DETECTION_WINDOW)
-fire_detections = deque(maxlen=DETECTION_WINDOW)
+# 오프라인 아웃박스 설정 (전송 실패 이벤트 보관)
+OUTBOX_PATH = "outbox.db"
+OUTBOX_DRAIN_INTERVAL = 30  # 재전송 시도 주기 (초)
 
+# ==================== 전역 변수 ====================
 last_guide_time = 0
 last_warning_time = 0
 
@@ -63,10 +78,34 @@ except Exception as e:
     print("[WARNING] Firebase 없이 계속 진행합니다")
     db = None
 
+# 전송 실패 이벤트는 디스크에 보관했다가 연결이 돌아오면 배치로 재전송
+outbox = EventOutbox(OUTBOX_PATH)
+bulk_writer = None
+if db is not None:
+    # 이벤트 쓰기는 백그라운드에서 WriteBatch로 병합 커밋 (감지 루프는 기다리지 않음)
+    bulk_writer = FirestoreBulkWriter(db)
+    outbox.start_drainer(FirestoreOutboxSink(db), kind='firestore', interval=OUTBOX_DRAIN_INTERVAL)
+
 # ==================== ONNX 모델 로드 ====================
 print(f"[INFO] ONNX 모델 로드 중: {ONNX_MODEL_PATH}")
-session = ort.InferenceSession(ONNX_MODEL_PATH, providers=['CPUExecutionProvider'])
-print("[INFO] ONNX 모델 로드 완료")
+engine = DetectorEngine(
+    OnnxRuntimeBackend(ONNX_MODEL_PATH, INPUT_WIDTH, INPUT_HEIGHT),
+    labels, TRACK_LOW_THRESHOLD, NMS_THRESHOLD
+)
+print(f"[INFO] ONNX 모델 로드 완료 {engine.backend.session.session_info}")
+
+motion_gate = MotionGate(
+    keepalive_interval=MOTION_KEEPALIVE,
+    active_keepalive_interval=MOTION_ACTIVE_KEEPALIVE
+) if MOTION_GATE_ENABLED else None
+
+# 트랙별 머문 시간으로 "한 사람이 계속 있음"과 "여러 사람이 지나감"을 구분
+tracker = ObjectTracker(high_threshold=CONF_THRESHOLD, low_threshold=TRACK_LOW_THRESHOLD,
+                        new_track_threshold=CONF_THRESHOLD, track_buffer=TRACK_BUFFER)
+
+# 클래스별 최근 출현 시간 (FPS와 무관, 담배처럼 트랙이 자주 끊기는 작은 물체용)
+# 트랙이 아니라 감지 프레임의 원본 감지 결과(CONF_THRESHOLD 이상)로 갱신
+presence = TemporalAggregator(labels, window=DETECTION_WINDOW, max_gap=PRESENCE_MAX_GAP)
 
 # ==================== 카메라 초기화 ====================
 print("[INFO] Picamera2 초기화 중...")
@@ -79,45 +118,6 @@ picam2.start()
 time.sleep(2)
 print("[INFO] 카메라 준비 완료")
 
-# ==================== 전처리 함수 ====================
-def preprocess(frame):
-    """YOLOv8 ONNX 입력 형식으로 전처리"""
-    img = cv2.resize(frame, (INPUT_WIDTH, INPUT_HEIGHT))
-    img = img.astype(np.float32) / 255.0
-    img = np.transpose(img, (2, 0, 1))  # HWC -> CHW
-    img = np.expand_dims(img, axis=0)   # 배치 차원 추가
-    return img
-
-# ==================== 후처리 함수 ====================
-def postprocess(outputs, conf_threshold=0.4, nms_threshold=0.4):
-    """YOLOv8 출력 후처리"""
-    output = outputs[0][0]
-    output = output.T  # (84, 8400) -> (8400, 84)
-
-    boxes = []
-    scores = []
-    class_ids = []
-
-    for detection in output:
-        x, y, w, h = detection[0:4]
-        class_scores = detection[4:]
-        class_id = np.argmax(class_scores)
-        confidence = class_scores[class_id]
-
-        if confidence >= conf_threshold:
-            boxes.append([x - w/2, y - h/2, w, h])
-            scores.append(float(confidence))
-            class_ids.append(class_id)
-
-    # NMS
-    if len(boxes) > 0:
-        indices = cv2.dnn.NMSBoxes(boxes, scores, conf_threshold, nms_threshold)
-        if len(indices) > 0:
-            indices = indices.flatten()
-            return [boxes[i] for i in indices], [scores[i] for i in indices], [class_ids[i] for i in indices]
-
-    return [], [], []
-
 # ==================== 음성 재생 함수 ====================
 def play_audio_safe(audio_file):
     """안전한 음성 재생 (중복 방지)"""
@@ -130,16 +130,9 @@ def play_audio_safe(audio_file):
             print(f"[ERROR] 음성 재생 실패: {e}")
 
 # ==================== 감지 확인 함수 ====================
-def check_detection_duration(detections, required_duration=REQUIRED_DURATION):
-    """감지 지속 시간 확인"""
-    if len(detections) == 0:
-        return False
-    current_time = time.time()
-    recent_detections = [t for t in detections if current_time - t <= DETECTION_WINDOW]
-
-    if len(recent_detections) >= required_duration:
-        return True
-    return False
+def check_detection_duration(label, required_duration=REQUIRED_DURATION):
+    """최근 DETECTION_WINDOW초 중 label이 required_duration초 이상 보였는지 확인"""
+    return presence.present_for(label, required_duration, DETECTION_WINDOW)
 
 # ==================== Firebase 저장 함수 ====================
 def save_to_firebase(event_type, details):
@@ -155,10 +148,25 @@ def save_to_firebase(event_type, details):
             'resolved': False
         }
 
-        doc_ref = db.collection('detection_events').add(event_data)
-        print(f"[FIREBASE] 이벤트 저장 완료: {event_type}")
+        future = bulk_writer.write('detection_events', event_data)
+        future.add_done_callback(lambda f: _on_firebase_saved(f, event_type, event_data))
     except Exception as e:
         print(f"[ERROR] Firebase 저장 실패: {e}")
+        _save_to_outbox(event_data)
+
+def _on_firebase_saved(future, event_type, event_data):
+    """일괄 커밋 결과 처리 (실패하면 아웃박스에 보관)"""
+    error = future.exception()
+    if error is None:
+        print(f"[FIREBASE] 이벤트 저장 완료: {event_type} ({future.result()})")
+    else:
+        print(f"[ERROR] Firebase 저장 실패: {error}")
+        _save_to_outbox(event_data)
+
+def _save_to_outbox(event_data):
+    """전송 실패 이벤트를 아웃박스에 보관"""
+    outbox.put('firestore', make_firestore_record('detection_events', event_data))
+    print(f"[OUTBOX] 이벤트 보관 (대기 {outbox.stats()['pending']}건)")
 
 # ==================== 메인 루프 ====================
 print("[INFO] 감지 시작...")
@@ -168,23 +176,52 @@ print("=" * 50)
 cv2.namedWindow('Smoke Detection', cv2.WINDOW_NORMAL)
 cv2.resizeWindow('Smoke Detection', 640, 480)
 
-try:
-    while True:
-        # 프레임 캡처
-        frame = picam2.capture_array()
-        current_time = time.time()
+last_tracks = empty_tracks()
+frame_index = 0
+last_gate_stats_time = time.time()
 
-        # 화면 표시용 프레임 복사
-        display_frame = frame.copy()
 
-        # 전처리
-        input_data = preprocess(frame)
+def run_detection(frame, timestamp):
+    """
+    추론 스레드에서 실행: N프레임마다 감지 후 추적기 갱신, 나머지 프레임은 위치 예측
 
-        # 추론
-        outputs = session.run(None, {session.get_inputs()[0].name: input_data})
+    Returns:
+        tuple: (트랙, 감지된 클래스 이름 집합 - 감지하지 않은 프레임은 None)
+    """
+    global last_tracks, frame_index
+    detect_now = frame_index % DETECT_EVERY_N == 0
+    frame_index += 1
+    # 장면 변화가 없으면 감지를 건너뛰고 추적기 예측만 사용
+    if detect_now and (motion_gate is None or motion_gate.should_infer(frame, active=len(last_tracks.boxes) > 0)):
+        detections = engine.detect(frame)[0]
+        last_tracks = tracker.update(detections, timestamp)
+        confident = detections.class_ids[detections.scores >= CONF_THRESHOLD]
+        return last_tracks, {labels[class_id] for class_id in confident if class_id < len(labels)}
+    last_tracks = tracker.predict(timestamp)
+    return last_tracks, None
 
-        # 후처리
-        boxes, scores, class_ids = postprocess(outputs, CONF_THRESHOLD, NMS_THRESHOLD)
+
+# 캡처 스레드 → 추론 스레드 → 메인 스레드(그리기/음성/Firebase/화면 표시)
+# 카메라는 추론을 기다리지 않고, 추론은 항상 최신 프레임을 처리
+pipeline = FramePipeline(picam2.capture_array, run_detection)
+pipeline.start()
+
+try:
+    for item in pipeline.results():
+        current_time = item.timestamp
+
+        # 캡처 스레드가 프레임마다 새 배열을 만들므로 그대로 화면 표시에 사용
+        display_frame = item.frame
+        tracks, detected_labels = item.result
+        # 출현 시간은 실제 감지 결과로만 누적 (예측 위치로 이어지는 트랙은 제외)
+        if detected_labels is not None:
+            presence.update(current_time, detected_labels)
+
+        if motion_gate is not None and current_time - last_gate_stats_time >= MOTION_STATS_INTERVAL:
+            gate_stats = motion_gate.stats()
+            print(f"[INFO] 움직임 게이트: 추론 {gate_stats['inferred']} / 생략 {gate_stats['gated']} "
+                  f"({gate_stats['gated_ratio']:.0%}), CPU 온도 {gate_stats['cpu_temp_c']}°C")
+            last_gate_stats_time = current_time
 
         # 감지 결과 기록
         person_detected = False
@@ -192,42 +229,34 @@ try:
         smoke_detected = False
         fire_detected = False
 
-        # 감지된 객체에 바운딩 박스 그리기
-        for box, score, class_id in zip(boxes, scores, class_ids):
+        # 추적 중인 객체에 바운딩 박스 그리기
+        for box, score, class_id, track_id, dwell in zip(*tracks):
             label = labels[class_id]
-            x, y, w, h = box
 
             # 바운딩 박스 좌표 계산
-            x1 = int(x)
-            y1 = int(y)
-            x2 = int(x + w)
-            y2 = int(y + h)
+            x1, y1, x2, y2 = map(int, box)
 
             # 클래스별 색상 설정
             if label == "Person":
                 color = (0, 255, 0)  # 초록색
                 person_detected = True
-                person_detections.append(current_time)
             elif label == "Cigarette":
                 color = (0, 0, 255)  # 빨간색
                 cigarette_detected = True
-                cigarette_detections.append(current_time)
             elif label == "Smoke":
                 color = (0, 165, 255)  # 주황색
                 smoke_detected = True
-                smoke_detections.append(current_time)
             elif label == "Fire":
                 color = (0, 0, 255)  # 빨간색
                 fire_detected = True
-                fire_detections.append(current_time)
             else:
                 color = (255, 255, 255)
 
             # 바운딩 박스 그리기
             cv2.rectangle(display_frame, (x1, y1), (x2, y2), color, 2)
 
-            # 레이블과 신뢰도 표시
-            label_text = f"{label}: {score:.2f}"
+            # 레이블, 트랙 ID, 머문 시간 표시
+            label_text = f"{label} #{track_id} {dwell:.1f}s"
             cv2.putText(display_frame, label_text, (x1, y1 - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
@@ -253,9 +282,10 @@ try:
             status_y += 40
 
         # 음성 안내/경고 판단
-        person_sustained = check_detection_duration(person_detections)
-        cigarette_sustained = check_detection_duration(cigarette_detections)
-        smoke_sustained = check_detection_duration(smoke_detections)
+        # 사람은 같은 트랙이 머문 시간, 담배/연기는 최근 구간의 출현 시간으로 판단
+        person_sustained = max_dwell(tracks, [labels.index("Person")]) >= REQUIRED_DURATION
+        cigarette_sustained = check_detection_duration("Cigarette")
+        smoke_sustained = check_detection_duration("Smoke")
 
         # 경고 상황 (Person + Cigarette/Smoke)
         if person_sustained and (cigarette_sustained or smoke_sustained):
@@ -292,14 +322,19 @@ try:
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
-        # 잠시 대기
-        time.sleep(0.1)
-
 except KeyboardInterrupt:
     print("\n[INFO] 프로그램 종료 중...")
 
 finally:
+    pipeline.stop()
+    print(f"[INFO] 파이프라인 통계: {pipeline.stats()}")
+    print(f"[INFO] 추적기 통계: {tracker.stats()}")
     picam2.stop()
     pygame.mixer.quit()
     cv2.destroyAllWindows()
+    if bulk_writer is not None:
+        bulk_writer.close()
+    outbox.close()
+    if motion_gate is not None:
+        print(f"[INFO] 움직임 게이트 통계: {motion_gate.stats()}")
     print("[INFO] 정리 완료. 프로그램 종료.")
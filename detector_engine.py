@@ -0,0 +1,225 @@
+"""
+흡연 감지 추론 엔진
+ONNX Runtime / ultralytics 모델을 같은 인터페이스로 사용할 수 있도록 감쌉니다.
+
+카메라나 화면 없이 import 할 수 있으며, 모든 감지 스크립트가 이 엔진 하나를 공유합니다.
+
+사용 예:
+    engine = DetectorEngine.from_model('final_detection640.onnx')
+    detections = engine.detect(frame)[0]
+"""
+
+import time
+
+import numpy as np
+
+from detection_postprocess import Detections, postprocess_yolov8
+from detection_preprocess import LetterboxPreprocessor
+from onnx_session import DEFAULT_CACHE_DIR, IoBindingRunner, create_session
+
+# 흡연 감지 모델 클래스 레이블
+DEFAULT_LABELS = ["Person", "Cigarette", "Smoke", "Fire"]
+
+
+class OnnxRuntimeBackend:
+    """ONNX Runtime 백엔드 (YOLOv8 ONNX 모델)"""
+
+    def __init__(self, model_path, input_width=640, input_height=640, swap_rb=False, providers=None,
+                 intra_op_threads=None, cache_dir=DEFAULT_CACHE_DIR, warmup_runs=3):
+        """
+        Args:
+            model_path: ONNX 모델 경로
+            input_width: 입력 너비 (모델에 고정 크기가 있으면 모델 값 사용)
+            input_height: 입력 높이 (모델에 고정 크기가 있으면 모델 값 사용)
+            swap_rb: True면 BGR 프레임을 RGB로 바꿔서 입력
+            providers: ONNX Runtime 실행 프로바이더 목록
+            intra_op_threads: 추론 스레드 수 (기본값: CPU 코어 수)
+            cache_dir: 최적화된 모델 캐시 디렉토리 (None이면 캐시 사용 안 함)
+            warmup_runs: 첫 프레임 전에 미리 실행할 횟수
+        """
+        self.model_path = model_path
+        self.session = create_session(model_path, providers, intra_op_threads=intra_op_threads, cache_dir=cache_dir)
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.output_name = self.session.get_outputs()[0].name
+
+        # 입력 형식: [batch, 3, H, W] (동적 차원은 문자열/None)
+        batch_dim, _, height_dim, width_dim = model_input.shape
+        self.input_height = height_dim if isinstance(height_dim, int) else input_height
+        self.input_width = width_dim if isinstance(width_dim, int) else input_width
+        self.max_batch_size = batch_dim if isinstance(batch_dim, int) else None
+
+        self.swap_rb = swap_rb
+        self.preprocessor = LetterboxPreprocessor(self.input_width, self.input_height, swap_rb=swap_rb)
+        self.last_timings = {}
+
+        # 출력 배열을 미리 할당해 두고 매 프레임 재사용
+        self.runner = IoBindingRunner(self.session, self.input_name, self.output_name)
+        if warmup_runs:
+            warmup_ms = self.runner.warmup(self.preprocessor.tensor.shape, runs=warmup_runs)
+            self.session.session_info['warmup_ms'] = warmup_ms
+
+    def _ensure_batch_size(self, batch_size):
+        """입력 텐서가 batch_size 이상이 되도록 전처리기 재할당"""
+        if self.preprocessor.batch_size < batch_size:
+            self.preprocessor = LetterboxPreprocessor(
+                self.input_width, self.input_height, batch_size=batch_size, swap_rb=self.swap_rb
+            )
+
+    def infer(self, frames, conf_threshold, nms_threshold):
+        """
+        프레임 배치 추론
+
+        Args:
+            frames: HWC uint8 프레임 리스트
+            conf_threshold: 신뢰도 임계값
+            nms_threshold: NMS IoU 임계값
+
+        Returns:
+            list: 프레임별 Detections (원본 프레임 좌표)
+        """
+        # 배치 크기가 고정된 모델은 그 크기씩 나눠서 실행
+        chunk = self.max_batch_size or len(frames)
+        if len(frames) > chunk:
+            results = []
+            for start in range(0, len(frames), chunk):
+                results.extend(self.infer(frames[start:start + chunk], conf_threshold, nms_threshold))
+            return results
+
+        batch_size = len(frames)
+        self._ensure_batch_size(batch_size)
+
+        start = time.perf_counter()
+        for index, frame in enumerate(frames):
+            self.preprocessor.load(frame, index)
+        preprocessed = time.perf_counter()
+
+        outputs = self.runner.run(self.preprocessor.tensor[:batch_size])
+        inferred = time.perf_counter()
+
+        results = []
+        for index in range(batch_size):
+            detections = postprocess_yolov8(outputs[index], conf_threshold, nms_threshold)
+            self.preprocessor.scale_boxes(detections.boxes, index)
+            results.append(detections)
+        finished = time.perf_counter()
+
+        self.last_timings = {
+            'preprocess': preprocessed - start,
+            'inference': inferred - preprocessed,
+            'postprocess': finished - inferred,
+        }
+        return results
+
+
+class UltralyticsBackend:
+    """ultralytics YOLO 백엔드 (.pt 모델)"""
+
+    def __init__(self, model_path='yolov8n.pt'):
+        """
+        Args:
+            model_path: YOLO 모델 경로
+        """
+        from ultralytics import YOLO
+
+        self.model_path = model_path
+        self.model = YOLO(model_path)
+        self.labels = [self.model.names[i] for i in sorted(self.model.names)]
+        self.last_timings = {}
+
+    def infer(self, frames, conf_threshold, nms_threshold):
+        """
+        프레임 배치 추론
+
+        Args:
+            frames: HWC uint8 프레임 리스트
+            conf_threshold: 신뢰도 임계값
+            nms_threshold: NMS IoU 임계값
+
+        Returns:
+            list: 프레임별 Detections (원본 프레임 좌표)
+        """
+        results = self.model(list(frames), conf=conf_threshold, iou=nms_threshold, verbose=False)
+
+        detections = []
+        for result in results:
+            boxes = result.boxes
+            detections.append(Detections(
+                boxes.xyxy.cpu().numpy().astype(np.float32),
+                boxes.conf.cpu().numpy().astype(np.float32),
+                boxes.cls.cpu().numpy().astype(np.int32),
+            ))
+
+        if results:
+            speed = results[0].speed
+            self.last_timings = {
+                'preprocess': speed.get('preprocess', 0.0) / 1000,
+                'inference': speed.get('inference', 0.0) / 1000,
+                'postprocess': speed.get('postprocess', 0.0) / 1000,
+            }
+        return detections
+
+
+class DetectorEngine:
+    """감지 엔진 (백엔드 교체 가능)"""
+
+    def __init__(self, backend, labels=None, conf_threshold=0.4, nms_threshold=0.4):
+        """
+        Args:
+            backend: OnnxRuntimeBackend 또는 UltralyticsBackend
+            labels: 클래스 레이블 (None이면 백엔드 레이블 또는 기본 레이블)
+            conf_threshold: 신뢰도 임계값
+            nms_threshold: NMS IoU 임계값
+        """
+        self.backend = backend
+        self.labels = labels or getattr(backend, 'labels', None) or DEFAULT_LABELS
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+
+    @classmethod
+    def from_model(cls, model_path, labels=None, conf_threshold=0.4, nms_threshold=0.4, **backend_options):
+        """
+        모델 파일 확장자에 따라 백엔드를 골라 엔진 생성
+
+        Args:
+            model_path: .onnx 또는 .pt 모델 경로
+            labels: 클래스 레이블
+            conf_threshold: 신뢰도 임계값
+            nms_threshold: NMS IoU 임계값
+            **backend_options: 백엔드 생성자 추가 인자
+
+        Returns:
+            DetectorEngine: 생성된 엔진
+        """
+        if model_path.endswith('.onnx'):
+            backend = OnnxRuntimeBackend(model_path, **backend_options)
+        else:
+            backend = UltralyticsBackend(model_path, **backend_options)
+        return cls(backend, labels, conf_threshold, nms_threshold)
+
+    @property
+    def last_timings(self):
+        """마지막 detect() 호출의 단계별 소요 시간 (초)"""
+        return self.backend.last_timings
+
+    def detect(self, frames):
+        """
+        프레임 감지
+
+        Args:
+            frames: HWC 프레임 1장 또는 프레임 리스트
+
+        Returns:
+            list: 프레임별 Detections (프레임 1장을 넣어도 길이 1의 리스트)
+        """
+        if isinstance(frames, np.ndarray) and frames.ndim == 3:
+            frames = [frames]
+        if len(frames) == 0:
+            return []
+        return self.backend.infer(frames, self.conf_threshold, self.nms_threshold)
+
+    def label_of(self, class_id):
+        """클래스 ID에 해당하는 레이블 반환"""
+        class_id = int(class_id)
+        return self.labels[class_id] if class_id < len(self.labels) else str(class_id)
@@ -0,0 +1,372 @@
+"""
+Google Drive 이어 올리기(resumable) 업로더
+파일을 청크 단위로 올리고 업로드 세션 URI와 진행 위치를 디스크에 저장하므로,
+네트워크가 끊기거나 프로그램이 재시작되어도 처음부터 다시 올리지 않고 이어서 올립니다.
+
+폴더 ID는 로컬 JSON 파일에 캐시해서 시작할 때마다 Drive를 검색하지 않고,
+동시에 진행하는 업로드 수를 제한해서 좁은 업링크를 여러 업로드가 나눠 쓰지 않도록 합니다.
+
+HTTP 세션은 requests.Session과 같은 request() 인터페이스면 됩니다.
+실제 Drive는 google.auth.transport.requests.AuthorizedSession(creds)를,
+fake_drive_server.py로 시험할 때는 일반 requests.Session()을 사용하세요.
+
+사용 방법 (가짜 Drive 서버로 시험):
+    python3 fake_drive_server.py --fail-rate 0.3 &
+    python3 drive_uploader.py video.mp4 --folder Videos --base-url http://localhost:8089
+"""
+
+import json
+import os
+import threading
+import time
+
+DRIVE_BASE_URL = 'https://www.googleapis.com'
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# 청크 크기는 256KB의 배수여야 함 (Drive 규칙)
+CHUNK_GRANULARITY = 256 * 1024
+DEFAULT_CHUNK_SIZE = 4 * CHUNK_GRANULARITY
+
+
+class _JsonFileStore:
+    """JSON 파일 기반 키-값 저장소 (원자적 교체로 저장)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️  Ignoring unreadable state file {path}: {e}")
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            return dict(value) if isinstance(value, dict) else value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._save()
+
+    def remove(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._save()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def _save(self):
+        """임시 파일에 쓴 뒤 교체 (잠금 보유 상태에서 호출)"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class DriveUploadError(Exception):
+    """Drive 업로드 실패 (진행 상황은 저장되어 다음 시도에서 이어서 올림)"""
+
+
+class ResumableDriveUploader:
+    """청크 단위 이어 올리기 + 폴더 ID 캐시 + 동시 업로드 제한"""
+
+    def __init__(self, session, state_path='drive_uploads.json', folder_cache_path='drive_folders.json',
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_concurrent=1, chunk_retries=3, backoff=1.0,
+                 base_url=DRIVE_BASE_URL, timeout=60):
+        """
+        Args:
+            session: requests.Session 호환 HTTP 세션 (인증 포함)
+            state_path: 업로드 진행 상황 저장 파일
+            folder_cache_path: 폴더 이름 → ID 캐시 파일
+            chunk_size: 청크 크기 (256KB 배수로 맞춤)
+            max_concurrent: 동시에 진행할 업로드 수
+            chunk_retries: 청크 하나당 재시도 횟수 (초과 시 예외, 진행 상황은 유지)
+            backoff: 첫 재시도 대기 시간 (초, 재시도마다 2배)
+            base_url: Drive API 주소 (가짜 서버 시험 시 변경)
+            timeout: HTTP 요청 시간 제한 (초)
+        """
+        self.session = session
+        self.chunk_size = max(CHUNK_GRANULARITY, chunk_size // CHUNK_GRANULARITY * CHUNK_GRANULARITY)
+        self.chunk_retries = chunk_retries
+        self.backoff = backoff
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+        self.uploads = _JsonFileStore(state_path)
+        self.folders = _JsonFileStore(folder_cache_path)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._folder_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # 통계
+        self.completed = 0
+        self.resumed = 0
+        self.restarted = 0
+        self.chunk_failures = 0
+        self.bytes_sent = 0
+        self.folder_cache_hits = 0
+
+    # ---------------- 폴더 ----------------
+
+    def get_or_create_folder(self, folder_name):
+        """
+        폴더 ID 반환 (캐시 → Drive 검색 → 생성 순)
+
+        Returns:
+            str: 폴더 ID
+        """
+        with self._folder_lock:
+            folder_id = self.folders.get(folder_name)
+            if folder_id:
+                with self._stats_lock:
+                    self.folder_cache_hits += 1
+                return folder_id
+
+            query = f"name='{folder_name}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+            response = self._request('GET', f'{self.base_url}/drive/v3/files',
+                                     params={'q': query, 'spaces': 'drive', 'fields': 'files(id, name)'})
+            files = response.json().get('files', [])
+            if files:
+                folder_id = files[0]['id']
+                print(f"✅ Folder '{folder_name}' already exists. ID: {folder_id}")
+            else:
+                response = self._request('POST', f'{self.base_url}/drive/v3/files', params={'fields': 'id'},
+                                         json={'name': folder_name, 'mimeType': FOLDER_MIME_TYPE})
+                folder_id = response.json()['id']
+                print(f"✅ Folder '{folder_name}' created. ID: {folder_id}")
+
+            self.folders.set(folder_name, folder_id)
+            return folder_id
+
+    def forget_folder(self, folder_name):
+        """캐시된 폴더 ID 삭제 (폴더가 Drive에서 지워진 경우)"""
+        self.folders.remove(folder_name)
+
+    # ---------------- 업로드 ----------------
+
+    def upload(self, file_path, file_name, folder_id, mimetype=None):
+        """
+        파일을 이어 올리기 방식으로 업로드 (동시 업로드 수 제한)
+
+        이전에 중단된 같은 파일의 세션이 있으면 서버에 받은 위치를 물어보고 이어서 올립니다.
+
+        Args:
+            file_path: 로컬 파일 경로
+            file_name: Drive에 저장할 이름
+            folder_id: 부모 폴더 ID
+            mimetype: MIME 타입 (기본값: 확장자로 판단)
+
+        Returns:
+            str: 업로드된 파일 ID
+
+        Raises:
+            DriveUploadError: 재시도 후에도 실패한 경우 (진행 상황은 저장됨)
+        """
+        if mimetype is None:
+            mimetype = 'video/mp4' if file_path.endswith('.mp4') else 'image/jpeg'
+
+        with self._slots:
+            total = os.path.getsize(file_path)
+            state = self._load_state(file_path, total)
+            if state is None:
+                state = self._start_session(file_path, file_name, folder_id, mimetype, total)
+                offset = 0
+            else:
+                offset = self._query_offset(state)
+                if offset is None:
+                    # 세션 만료 - 처음부터 새 세션
+                    with self._stats_lock:
+                        self.restarted += 1
+                    state = self._start_session(file_path, file_name, folder_id, mimetype, total)
+                    offset = 0
+                elif isinstance(offset, str):
+                    # 이전 실행에서 마지막 청크까지 이미 올라감
+                    self.uploads.remove(file_path)
+                    return offset
+                else:
+                    with self._stats_lock:
+                        self.resumed += 1
+                    print(f"↪️  Resuming {file_name} at {offset}/{total} bytes")
+
+            file_id = self._send_chunks(file_path, state, offset, total)
+            self.uploads.remove(file_path)
+            with self._stats_lock:
+                self.completed += 1
+            return file_id
+
+    def _load_state(self, file_path, total):
+        """저장된 세션 (파일이 바뀌었으면 None)"""
+        state = self.uploads.get(file_path)
+        if state is None:
+            return None
+        if state.get('size') != total or state.get('mtime') != os.path.getmtime(file_path):
+            self.uploads.remove(file_path)
+            return None
+        return state
+
+    def _start_session(self, file_path, file_name, folder_id, mimetype, total):
+        """업로드 세션 생성 후 세션 URI 저장"""
+        response = self._request(
+            'POST', f'{self.base_url}/upload/drive/v3/files',
+            params={'uploadType': 'resumable', 'fields': 'id'},
+            json={'name': file_name, 'parents': [folder_id]},
+            headers={'X-Upload-Content-Type': mimetype, 'X-Upload-Content-Length': str(total)}
+        )
+        state = {
+            'session_uri': response.headers['Location'],
+            'file_name': file_name,
+            'size': total,
+            'mtime': os.path.getmtime(file_path),
+            'offset': 0,
+            'started_at': time.time(),
+        }
+        self.uploads.set(file_path, state)
+        return state
+
+    def _query_offset(self, state):
+        """
+        서버가 받은 바이트 수 조회
+
+        Returns:
+            int: 다음에 보낼 위치, str: 이미 완료된 경우 파일 ID, None: 세션 만료
+        """
+        try:
+            response = self.session.request(
+                'PUT', state['session_uri'], timeout=self.timeout,
+                headers={'Content-Range': f"bytes */{state['size']}", 'Content-Length': '0'}
+            )
+        except Exception as e:
+            raise DriveUploadError(f'Upload status query failed: {e}') from e
+
+        if response.status_code in (200, 201):
+            return response.json().get('id', '')
+        if response.status_code == 308:
+            return self._parse_range(response)
+        if response.status_code in (404, 410):
+            return None
+        raise DriveUploadError(f'Upload status query failed: HTTP {response.status_code}')
+
+    @staticmethod
+    def _parse_range(response):
+        """308 응답의 Range 헤더 ('bytes=0-N')에서 다음 위치 계산"""
+        range_header = response.headers.get('Range')
+        if not range_header:
+            return 0
+        return int(range_header.rsplit('-', 1)[1]) + 1
+
+    def _send_chunks(self, file_path, state, offset, total):
+        """
+        offset부터 청크를 보내고 청크마다 진행 위치 저장
+
+        청크 전송이 실패하면 서버가 실제로 받은 위치를 조회해서 그 위치부터 다시 보냅니다.
+        """
+        failures = 0
+        delay = self.backoff
+        with open(file_path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                if chunk:
+                    content_range = f'bytes {offset}-{offset + len(chunk) - 1}/{total}'
+                else:
+                    content_range = f'bytes */{total}'
+
+                error = None
+                try:
+                    response = self.session.request('PUT', state['session_uri'], data=chunk,
+                                                    headers={'Content-Range': content_range}, timeout=self.timeout)
+                    if response.status_code in (404, 410):
+                        raise DriveUploadError('Upload session expired')
+                    if response.status_code not in (200, 201, 308):
+                        error = f'HTTP {response.status_code}'
+                except DriveUploadError:
+                    raise
+                except Exception as e:
+                    error = str(e)
+
+                if error is None:
+                    failures = 0
+                    delay = self.backoff
+                    if response.status_code in (200, 201):
+                        with self._stats_lock:
+                            self.bytes_sent += len(chunk)
+                        return response.json().get('id', '')
+                    new_offset = self._parse_range(response)
+                else:
+                    with self._stats_lock:
+                        self.chunk_failures += 1
+                    failures += 1
+                    if failures > self.chunk_retries:
+                        raise DriveUploadError(f"Chunk upload failed for {state['file_name']} "
+                                               f"at {offset}/{total}: {error}")
+                    time.sleep(delay)
+                    delay *= 2
+                    # 서버가 받은 위치 확인 (일부만 받았을 수 있음)
+                    new_offset = self._query_offset(state)
+                    if new_offset is None:
+                        raise DriveUploadError('Upload session expired')
+                    if isinstance(new_offset, str):
+                        return new_offset
+
+                with self._stats_lock:
+                    self.bytes_sent += max(0, new_offset - offset)
+                offset = new_offset
+                state['offset'] = offset
+                self.uploads.set(file_path, state)
+
+    def _request(self, method, url, **kwargs):
+        """일반 API 요청 (2xx가 아니면 예외)"""
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        if response.status_code >= 300:
+            raise DriveUploadError(f'{method} {url} failed: HTTP {response.status_code}')
+        return response
+
+    def stats(self):
+        """업로드 통계"""
+        with self._stats_lock:
+            return {
+                'completed': self.completed,
+                'resumed': self.resumed,
+                'restarted': self.restarted,
+                'chunk_failures': self.chunk_failures,
+                'bytes_sent': self.bytes_sent,
+                'pending_sessions': len(self.uploads),
+                'folder_cache_hits': self.folder_cache_hits,
+            }
+
+
+def main():
+    import argparse
+    import requests
+
+    parser = argparse.ArgumentParser(description='Drive 이어 올리기 업로더 (가짜 Drive 서버 시험용)')
+    parser.add_argument('files', nargs='+', help='업로드할 파일')
+    parser.add_argument('--folder', default='Videos', help='폴더 이름')
+    parser.add_argument('--base-url', default='http://localhost:8089', help='Drive API 주소')
+    parser.add_argument('--chunk-kb', type=int, default=256, help='청크 크기 (KB)')
+    parser.add_argument('--state', default='drive_uploads.json', help='진행 상황 저장 파일')
+    args = parser.parse_args()
+
+    uploader = ResumableDriveUploader(requests.Session(), state_path=args.state,
+                                      chunk_size=args.chunk_kb * 1024, backoff=0.2, base_url=args.base_url)
+    folder_id = uploader.get_or_create_folder(args.folder)
+    for file_path in args.files:
+        started = time.time()
+        try:
+            file_id = uploader.upload(file_path, os.path.basename(file_path), folder_id)
+            print(f"✅ {file_path} → {file_id} ({time.time() - started:.2f}s)")
+        except DriveUploadError as e:
+            print(f"❌ {file_path}: {e} (다시 실행하면 이어서 올립니다)")
+    print(json.dumps(uploader.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
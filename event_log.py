@@ -0,0 +1,184 @@
+"""
+감지 이벤트 영구 로그 (JSON Lines, 추가 전용)
+이벤트마다 JSON 파일을 만드는 대신 한 파일에 한 줄씩 추가하고,
+여러 이벤트를 모아 한 번에 fsync 합니다(그룹 커밋). 서버 시작 시 로그를 다시 읽어 메모리를 복원합니다.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class EventLog:
+    """JSON Lines 이벤트 로그"""
+
+    def __init__(self, path, flush_interval=1.0, max_unsynced=100):
+        """
+        Args:
+            path: 로그 파일 경로
+            flush_interval: fsync 주기 (초)
+            max_unsynced: 이 개수만큼 쌓이면 주기와 상관없이 바로 fsync
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_unsynced = max_unsynced
+
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._closed = False
+
+        # 마지막 줄이 잘린 채 끝났다면 새 이벤트가 그 줄에 이어 붙지 않도록 줄바꿈 추가
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+                    self._file.flush()
+
+        # 통계
+        self.appended = 0
+        self.syncs = 0
+
+        self._flusher = threading.Thread(target=self._flush_loop, name='event-log-flusher', daemon=True)
+        self._flusher.start()
+
+    def append(self, event):
+        """이벤트 1건 추가 (디스크 동기화는 그룹 커밋으로 처리)"""
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._unsynced += 1
+            self.appended += 1
+            if self._unsynced >= self.max_unsynced:
+                self._sync()
+
+    def _sync(self):
+        """버퍼를 비우고 fsync (잠금 보유 상태에서 호출)"""
+        if self._unsynced == 0:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self.syncs += 1
+
+    def _flush_loop(self):
+        """주기적 그룹 커밋"""
+        while not self._closed:
+            time.sleep(self.flush_interval)
+            with self._lock:
+                if not self._closed:
+                    self._sync()
+
+    def replay(self):
+        """
+        로그의 모든 이벤트를 기록 순서대로 반환
+
+        마지막 줄이 중간에 잘린 경우(전원 차단 등)는 건너뜁니다.
+
+        Returns:
+            list: 이벤트 리스트
+        """
+        with self._lock:
+            self._file.flush()
+
+        events = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupted event log line {line_number}")
+        return events
+
+    def compact(self, max_events=None, retention_days=None):
+        """
+        보존 기간/개수를 넘은 이벤트를 제거하고 로그 파일을 다시 작성
+
+        새 파일을 다 쓴 뒤 os.replace()로 교체하므로 도중에 중단되어도 기존 로그는 안전합니다.
+
+        Args:
+            max_events: 남길 최대 이벤트 수 (최신 이벤트 우선)
+            retention_days: 이보다 오래된 이벤트 제거
+
+        Returns:
+            list: 제거된 이벤트 리스트
+        """
+        events = self.replay()
+        kept = events
+
+        if retention_days is not None:
+            cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+            kept = [e for e in kept if e.get('created_at', '') >= cutoff]
+        if max_events is not None and len(kept) > max_events:
+            kept = kept[-max_events:]
+
+        if len(kept) == len(events):
+            return []
+
+        kept_ids = {id(e) for e in kept}
+        dropped = [e for e in events if id(e) not in kept_ids]
+
+        tmp_path = self.path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for event in kept:
+                    f.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._unsynced = 0
+
+        print(f"Event log compacted: {len(kept)} kept, {len(dropped)} removed")
+        return dropped
+
+    def import_legacy_files(self, directory, pattern='detection_*.json'):
+        """
+        기존 이벤트별 JSON 파일을 로그로 옮긴 뒤 삭제
+
+        id와 created_at이 있는 서버 이벤트 파일만 옮깁니다.
+
+        Returns:
+            int: 옮긴 이벤트 수
+        """
+        legacy = []
+        for json_path in glob.glob(os.path.join(directory, pattern)):
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    event = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if isinstance(event, dict) and 'id' in event and 'created_at' in event:
+                legacy.append((event['created_at'], json_path, event))
+
+        if not legacy:
+            return 0
+
+        legacy.sort(key=lambda item: item[0])
+        with self._lock:
+            for _, _, event in legacy:
+                self._file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self._unsynced += len(legacy)
+            self._sync()
+
+        for _, json_path, _ in legacy:
+            os.remove(json_path)
+
+        print(f"Imported {len(legacy)} legacy event files into {self.path}")
+        return len(legacy)
+
+    def close(self):
+        """남은 이벤트를 동기화하고 파일 닫기"""
+        with self._lock:
+            self._sync()
+            self._closed = True
+            self._file.close()
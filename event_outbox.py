@@ -0,0 +1,433 @@
+"""
+오프라인 이벤트 보관함 (SQLite 아웃박스)
+Wi-Fi가 끊겨 전송하지 못한 이벤트 메타데이터와 이미지를 디스크에 보관했다가,
+연결이 돌아오면 배치 단위로 다시 전송합니다.
+
+사용 예:
+    outbox = EventOutbox('outbox.db')
+    outbox.put('firestore', make_firestore_record('events', event_data), image_bytes)
+    outbox.start_drainer(FirestoreOutboxSink(db, bucket), kind='firestore')
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class EventOutbox:
+    """추가 전용 SQLite 아웃박스 (디스크 사용량 상한 있음)"""
+
+    def __init__(self, path='outbox.db', max_bytes=200 * 1024 * 1024, max_items=10000, max_attempts=5):
+        """
+        Args:
+            path: SQLite 파일 경로
+            max_bytes: 보관할 최대 바이트 (초과 시 오래된 항목부터 삭제)
+            max_items: 보관할 최대 항목 수
+            max_attempts: 항목 자체 문제로 이 횟수만큼 전송에 실패하면 전송 불가(dead) 상태로 옮김
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._drainer = None
+        self._stop_event = threading.Event()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                blob BLOB,
+                size INTEGER NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                dead INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # 이전 버전 DB에는 dead 열이 없음
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(outbox)')}
+        if 'dead' not in columns:
+            self._conn.execute('ALTER TABLE outbox ADD COLUMN dead INTEGER NOT NULL DEFAULT 0')
+        self._conn.commit()
+
+        # 통계
+        self.evicted = 0
+        self.drained = 0
+        self.dead_lettered = 0
+
+    def put(self, kind, payload, blob=None, size=None):
+        """
+        항목 추가
+
+        Args:
+            kind: 항목 종류 ('firestore', 'drive_file' 등 - 싱크별로 구분)
+            payload: JSON 직렬화 가능한 메타데이터
+            blob: 함께 보관할 바이트 (이미지 등, 선택사항)
+            size: 디스크 사용량 계산용 크기 (기본값: payload + blob 크기)
+
+        Returns:
+            int: 항목 ID
+        """
+        payload_json = json.dumps(payload, ensure_ascii=False)
+        if size is None:
+            size = len(payload_json) + (len(blob) if blob else 0)
+
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO outbox (kind, payload, blob, size, created_at) VALUES (?, ?, ?, ?, ?)',
+                (kind, payload_json, blob, size, time.time())
+            )
+            self._conn.commit()
+            item_id = cursor.lastrowid
+            self._enforce_limits()
+        return item_id
+
+    def _enforce_limits(self):
+        """용량/개수 상한을 넘으면 오래된 항목부터 삭제 (잠금 보유 상태에서 호출)"""
+        count, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM outbox').fetchone()
+        if count <= self.max_items and total <= self.max_bytes:
+            return
+
+        evicted = []
+        for item_id, kind, payload, size in self._conn.execute(
+                'SELECT id, kind, payload, size FROM outbox ORDER BY id'):
+            if count <= self.max_items and total <= self.max_bytes:
+                break
+            evicted.append(item_id)
+            count -= 1
+            total -= size
+            # 디스크 파일을 참조하는 항목은 파일도 함께 정리
+            file_path = json.loads(payload).get('file_path')
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+
+        self._conn.executemany('DELETE FROM outbox WHERE id = ?', [(i,) for i in evicted])
+        self._conn.commit()
+        self.evicted += len(evicted)
+        print(f"⚠️  아웃박스 용량 초과: 오래된 항목 {len(evicted)}개 삭제")
+
+    def peek(self, limit=50, kind=None, after_id=None):
+        """
+        전송 대기 항목을 오래된 순으로 조회 (삭제하지 않음, dead 항목 제외)
+
+        Args:
+            limit: 최대 개수
+            kind: 항목 종류 (None이면 전체)
+            after_id: 이 ID보다 뒤의 항목만 (None이면 처음부터)
+
+        Returns:
+            list: [{'id', 'kind', 'payload', 'blob', 'attempts', 'created_at'}, ...]
+        """
+        query = 'SELECT id, kind, payload, blob, attempts, created_at FROM outbox WHERE dead = 0'
+        params = ()
+        if kind:
+            query += ' AND kind = ?'
+            params += (kind,)
+        if after_id is not None:
+            query += ' AND id > ?'
+            params += (after_id,)
+        query += ' ORDER BY id LIMIT ?'
+
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+
+        return [
+            {
+                'id': row[0],
+                'kind': row[1],
+                'payload': json.loads(row[2]),
+                'blob': row[3],
+                'attempts': row[4],
+                'created_at': row[5],
+            }
+            for row in rows
+        ]
+
+    def ack(self, item_ids):
+        """전송 완료된 항목 삭제"""
+        with self._lock:
+            self._conn.executemany('DELETE FROM outbox WHERE id = ?', [(i,) for i in item_ids])
+            self._conn.commit()
+
+    def _mark_failed(self, item_ids):
+        """
+        전송 실패 횟수 증가 (max_attempts에 도달한 항목은 dead 상태로 옮김)
+
+        Returns:
+            int: 이번에 dead 상태가 된 항목 수
+        """
+        if not item_ids:
+            return 0
+        params = [(i,) for i in item_ids]
+        with self._lock:
+            self._conn.executemany('UPDATE outbox SET attempts = attempts + 1 WHERE id = ?', params)
+            dead = self._conn.executemany(
+                'UPDATE outbox SET dead = 1 WHERE id = ? AND dead = 0 AND attempts >= ?',
+                [(i, self.max_attempts) for i in item_ids]
+            ).rowcount
+            self._conn.commit()
+        if dead:
+            self.dead_lettered += dead
+            print(f"❌ 아웃박스 항목 {dead}건이 {self.max_attempts}회 전송에 실패해 전송 불가 상태로 옮겼습니다")
+        return dead
+
+    def _send_each(self, sink, items):
+        """
+        배치 전송이 실패했을 때 항목을 하나씩 전송
+
+        Returns:
+            tuple: (전송된 항목 ID 리스트, 실패한 항목 ID 리스트)
+        """
+        sent, failed = [], []
+        for item in items:
+            try:
+                sink([item])
+            except Exception as e:
+                print(f"⚠️  아웃박스 항목 {item['id']} 전송 실패 (시도 {item['attempts'] + 1}회): {e}")
+                failed.append(item['id'])
+            else:
+                sent.append(item['id'])
+        if sent:
+            self.ack(sent)
+        return sent, failed
+
+    def _probe(self, sink, kind):
+        """
+        연결 확인: 가장 최근 항목 1개를 전송해 봄
+
+        오래된 항목이 계속 실패해도 새 항목이 전송되면 연결은 정상이고 오래된 항목 자체가 문제입니다.
+
+        Returns:
+            int: 전송된 항목 ID (실패하면 None)
+        """
+        query = 'SELECT id FROM outbox WHERE dead = 0'
+        params = ()
+        if kind:
+            query += ' AND kind = ?'
+            params = (kind,)
+        with self._lock:
+            row = self._conn.execute(query + ' ORDER BY id DESC LIMIT 1', params).fetchone()
+        if row is None:
+            return None
+
+        items = self.peek(1, kind, row[0] - 1)
+        try:
+            sink(items)
+        except Exception:
+            return None
+        self.ack([row[0]])
+        return row[0]
+
+    def drain(self, sink, kind=None, batch_size=50):
+        """
+        보관된 항목을 배치 단위로 싱크에 전송
+
+        배치 전송이 실패하면 가장 최근 항목으로 연결을 확인합니다. 연결도 안 되면 (Wi-Fi 끊김 등)
+        실패 횟수를 세지 않고 다음 주기까지 중단합니다. 연결이 되면 배치 항목을 하나씩 다시 보내고,
+        실패한 항목은 항목 자체 문제(거부된 문서, 없는 이미지 등)로 보고 실패 횟수를 늘린 뒤 건너뜁니다.
+        max_attempts회 실패한 항목은 dead 상태로 옮겨서 뒤의 항목을 막지 않게 합니다.
+
+        Args:
+            sink: 항목 리스트를 받아 한 번에 전송하는 호출 가능 객체 sink(items)
+            kind: 전송할 항목 종류 (None이면 전체)
+            batch_size: 배치 크기
+
+        Returns:
+            int: 전송 완료된 항목 수
+        """
+        drained = 0
+        after_id = None
+        connected = False  # 이번 드레인에서 전송이 한 번이라도 성공했는지
+        while True:
+            items = self.peek(batch_size, kind, after_id)
+            if not items:
+                break
+
+            item_ids = [item['id'] for item in items]
+            try:
+                sink(items)
+            except Exception as e:
+                print(f"⚠️  아웃박스 배치 전송 실패 ({len(items)}건): {e}")
+                if not connected:
+                    probed = self._probe(sink, kind)
+                    if probed is None:
+                        print("⚠️  아웃박스 연결 확인 실패, 다음 주기에 재시도 (보관 유지)")
+                        break
+                    connected = True
+                    drained += 1
+                    items = [item for item in items if item['id'] != probed]
+                sent, failed = self._send_each(sink, items)
+                drained += len(sent)
+                self._mark_failed(failed)
+                after_id = item_ids[-1]
+                continue
+
+            connected = True
+            self.ack(item_ids)
+            drained += len(items)
+
+        if drained:
+            self.drained += drained
+            print(f"✅ 아웃박스 전송 완료: {drained}건")
+        return drained
+
+    def start_drainer(self, sink, kind=None, interval=30.0, batch_size=50):
+        """
+        주기적으로 drain()을 실행하는 백그라운드 스레드 시작
+
+        Args:
+            sink: 배치 전송 싱크
+            kind: 전송할 항목 종류
+            interval: 재시도 주기 (초)
+            batch_size: 배치 크기
+        """
+        def worker():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.drain(sink, kind, batch_size)
+                except Exception as e:
+                    print(f"⚠️  아웃박스 드레인 오류: {e}")
+
+        thread = threading.Thread(target=worker, name=f'outbox-drainer-{kind or "all"}', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """보관 항목 수 및 용량"""
+        with self._lock:
+            pending, dead, total = self._conn.execute(
+                'SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead), 0), COALESCE(SUM(size), 0) FROM outbox'
+            ).fetchone()
+        return {
+            'pending': pending,
+            'dead': dead,
+            'bytes': total,
+            'drained': self.drained,
+            'evicted': self.evicted,
+            'dead_lettered': self.dead_lettered,
+        }
+
+    def close(self):
+        """드레인 스레드 정지 및 DB 닫기"""
+        self._stop_event.set()
+        with self._lock:
+            self._conn.close()
+
+
+def make_firestore_record(collection, data, document_id=None, image_path=None, send_notification=False):
+    """
+    Firestore 문서 쓰기를 아웃박스 항목으로 변환
+
+    SERVER_TIMESTAMP 값은 현재 시각(UTC)으로 바꿔서 보관하므로,
+    나중에 전송해도 이벤트 발생 시각이 유지됩니다.
+
+    Args:
+        collection: 컬렉션 이름
+        data: 문서 데이터
+        document_id: 문서 ID (None이면 전송 시 자동 생성)
+        image_path: 함께 보관한 이미지를 올릴 Storage 경로 (선택사항)
+        send_notification: 전송 후 푸시 알림을 보낼지 여부 (싱크의 notify 콜백으로 처리)
+
+    Returns:
+        dict: 아웃박스 payload
+    """
+    from firebase_admin import firestore
+
+    now = datetime.now(timezone.utc).isoformat()
+    fields = {}
+    datetime_fields = []
+    for key, value in data.items():
+        if value is firestore.SERVER_TIMESTAMP:
+            fields[key] = now
+            datetime_fields.append(key)
+        else:
+            fields[key] = value
+
+    return {
+        'collection': collection,
+        'document_id': document_id,
+        'data': fields,
+        'datetime_fields': datetime_fields,
+        'image_path': image_path,
+        'send_notification': send_notification,
+    }
+
+
+class FirestoreOutboxSink:
+    """아웃박스 항목을 Firestore 배치 쓰기 1회로 전송하는 싱크"""
+
+    def __init__(self, db, bucket=None, notify=None):
+        """
+        Args:
+            db: Firestore 클라이언트
+            bucket: Storage 버킷 (이미지가 있는 항목을 올릴 때 필요)
+            notify: send_notification 항목을 커밋한 뒤 호출할 콜백 notify(document_id, data) (선택사항)
+        """
+        self.db = db
+        self.bucket = bucket
+        self.notify = notify
+
+    def __call__(self, items):
+        """항목 리스트를 WriteBatch 1회로 커밋 (이미지는 먼저 업로드, 커밋 후 푸시 알림)"""
+        batch = self.db.batch()
+        notifications = []
+        for item in items:
+            payload = item['payload']
+            data = dict(payload['data'])
+            for key in payload.get('datetime_fields', []):
+                data[key] = datetime.fromisoformat(data[key])
+
+            if item['blob'] and payload.get('image_path') and self.bucket is not None:
+                blob = self.bucket.blob(payload['image_path'])
+                blob.upload_from_string(item['blob'], content_type='image/jpeg')
+                blob.make_public()
+                data['image_url'] = blob.public_url
+
+            collection = self.db.collection(payload['collection'])
+            doc_id = payload.get('document_id')
+            doc_ref = collection.document(doc_id) if doc_id else collection.document()
+            batch.set(doc_ref, data)
+            if payload.get('send_notification'):
+                notifications.append((doc_ref.id, data))
+        batch.commit()
+
+        # 알림 실패는 이미 커밋된 항목을 다시 보내지 않도록 로그만 남김
+        if self.notify is not None:
+            for doc_id, data in notifications:
+                try:
+                    self.notify(doc_id, data)
+                except Exception as e:
+                    print(f"⚠️  아웃박스 항목 알림 전송 실패 ({doc_id}): {e}")
+
+
+class LocalDirectorySink:
+    """로컬 디렉토리 싱크 (테스트/오프라인 확인용 대체 저장소)"""
+
+    def __init__(self, directory='outbox_sink'):
+        """
+        Args:
+            directory: 배치를 기록할 디렉토리
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.batches = 0
+
+    def __call__(self, items):
+        """배치를 JSON Lines 파일 1개(append)와 이미지 파일로 기록"""
+        with open(os.path.join(self.directory, 'events.jsonl'), 'a', encoding='utf-8') as f:
+            for item in items:
+                record = {'id': item['id'], 'kind': item['kind'], 'payload': item['payload']}
+                if item['blob']:
+                    blob_name = f"item_{item['id']}.bin"
+                    with open(os.path.join(self.directory, blob_name), 'wb') as blob_file:
+                        blob_file.write(item['blob'])
+                    record['blob_file'] = blob_name
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.batches += 1
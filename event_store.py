@@ -0,0 +1,262 @@
+"""
+감지 이벤트 인메모리 저장소
+시간순 링 버퍼와 상태/카메라별 보조 인덱스로 목록 조회를 O(log n)에 처리하고,
+최근 1시간 감지 수 같은 통계는 미리 계산된 카운터로 바로 돌려줍니다.
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+
+class _SeqIndex:
+    """오름차순 시퀀스 번호 목록 (앞쪽 삭제는 오프셋 이동으로 O(1))"""
+
+    def __init__(self):
+        self._items = []
+        self._head = 0
+
+    def __len__(self):
+        return len(self._items) - self._head
+
+    def append(self, seq):
+        """가장 큰 시퀀스 번호 추가"""
+        self._items.append(seq)
+
+    def at(self, position):
+        """position번째(오래된 순) 시퀀스 번호 (범위 밖이면 None)"""
+        position += self._head
+        return self._items[position] if position < len(self._items) else None
+
+    def remove(self, seq):
+        """시퀀스 번호 삭제"""
+        if self._head < len(self._items) and self._items[self._head] == seq:
+            self._head += 1
+            self._compact()
+            return
+        index = bisect_left(self._items, seq, lo=self._head)
+        if index < len(self._items) and self._items[index] == seq:
+            del self._items[index]
+
+    def _compact(self):
+        """삭제된 앞부분이 충분히 커지면 실제로 잘라냄"""
+        if self._head > 64 and self._head * 2 > len(self._items):
+            del self._items[:self._head]
+            self._head = 0
+
+    def before(self, cursor, limit, min_seq=None):
+        """
+        cursor보다 작은 시퀀스 번호를 큰 것부터 최대 limit개 반환
+
+        Args:
+            cursor: 상한 (미포함, None이면 제한 없음)
+            limit: 최대 개수
+            min_seq: 하한 (포함, None이면 제한 없음)
+        """
+        end = len(self._items) if cursor is None else bisect_left(self._items, cursor, lo=self._head)
+        start = self._head if min_seq is None else bisect_left(self._items, min_seq, lo=self._head, hi=end)
+        start = max(start, end - limit)
+        return self._items[start:end][::-1]
+
+
+class RollingCounter:
+    """고정 크기 시간 버킷 카운터 (최근 window초 동안의 건수)"""
+
+    def __init__(self, window_seconds=3600, bucket_seconds=60):
+        """
+        Args:
+            window_seconds: 집계 창 길이 (초)
+            bucket_seconds: 버킷 크기 (초)
+        """
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = max(1, window_seconds // bucket_seconds)
+        self._bucket_ids = [None] * self.num_buckets
+        self._counts = [0] * self.num_buckets
+
+    def add(self, timestamp):
+        """timestamp 시각의 이벤트 1건 기록"""
+        bucket_id = int(timestamp // self.bucket_seconds)
+        slot = bucket_id % self.num_buckets
+        if self._bucket_ids[slot] != bucket_id:
+            if self._bucket_ids[slot] is not None and self._bucket_ids[slot] > bucket_id:
+                return  # 창보다 오래된 이벤트
+            self._bucket_ids[slot] = bucket_id
+            self._counts[slot] = 0
+        self._counts[slot] += 1
+
+    def total(self, now=None):
+        """현재 창 안의 건수 (버킷 수에 비례하는 상수 시간)"""
+        current = int((now if now is not None else time.time()) // self.bucket_seconds)
+        oldest = current - self.num_buckets + 1
+        return sum(
+            count for bucket_id, count in zip(self._bucket_ids, self._counts)
+            if bucket_id is not None and oldest <= bucket_id <= current
+        )
+
+
+def _parse_timestamp(value):
+    """ISO 문자열 또는 숫자를 epoch 초로 변환"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+class EventStore:
+    """시간순 링 버퍼 + 상태/카메라 인덱스 이벤트 저장소"""
+
+    def __init__(self, capacity=1000):
+        """
+        Args:
+            capacity: 보관할 최대 이벤트 수 (초과 시 가장 오래된 이벤트부터 삭제)
+        """
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._next_seq = 1
+
+        self._events = {}  # seq -> event
+        self._all = _SeqIndex()
+        self._times = []  # _all과 같은 순서의 created_at (epoch 초)
+        self._times_head = 0
+        self._by_status = {}
+        self._by_camera = {}
+
+        # 미리 계산된 통계
+        self.recent_counter = RollingCounter(window_seconds=3600, bucket_seconds=60)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._events)
+
+    def add(self, event):
+        """
+        이벤트 추가
+
+        created_at이 없으면 잠금 안에서 현재 시각으로 기록하므로 여러 스레드가 동시에 추가해도
+        시간순이 유지됩니다. created_at이 있는 이벤트(로그 복원 등)는 created_at 순서대로 추가해야 합니다.
+
+        Returns:
+            int: 이벤트 시퀀스 번호 (페이지 커서로 사용)
+        """
+        with self._lock:
+            if 'created_at' not in event:
+                # 시계가 뒤로 조정되어도 시간 인덱스가 정렬 상태를 유지하도록 마지막 시각 이후로 기록
+                now = time.time()
+                if len(self._times) > self._times_head:
+                    now = max(now, self._times[-1])
+                event['created_at'] = datetime.fromtimestamp(now).isoformat()
+            created = _parse_timestamp(event['created_at'])
+
+            seq = self._next_seq
+            self._next_seq += 1
+
+            self._events[seq] = event
+            self._all.append(seq)
+            self._times.append(created)
+            self._index_for(self._by_status, event.get('status')).append(seq)
+            self._index_for(self._by_camera, event.get('camera_id')).append(seq)
+
+            self.recent_counter.add(created)
+
+            while len(self._events) > self.capacity:
+                self._evict_oldest()
+        return seq
+
+    @staticmethod
+    def _index_for(indexes, key):
+        """키별 인덱스 (없으면 생성)"""
+        index = indexes.get(key)
+        if index is None:
+            index = indexes[key] = _SeqIndex()
+        return index
+
+    def _evict_oldest(self):
+        """가장 오래된 이벤트 삭제 (잠금 보유 상태에서 호출)"""
+        seq = self._all.at(0)
+        event = self._events.pop(seq)
+        self._all.remove(seq)
+        self._times_head += 1
+        if self._times_head > 64 and self._times_head * 2 > len(self._times):
+            del self._times[:self._times_head]
+            self._times_head = 0
+        self._by_status[event.get('status')].remove(seq)
+        self._by_camera[event.get('camera_id')].remove(seq)
+
+    def _seq_at_or_after(self, timestamp):
+        """created_at >= timestamp 인 첫 이벤트의 시퀀스 번호 (이진 탐색)"""
+        position = bisect_left(self._times, timestamp, lo=self._times_head) - self._times_head
+        seq = self._all.at(position)
+        return seq if seq is not None else self._next_seq
+
+    def _seq_after(self, timestamp):
+        """created_at > timestamp 인 첫 이벤트의 시퀀스 번호 (이진 탐색)"""
+        position = bisect_right(self._times, timestamp, lo=self._times_head) - self._times_head
+        seq = self._all.at(position)
+        return seq if seq is not None else self._next_seq
+
+    def query(self, status=None, camera_id=None, limit=50, cursor=None, since=None, until=None):
+        """
+        최신순 이벤트 조회
+
+        Args:
+            status: 상태 필터
+            camera_id: 카메라 필터
+            limit: 최대 개수
+            cursor: 이전 페이지의 next_cursor (이보다 오래된 이벤트부터 반환)
+            since: 이 시각 이후 이벤트만 (ISO 문자열 또는 epoch 초)
+            until: 이 시각 이전 이벤트만 (ISO 문자열 또는 epoch 초)
+
+        Returns:
+            tuple: (이벤트 리스트, next_cursor 또는 None)
+        """
+        with self._lock:
+            if status is not None and camera_id is not None:
+                status_index = self._by_status.get(status)
+                camera_index = self._by_camera.get(camera_id)
+                if not status_index or not camera_index:
+                    return [], None
+                # 작은 인덱스를 순회하며 다른 조건으로 거름
+                if len(status_index) <= len(camera_index):
+                    index, key, value = status_index, 'camera_id', camera_id
+                else:
+                    index, key, value = camera_index, 'status', status
+            elif status is not None:
+                index, key = self._by_status.get(status), None
+            elif camera_id is not None:
+                index, key = self._by_camera.get(camera_id), None
+            else:
+                index, key = self._all, None
+
+            if not index:
+                return [], None
+
+            min_seq = self._seq_at_or_after(_parse_timestamp(since)) if since is not None else None
+            upper = self._seq_after(_parse_timestamp(until)) if until is not None else None
+            if cursor is not None:
+                upper = cursor if upper is None else min(upper, cursor)
+
+            # limit개보다 1개 더 찾아서 다음 페이지에 조건에 맞는 이벤트가 있을 때만 커서를 돌려줌
+            # (두 조건을 함께 쓰면 인덱스에 더 오래된 항목이 있어도 조건에 맞지 않을 수 있음)
+            events = []
+            last_seq = None
+            has_more = False
+            while not has_more:
+                seqs = index.before(upper, limit + 1 - len(events) if key is None else limit + 1, min_seq)
+                if not seqs:
+                    break
+                for seq in seqs:
+                    event = self._events[seq]
+                    if key is None or event.get(key) == value:
+                        if len(events) >= limit:
+                            has_more = True
+                            break
+                        events.append(event)
+                        last_seq = seq
+                upper = seqs[-1]
+
+            return events, last_seq if has_more else None
+
+    def count_recent(self, now=None):
+        """최근 1시간 이벤트 수"""
+        with self._lock:
+            return self.recent_counter.total(now)
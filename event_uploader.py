@@ -0,0 +1,142 @@
+"""
+감지 이벤트 비동기 업로더
+JPEG 인코딩, Storage 업로드, Firestore 저장, FCM 전송을 백그라운드 스레드에서 처리하여
+감지 루프가 네트워크 지연에 묶이지 않도록 합니다.
+"""
+
+import queue
+import threading
+import time
+
+
+class EventUploader:
+    """제한 크기 큐 + 워커 스레드 기반 업로더"""
+
+    def __init__(self, send_fn, max_queue=50, workers=2, max_retries=3, backoff=1.0, max_backoff=30.0,
+                 on_failure=None):
+        """
+        Args:
+            send_fn: 이벤트 1건을 전송하는 함수 send_fn(**event) (실패 시 예외 발생)
+            max_queue: 대기열 최대 크기 (가득 차면 새 이벤트는 버림)
+            workers: 워커 스레드 수
+            max_retries: 실패 시 재시도 횟수
+            backoff: 첫 재시도 대기 시간 (초, 재시도마다 2배)
+            max_backoff: 재시도 대기 시간 상한 (초)
+            on_failure: 재시도를 모두 실패한 이벤트를 받을 콜백 on_failure(event, error)
+        """
+        self.send_fn = send_fn
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_failure = on_failure
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        # 통계
+        self.submitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self._latency_total = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+        self._workers = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f'event-uploader-{i}', daemon=True)
+            thread.start()
+            self._workers.append(thread)
+
+    def submit(self, **event):
+        """
+        이벤트를 대기열에 추가 (블록하지 않음)
+
+        Returns:
+            bool: 추가 성공 여부 (대기열이 가득 차면 False)
+        """
+        try:
+            self._queue.put_nowait((time.time(), event))
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+        with self._stats_lock:
+            self.submitted += 1
+        return True
+
+    def _worker(self):
+        """대기열에서 이벤트를 꺼내 전송"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            submitted_at, event = item
+            try:
+                self._send_with_retry(submitted_at, event)
+            finally:
+                self._queue.task_done()
+
+    def _send_with_retry(self, submitted_at, event):
+        """지수 백오프로 재시도하며 전송"""
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.send_fn(**event)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"❌ 이벤트 업로드 최종 실패 ({attempt + 1}회 시도): {e}")
+                    with self._stats_lock:
+                        self.failed += 1
+                    if self.on_failure:
+                        self.on_failure(event, e)
+                    return
+
+                print(f"⚠️  이벤트 업로드 실패, {delay:.1f}초 후 재시도: {e}")
+                with self._stats_lock:
+                    self.retries += 1
+                # 종료 중이면 대기 없이 바로 재시도
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+
+            latency = time.time() - submitted_at
+            with self._stats_lock:
+                self.sent += 1
+                self._latency_total += latency
+                self.last_latency = latency
+                self.max_latency = max(self.max_latency, latency)
+            return
+
+    def stop(self, timeout=10.0):
+        """
+        남은 이벤트를 처리한 뒤 워커 종료
+
+        Args:
+            timeout: 워커별 최대 대기 시간 (초)
+        """
+        self._stopping.set()
+        for _ in self._workers:
+            self._queue.put(None)
+        for thread in self._workers:
+            thread.join(timeout)
+
+    def stats(self):
+        """대기열 깊이 및 지연 시간 통계"""
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'submitted': self.submitted,
+                'sent': self.sent,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'retries': self.retries,
+                'avg_latency_ms': round(self._latency_total / self.sent * 1000, 1) if self.sent else 0.0,
+                'max_latency_ms': round(self.max_latency * 1000, 1),
+                'last_latency_ms': round(self.last_latency * 1000, 1),
+            }
@@ -0,0 +1,132 @@
+"""
+가짜 Google Drive 서버 (업로드 시험용)
+drive_uploader.py가 사용하는 API만 흉내 냅니다:
+폴더 검색/생성, 이어 올리기 세션 생성, 청크 업로드, 진행 위치 조회.
+
+--fail-rate로 청크 요청 일부를 실패(503)시키거나 중간까지만 받아서 불안정한 링크를 흉내 냅니다.
+
+사용 방법:
+    python3 fake_drive_server.py --port 8089 --fail-rate 0.3
+"""
+
+import argparse
+import random
+import re
+import threading
+import uuid
+
+from flask import Flask, Response, jsonify, request
+
+app = Flask(__name__)
+
+files = {}     # file_id -> {name, mimeType, parents, size}
+sessions = {}  # session_id -> {metadata, total, data}
+state_lock = threading.Lock()
+fail_rate = 0.0
+
+
+@app.route('/drive/v3/files', methods=['GET'])
+def list_files():
+    """이름으로 파일/폴더 검색 (q의 name='...' 조건만 해석)"""
+    match = re.search(r"name='([^']*)'", request.args.get('q', ''))
+    name = match.group(1) if match else None
+    with state_lock:
+        found = [{'id': file_id, 'name': info['name']}
+                 for file_id, info in files.items() if name is None or info['name'] == name]
+    return jsonify({'files': found})
+
+
+@app.route('/drive/v3/files', methods=['POST'])
+def create_file():
+    """메타데이터만 있는 파일(폴더) 생성"""
+    metadata = request.get_json(silent=True) or {}
+    file_id = uuid.uuid4().hex
+    with state_lock:
+        files[file_id] = dict(metadata, size=0)
+    return jsonify({'id': file_id})
+
+
+@app.route('/upload/drive/v3/files', methods=['POST'])
+def start_upload():
+    """이어 올리기 세션 생성 (Location 헤더로 세션 URI 반환)"""
+    if request.args.get('uploadType') != 'resumable':
+        return jsonify({'error': 'only resumable uploads are supported'}), 400
+    total = request.headers.get('X-Upload-Content-Length', type=int)
+    session_id = uuid.uuid4().hex
+    with state_lock:
+        sessions[session_id] = {'metadata': request.get_json(silent=True) or {}, 'total': total, 'data': bytearray()}
+    response = Response(status=200)
+    response.headers['Location'] = f'{request.host_url}upload/drive/v3/files?uploadType=resumable&upload_id={session_id}'
+    return response
+
+
+@app.route('/upload/drive/v3/files', methods=['PUT'])
+def upload_chunk():
+    """청크 업로드 / 진행 위치 조회 (Content-Range: bytes */total)"""
+    session_id = request.args.get('upload_id')
+    with state_lock:
+        session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'upload session not found'}), 404
+
+    content_range = request.headers.get('Content-Range', '')
+    match = re.fullmatch(r'bytes (\*|(\d+)-(\d+))/(\d+)', content_range)
+    if not match:
+        return jsonify({'error': f'bad Content-Range: {content_range}'}), 400
+    total = int(match.group(4))
+
+    if match.group(2) is not None:
+        start = int(match.group(2))
+        if start != len(session['data']):
+            # 서버가 받은 위치와 다른 청크 - 현재 위치만 알려줌
+            return _incomplete(session)
+
+        chunk = request.get_data()
+        if random.random() < fail_rate:
+            # 일부만 받았거나 아예 못 받은 것처럼 흉내
+            if random.random() < 0.5:
+                session['data'].extend(chunk[:len(chunk) // 2])
+            return jsonify({'error': 'backend error'}), 503
+        session['data'].extend(chunk)
+
+    if len(session['data']) >= total:
+        return _finish(session_id, session)
+    return _incomplete(session)
+
+
+def _incomplete(session):
+    """308 Resume Incomplete (받은 범위를 Range 헤더로 알려줌)"""
+    response = Response(status=308)
+    if session['data']:
+        response.headers['Range'] = f"bytes=0-{len(session['data']) - 1}"
+    return response
+
+
+def _finish(session_id, session):
+    """업로드 완료 - 파일 생성 후 세션 삭제"""
+    file_id = uuid.uuid4().hex
+    with state_lock:
+        files[file_id] = dict(session['metadata'], size=len(session['data']))
+        sessions.pop(session_id, None)
+    return jsonify({'id': file_id}), 200
+
+
+@app.route('/fake/status', methods=['GET'])
+def status():
+    """저장된 파일 및 진행 중인 세션 (시험 확인용)"""
+    with state_lock:
+        return jsonify({
+            'files': files,
+            'sessions': {sid: len(s['data']) for sid, s in sessions.items()},
+        })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='가짜 Google Drive 서버')
+    parser.add_argument('--port', type=int, default=8089, help='포트')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='청크 요청 실패 비율 (0~1)')
+    args = parser.parse_args()
+    fail_rate = args.fail_rate
+
+    print(f"🧪 Fake Drive server on http://localhost:{args.port} (fail rate {fail_rate})")
+    app.run(host='0.0.0.0', port=args.port, debug=False, threaded=True)
@@ -0,0 +1,181 @@
+"""
+Firestore 일괄 쓰기 API
+여러 카메라에서 동시에 들어오는 이벤트를 크기/시간 창 안에서 모아 WriteBatch 1회로 커밋합니다.
+
+문서 ID는 로컬에서 미리 생성되므로 커밋 전에도 이벤트별 ID를 바로 알 수 있습니다.
+Firestore 에뮬레이터로 확인하려면 FIRESTORE_EMULATOR_HOST 환경 변수를 설정하세요.
+
+사용 예:
+    writer = FirestoreBulkWriter(db)
+    future = writer.write('events', event_data)
+    event_id = future.result()  # 커밋 완료까지 대기
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+# Firestore WriteBatch 1회당 최대 쓰기 수
+FIRESTORE_BATCH_LIMIT = 500
+
+
+class FirestoreBulkWriter:
+    """크기/시간 창 기반 WriteBatch 병합기"""
+
+    def __init__(self, db, max_batch_size=100, max_delay=0.2):
+        """
+        Args:
+            db: Firestore 클라이언트 (collection(), batch() 제공)
+            max_batch_size: 한 번에 커밋할 최대 쓰기 수 (최대 500)
+            max_delay: 첫 쓰기 후 커밋까지 기다리는 최대 시간 (초)
+        """
+        self.db = db
+        self.max_batch_size = min(max_batch_size, FIRESTORE_BATCH_LIMIT)
+        self.max_delay = max_delay
+
+        self._condition = threading.Condition()
+        self._pending = []  # [(doc_ref, data, future)]
+        self._first_pending_at = None
+        self._flush_requested = False  # 대기 중인 쓰기를 모두 커밋할 때까지 유지
+        self._closed = False
+
+        # 통계
+        self.commits = 0
+        self.writes = 0
+        self.failed_commits = 0
+        self._commit_time_total = 0.0
+
+        self._thread = threading.Thread(target=self._run, name='firestore-bulk-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, collection, data, document_id=None):
+        """
+        문서 쓰기를 대기열에 추가
+
+        Args:
+            collection: 컬렉션 이름
+            data: 문서 데이터
+            document_id: 문서 ID (None이면 자동 생성)
+
+        Returns:
+            Future: 커밋이 끝나면 문서 ID를 돌려주는 Future (실패 시 예외)
+        """
+        collection_ref = self.db.collection(collection)
+        doc_ref = collection_ref.document(document_id) if document_id else collection_ref.document()
+        future = Future()
+        future.document_id = doc_ref.id
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("FirestoreBulkWriter is closed")
+            if not self._pending:
+                self._first_pending_at = time.time()
+            self._pending.append((doc_ref, data, future))
+            self._condition.notify()
+        return future
+
+    def write_many(self, collection, items, timeout=None):
+        """
+        여러 문서를 쓰고 커밋 완료까지 대기
+
+        Args:
+            collection: 컬렉션 이름
+            items: 문서 데이터 리스트 또는 (document_id, data) 튜플 리스트
+            timeout: 최대 대기 시간 (초)
+
+        Returns:
+            list: 입력 순서대로의 문서 ID
+        """
+        futures = []
+        for item in items:
+            if isinstance(item, tuple):
+                document_id, data = item
+            else:
+                document_id, data = None, item
+            futures.append(self.write(collection, data, document_id))
+        self.flush()
+        return [future.result(timeout) for future in futures]
+
+    def flush(self):
+        """대기 중인 쓰기를 지금 바로 커밋하도록 요청 (max_batch_size를 넘는 나머지도 기다리지 않음)"""
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify()
+
+    def _take_batch(self):
+        """커밋할 쓰기 묶음을 꺼냄 (크기 또는 시간 조건 충족 시까지 대기)"""
+        with self._condition:
+            while True:
+                if self._pending:
+                    waited = time.time() - self._first_pending_at
+                    if (len(self._pending) >= self.max_batch_size or waited >= self.max_delay
+                            or self._flush_requested or self._closed):
+                        break
+                    self._condition.wait(self.max_delay - waited)
+                elif self._closed:
+                    return []
+                else:
+                    self._flush_requested = False
+                    self._condition.wait()
+
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            self._first_pending_at = time.time() if self._pending else None
+            if not self._pending:
+                self._flush_requested = False
+            return batch
+
+    def _run(self):
+        """커밋 루프"""
+        while True:
+            items = self._take_batch()
+            if not items:
+                return
+            self._commit(items)
+
+    def _commit(self, items):
+        """WriteBatch 1회로 커밋하고 Future 결과 설정"""
+        started = time.time()
+        try:
+            batch = self.db.batch()
+            for doc_ref, data, _ in items:
+                batch.set(doc_ref, data)
+            batch.commit()
+        except Exception as e:
+            with self._condition:
+                self.failed_commits += 1
+            print(f"❌ Firestore 일괄 쓰기 실패 ({len(items)}건): {e}")
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+
+        with self._condition:
+            self.commits += 1
+            self.writes += len(items)
+            self._commit_time_total += time.time() - started
+        for doc_ref, _, future in items:
+            future.set_result(doc_ref.id)
+
+    def close(self, timeout=10.0):
+        """남은 쓰기를 커밋한 뒤 종료"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """커밋 횟수 및 평균 배치 크기 (통계는 커밋 스레드와 같은 잠금 안에서 한 번에 읽음)"""
+        with self._condition:
+            pending = len(self._pending)
+            commits = self.commits
+            writes = self.writes
+            failed_commits = self.failed_commits
+            commit_time_total = self._commit_time_total
+        return {
+            'pending': pending,
+            'commits': commits,
+            'writes': writes,
+            'failed_commits': failed_commits,
+            'avg_batch_size': round(writes / commits, 2) if commits else 0.0,
+            'avg_commit_ms': round(commit_time_total / commits * 1000, 1) if commits else 0.0,
+        }
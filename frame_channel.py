@@ -0,0 +1,71 @@
+"""
+프레임 전달 채널
+새 프레임이 들어올 때까지 스트림 생성기를 블록시켜 바쁜 대기(busy-wait)와 고정 sleep 폴링을 없앱니다.
+"""
+
+import threading
+from collections import deque
+
+
+class FrameChannel:
+    """시퀀스 번호 기반 프레임 채널 (threading.Condition)"""
+
+    def __init__(self, history=0):
+        """
+        Args:
+            history: 느린 클라이언트가 건너뛰지 않고 받을 수 있도록 보관할 최근 프레임 수
+                     (0이면 최신 프레임만 보관)
+        """
+        self._condition = threading.Condition()
+        self._history = deque(maxlen=history) if history > 0 else None
+        self.seq = 0
+        self._latest = None
+
+    def publish(self, frame):
+        """
+        새 프레임 게시 후 대기 중인 모든 클라이언트 깨우기
+
+        Returns:
+            int: 게시된 프레임의 시퀀스 번호
+        """
+        with self._condition:
+            self.seq += 1
+            self._latest = frame
+            if self._history is not None:
+                self._history.append((self.seq, frame))
+            self._condition.notify_all()
+            return self.seq
+
+    def latest(self):
+        """
+        최신 프레임 반환 (대기 없음)
+
+        Returns:
+            tuple: (seq, frame) - 아직 프레임이 없으면 (0, None)
+        """
+        with self._condition:
+            return self.seq, self._latest
+
+    def wait_next(self, last_seq, timeout=None, drop_frames=True):
+        """
+        last_seq 이후의 새 프레임이 올 때까지 대기
+
+        Args:
+            last_seq: 클라이언트가 마지막으로 받은 시퀀스 번호
+            timeout: 최대 대기 시간 (초, None이면 무한 대기)
+            drop_frames: True면 밀린 프레임을 건너뛰고 최신 프레임 반환,
+                         False면 보관 중인 프레임 중 바로 다음 프레임 반환
+
+        Returns:
+            tuple: (seq, frame) - 시간 초과 시 (last_seq, None)
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.seq > last_seq, timeout):
+                return last_seq, None
+
+            if not drop_frames and self._history:
+                for seq, frame in self._history:
+                    if seq > last_seq:
+                        return seq, frame
+
+            return self.seq, self._latest
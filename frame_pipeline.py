@@ -0,0 +1,193 @@
+"""
+캡처 → 추론 → 출력 3단계 파이프라인
+단계마다 스레드를 두고 크기 제한 큐로 연결해서, 카메라는 모델을 기다리지 않고
+추론 중에도 다음 프레임을 계속 캡처합니다. 큐가 가득 차면 가장 오래된 항목을 버리므로
+항상 최신 프레임이 처리됩니다.
+
+출력 단계(그리기, cv2.imshow, 알림)는 results()를 호출한 스레드에서 실행됩니다.
+OpenCV 창은 메인 스레드에서만 안정적으로 동작하므로 메인 스레드에서 호출하세요.
+
+사용 예:
+    pipeline = FramePipeline(picam2.capture_array, lambda frame, ts: engine.detect(frame)[0])
+    pipeline.start()
+    for item in pipeline.results():
+        draw(item.frame, item.result)
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# 파이프라인 출력 항목
+PipelineItem = namedtuple('PipelineItem', ['seq', 'timestamp', 'frame', 'result'])
+
+
+def _put_latest(q, item):
+    """큐에 항목 추가 (가득 차면 가장 오래된 항목을 버림)
+
+    Returns:
+        bool: 항목을 버렸는지 여부
+    """
+    dropped = False
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped = True
+            except queue.Empty:
+                pass
+
+
+class _StageStats:
+    """단계별 처리 수/시간 통계"""
+
+    def __init__(self):
+        self.count = 0
+        self.dropped = 0
+        self.total_time = 0.0
+        self.started_at = None
+
+    def record(self, elapsed):
+        if self.started_at is None:
+            self.started_at = time.time()
+        self.count += 1
+        self.total_time += elapsed
+
+    def as_dict(self):
+        running = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            'count': self.count,
+            'dropped': self.dropped,
+            'avg_ms': round(self.total_time / self.count * 1000, 1) if self.count else 0.0,
+            'fps': round(self.count / running, 1) if running > 0 else 0.0,
+        }
+
+
+class FramePipeline:
+    """스레드 기반 캡처/추론 파이프라인"""
+
+    def __init__(self, capture_fn, infer_fn, capture_queue_size=1, result_queue_size=2, on_capture=None):
+        """
+        Args:
+            capture_fn: 프레임 1장을 반환하는 함수 (실패 시 None 반환)
+                매번 새 배열을 반환해야 합니다 (단계 사이에서 같은 버퍼를 공유하지 않도록).
+            infer_fn: 추론 함수 infer_fn(frame, timestamp) -> 결과
+            capture_queue_size: 캡처 → 추론 큐 크기 (1이면 항상 최신 프레임만 추론)
+            result_queue_size: 추론 → 출력 큐 크기
+            on_capture: 캡처 스레드에서 프레임마다 호출할 함수 on_capture(frame, timestamp)
+                (이벤트 영상 버퍼처럼 카메라 속도로 모든 프레임이 필요한 경우)
+        """
+        self.capture_fn = capture_fn
+        self.infer_fn = infer_fn
+        self.on_capture = on_capture
+
+        self._frames = queue.Queue(maxsize=capture_queue_size)
+        self._results = queue.Queue(maxsize=result_queue_size)
+        self._stop_event = threading.Event()
+        self._threads = []
+        self.error = None
+
+        # 통계
+        self.capture_stats = _StageStats()
+        self.infer_stats = _StageStats()
+        self.output_stats = _StageStats()
+
+    def start(self):
+        """캡처/추론 스레드 시작"""
+        self._stop_event.clear()
+        for target, name in ((self._capture_loop, 'pipeline-capture'), (self._infer_loop, 'pipeline-infer')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _capture_loop(self):
+        """캡처 단계: 카메라 속도로 읽고 최신 프레임만 추론 큐에 유지"""
+        seq = 0
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                frame = self.capture_fn()
+            except Exception as e:
+                print(f"⚠️  프레임 캡처 실패: {e}")
+                frame = None
+            if frame is None:
+                self._stop_event.wait(0.5)
+                continue
+
+            timestamp = time.time()
+            seq += 1
+            if self.on_capture:
+                self.on_capture(frame, timestamp)
+            self.capture_stats.record(time.perf_counter() - started)
+
+            if _put_latest(self._frames, (seq, timestamp, frame)):
+                self.capture_stats.dropped += 1
+
+    def _infer_loop(self):
+        """추론 단계: 최신 프레임을 꺼내 추론 후 출력 큐에 추가"""
+        while not self._stop_event.is_set():
+            try:
+                seq, timestamp, frame = self._frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            started = time.perf_counter()
+            try:
+                result = self.infer_fn(frame, timestamp)
+            except Exception as e:
+                # 추론 오류는 출력 스레드로 전달해서 호출 측이 처리하도록 함
+                self.error = e
+                self._stop_event.set()
+                return
+            self.infer_stats.record(time.perf_counter() - started)
+
+            if _put_latest(self._results, PipelineItem(seq, timestamp, frame, result)):
+                self.infer_stats.dropped += 1
+
+    def results(self, timeout=0.5):
+        """
+        추론 결과를 순서대로 반환하는 생성기 (호출한 스레드에서 출력 단계 실행)
+
+        다음 결과까지의 처리 시간을 출력 단계 시간으로 기록합니다.
+
+        Args:
+            timeout: 결과 대기 시간 (초) - 이 시간 동안 결과가 없으면 정지 여부만 확인
+
+        Yields:
+            PipelineItem: (seq, timestamp, frame, result)
+
+        Raises:
+            Exception: 추론 단계에서 발생한 예외
+        """
+        while not self._stop_event.is_set():
+            try:
+                item = self._results.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            started = time.perf_counter()
+            yield item
+            self.output_stats.record(time.perf_counter() - started)
+
+        if self.error is not None:
+            raise self.error
+
+    def stop(self, timeout=2.0):
+        """캡처/추론 스레드 정지"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        """단계별 처리 수, 버린 프레임 수, 평균 처리 시간, FPS"""
+        return {
+            'capture': self.capture_stats.as_dict(),
+            'infer': self.infer_stats.as_dict(),
+            'output': self.output_stats.as_dict(),
+            'capture_queue': self._frames.qsize(),
+            'result_queue': self._results.qsize(),
+        }
@@ -0,0 +1,259 @@
+"""
+이벤트 영상용 프레임 링 버퍼
+미리 할당한 (N, H, W, 3) 배열에 프레임을 돌려 쓰므로 프레임마다 새 배열을 만들지 않고,
+get()/views()는 복사 없이 슬롯 뷰를 그대로 넘겨줍니다.
+
+프레임마다 1부터 증가하는 시퀀스 번호가 붙으며, 버퍼에는 최근 capacity개의 번호만 남아 있습니다.
+쓰기 스레드가 계속 덮어쓰므로 뷰는 해당 슬롯이 다시 쓰이기 전까지만 유효합니다.
+iter_frames()는 곧 덮어쓸 가장 오래된 몇 프레임(guard)을 건너뛰고, 프레임을 재사용 작업 버퍼에
+복사한 뒤 그 사이 쓰기 스레드가 슬롯을 덮어쓰기 시작했으면 깨진 프레임으로 보고 내보내지 않습니다
+(건너뛴 수는 torn_frames로 기록).
+
+JpegFrameRingBuffer는 같은 인터페이스로 JPEG 바이트를 보관하여 같은 메모리에 더 긴 프리롤을 담습니다.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+
+class _RingBufferBase(ABC):
+    """시퀀스 번호 → 슬롯 매핑 공통 로직"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._next_seq = 1  # 다음에 쓸 시퀀스 번호
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+
+        # 통계
+        self.torn_frames = 0
+
+    def __len__(self):
+        return min(self._next_seq - 1, self.capacity)
+
+    @property
+    def latest_seq(self):
+        """가장 최근 프레임의 시퀀스 번호 (없으면 0)"""
+        return self._next_seq - 1
+
+    @property
+    def oldest_seq(self):
+        """버퍼에 남아 있는 가장 오래된 시퀀스 번호 (없으면 0)"""
+        if self._next_seq == 1:
+            return 0
+        return max(1, self._next_seq - self.capacity)
+
+    def is_valid(self, seq):
+        """seq 프레임이 아직 덮어써지지 않았는지 여부"""
+        return self._next_seq - self.capacity <= seq < self._next_seq
+
+    def wait_for(self, seq, timeout=None):
+        """
+        seq 프레임이 기록될 때까지 대기
+
+        Returns:
+            bool: 기록되었으면 True, 시간 초과면 False
+        """
+        with self._new_frame:
+            return self._new_frame.wait_for(lambda: self._next_seq > seq, timeout)
+
+    def _claim_slot(self, timestamp):
+        """다음 슬롯 번호와 시퀀스 번호 (잠금 보유 상태에서 호출)"""
+        seq = self._next_seq
+        slot = seq % self.capacity
+        self._timestamps[slot] = time.time() if timestamp is None else timestamp
+        return seq, slot
+
+    @abstractmethod
+    def _read(self, slot, out=None):
+        """
+        슬롯의 프레임 반환
+
+        Args:
+            slot: 슬롯 번호
+            out: 복사해 넣을 작업 버퍼 (None이면 가능한 경우 뷰 반환, 지원하지 않으면 무시)
+        """
+
+    def _read_buffer(self):
+        """iter_frames()에서 재사용할 작업 버퍼 (필요 없으면 None)"""
+        return None
+
+    def get(self, seq):
+        """
+        seq 프레임 반환
+
+        Returns:
+            tuple: (timestamp, frame) - 이미 덮어써졌으면 None
+        """
+        if not self.is_valid(seq):
+            return None
+        slot = seq % self.capacity
+        return self._timestamps[slot], self._read(slot)
+
+    def iter_frames(self, start_seq=None, end_seq=None, guard=2):
+        """
+        시퀀스 순서대로 프레임 반환 (쓰기와 동시에 읽어도 됨)
+
+        Args:
+            start_seq: 시작 시퀀스 번호 (None이면 가장 오래된 프레임)
+            end_seq: 마지막 시퀀스 번호 (포함, None이면 호출 시점의 최신 프레임)
+            guard: 곧 덮어쓸 가장 오래된 프레임 중 건너뛸 개수
+
+        Yields:
+            tuple: (seq, timestamp, frame) - frame은 다음 프레임을 읽을 때 덮어쓰는 작업 버퍼
+        """
+        end_seq = self.latest_seq if end_seq is None else end_seq
+        seq = self.oldest_seq if start_seq is None else start_seq
+        out = self._read_buffer()
+
+        while seq <= end_seq:
+            # 아직 기록되지 않은 프레임에서 중단 (이후 프레임은 wait_for()로 기다림)
+            if seq >= self._next_seq:
+                break
+
+            # 쓰기 위치에 너무 가까운 프레임은 건너뜀
+            min_seq = self._next_seq - self.capacity + guard
+            if seq < min_seq:
+                seq = min_seq
+                continue
+
+            slot = seq % self.capacity
+            timestamp = self._timestamps[slot]
+            frame = self._read(slot, out)
+
+            # 읽는 동안 쓰기 스레드가 이 슬롯에 쓰기 시작했으면(진행 중인 쓰기 포함) 깨진 프레임이므로 버림
+            if seq <= self._next_seq - self.capacity:
+                self.torn_frames += 1
+                seq += 1
+                continue
+
+            yield seq, timestamp, frame
+            seq += 1
+
+
+class FrameRingBuffer(_RingBufferBase):
+    """미리 할당한 원본 프레임 링 버퍼 (뷰 반환, 복사 없음)"""
+
+    def __init__(self, capacity, frame_shape, dtype=np.uint8):
+        """
+        Args:
+            capacity: 보관할 프레임 수
+            frame_shape: 프레임 모양 (H, W, 3)
+            dtype: 프레임 자료형
+        """
+        super().__init__(capacity)
+        self.frame_shape = tuple(frame_shape)
+        self._frames = np.empty((capacity,) + self.frame_shape, dtype=dtype)
+
+    @property
+    def nbytes(self):
+        """버퍼 메모리 크기 (바이트)"""
+        return self._frames.nbytes
+
+    def append(self, frame, timestamp=None):
+        """
+        프레임을 다음 슬롯에 복사 (새 메모리 할당 없음)
+
+        Returns:
+            int: 시퀀스 번호
+        """
+        with self._lock:
+            seq, slot = self._claim_slot(timestamp)
+            np.copyto(self._frames[slot], frame)
+            self._next_seq = seq + 1
+            self._new_frame.notify_all()
+        return seq
+
+    def _read_buffer(self):
+        return np.empty(self.frame_shape, dtype=self._frames.dtype)
+
+    def _read(self, slot, out=None):
+        if out is None:
+            return self._frames[slot]
+        np.copyto(out, self._frames[slot])
+        return out
+
+    def views(self):
+        """
+        버퍼 내용을 시간순 뷰로 반환 (복사 없음)
+
+        링이 한 바퀴 돈 경우 두 구간으로 나뉩니다.
+
+        Returns:
+            list: 연속 배열 뷰 1~2개 (각 (n, H, W, 3))
+        """
+        with self._lock:
+            count = len(self)
+            if count == 0:
+                return []
+            start = self.oldest_seq % self.capacity
+            end = start + count
+            if end <= self.capacity:
+                return [self._frames[start:end]]
+            return [self._frames[start:], self._frames[:end - self.capacity]]
+
+    def snapshot(self):
+        """
+        버퍼 내용을 시간순으로 복사한 배열과 타임스탬프
+
+        Returns:
+            tuple: (frames (n, H, W, 3), timestamps (n,))
+        """
+        with self._lock:
+            count = len(self)
+            if count == 0:
+                return np.empty((0,) + self.frame_shape, dtype=self._frames.dtype), np.empty(0)
+            slots = (np.arange(self.oldest_seq, self._next_seq)) % self.capacity
+            return self._frames[slots], self._timestamps[slots]
+
+
+class JpegFrameRingBuffer(_RingBufferBase):
+    """JPEG로 압축해서 보관하는 링 버퍼 (읽을 때 디코딩)"""
+
+    def __init__(self, capacity, quality=80):
+        """
+        Args:
+            capacity: 보관할 프레임 수
+            quality: JPEG 품질
+        """
+        super().__init__(capacity)
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self._slots = [None] * capacity
+
+    @property
+    def nbytes(self):
+        """보관 중인 JPEG 바이트 합계"""
+        return sum(len(data) for data in self._slots if data is not None)
+
+    def append(self, frame, timestamp=None):
+        """
+        프레임을 JPEG로 인코딩해서 다음 슬롯에 보관 (인코딩은 잠금 밖에서 수행)
+
+        Returns:
+            int: 시퀀스 번호 (인코딩 실패 시 None)
+        """
+        ret, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ret:
+            return None
+        with self._lock:
+            seq, slot = self._claim_slot(timestamp)
+            self._slots[slot] = buffer.tobytes()
+            self._next_seq = seq + 1
+            self._new_frame.notify_all()
+        return seq
+
+    def _read(self, slot, out=None):
+        # bytes는 바뀌지 않으므로 참조를 얻은 뒤에는 슬롯이 덮어써져도 디코딩 결과가 섞이지 않음
+        data = self._slots[slot]
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def get_jpeg(self, seq):
+        """seq 프레임의 JPEG 바이트 (디코딩 없음, 덮어써졌으면 None)"""
+        if not self.is_valid(seq):
+            return None
+        return self._slots[seq % self.capacity]
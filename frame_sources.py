@@ -0,0 +1,84 @@
+"""
+녹화 영상/이미지 폴더 프레임 읽기
+카메라 없이 저장된 프레임(이벤트 영상 mp4, 스냅샷 jpg 등)을 감지 파이프라인에 넣을 때 사용합니다.
+
+사용 예:
+    for name, frame in iter_frames(['detection_events/', 'clip.mp4'], stride=5, max_frames=200):
+        detections = engine.detect(frame)[0]
+"""
+
+import os
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.h264')
+
+
+def list_sources(paths):
+    """
+    경로 목록을 이미지/영상 파일 목록으로 펼침 (디렉토리는 하위까지 정렬해서 탐색)
+
+    Args:
+        paths: 파일 또는 디렉토리 경로 목록
+
+    Returns:
+        list: 이미지/영상 파일 경로
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS):
+                        files.append(os.path.join(root, name))
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(path)
+    return files
+
+
+def iter_frames(paths, stride=1, max_frames=None):
+    """
+    이미지/영상에서 프레임을 순서대로 읽음
+
+    Args:
+        paths: 파일 또는 디렉토리 경로 목록
+        stride: 영상에서 N프레임마다 1장씩 사용 (이미지는 모두 사용)
+        max_frames: 최대 프레임 수 (None이면 전부)
+
+    Yields:
+        tuple: (프레임 이름, BGR 프레임) - 이름은 이미지 경로 또는 "영상경로#프레임번호"
+    """
+    count = 0
+    for path in list_sources(paths):
+        if max_frames is not None and count >= max_frames:
+            return
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"⚠️  Cannot read image: {path}")
+                continue
+            count += 1
+            yield path, frame
+            continue
+
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            print(f"⚠️  Cannot open video: {path}")
+            continue
+        try:
+            index = 0
+            while max_frames is None or count < max_frames:
+                if not capture.grab():
+                    break
+                if index % stride == 0:
+                    ret, frame = capture.retrieve()
+                    if ret:
+                        count += 1
+                        yield f'{path}#{index}', frame
+                index += 1
+        finally:
+            capture.release()
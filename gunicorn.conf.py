@@ -0,0 +1,37 @@
+"""
+camera_server 운영 설정 (gunicorn gthread 워커)
+
+사용 방법:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+카메라 캡처, 프레임 채널, 이벤트 저장소가 모두 프로세스 메모리에 있으므로 워커는 1개만 사용하고,
+MJPEG 시청자는 워커 안의 스레드로 처리합니다. 시청자 스레드는 새 프레임이 올 때까지
+Condition에서 잠들어 있고 인코딩은 카메라당 한 번만 하므로, 스레드 수를 늘려도 CPU는 거의 늘지 않습니다.
+
+gevent 워커는 쓰지 않습니다. cv2.VideoCapture.read()와 ONNX 추론이 C 코드 안에서 블록되어
+이벤트 루프 전체가 멈추기 때문입니다.
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# 프로세스 1개 + 스레드 풀 (동시 연결 수 = threads)
+workers = 1
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '256'))
+
+# 스트림은 오래 유지되므로 워커 시간 제한은 하트비트 기준으로만 적용
+timeout = 60
+graceful_timeout = 10
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # 기본값: 끔 (스트림 요청마다 로그가 남지 않도록)
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def worker_exit(server, worker):
+    """워커 종료 시 대기 중인 이벤트 저장 및 로그 닫기"""
+    from camera_server import shutdown_server
+    shutdown_server()
@@ -0,0 +1,126 @@
+"""
+서버 측 다중 카메라 추론 스케줄러
+실행 중인 모든 카메라의 최신 프레임을 모아 배치 1회로 추론하고, 결과를 카메라별로 돌려줍니다.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+
+class InferenceScheduler:
+    """배치 추론 스케줄러"""
+
+    def __init__(self, engine, get_cameras, interval=0.2, on_result=None):
+        """
+        Args:
+            engine: DetectorEngine 인스턴스
+            get_cameras: (camera_id, CameraStream) 목록을 반환하는 함수
+            interval: 배치 추론 최소 주기 (초)
+            on_result: 카메라별 결과를 받을 콜백 on_result(camera_id, result)
+        """
+        self.engine = engine
+        self.get_cameras = get_cameras
+        self.interval = interval
+        self.on_result = on_result
+
+        self.is_running = False
+        self.results = {}
+        self.results_lock = threading.Lock()
+        self._last_seq = {}
+
+        # 통계
+        self.batch_count = 0
+        self.frame_count = 0
+        self.last_batch_size = 0
+        self.last_latency = 0.0
+
+    def start(self):
+        """스케줄러 스레드 시작"""
+        if self.is_running:
+            return
+        self.is_running = True
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def stop(self):
+        """스케줄러 정지"""
+        self.is_running = False
+
+    def _collect_batch(self):
+        """아직 추론하지 않은 새 프레임을 카메라별로 1장씩 수집"""
+        batch = []
+        for camera_id, camera in self.get_cameras():
+            if not camera.is_running:
+                continue
+            seq, frame = camera.get_latest_frame()
+            if frame is None or seq == self._last_seq.get(camera_id):
+                continue
+            batch.append((camera_id, seq, frame))
+        return batch
+
+    def _run(self):
+        """수집 → 배치 추론 → 카메라별 결과 배포 루프"""
+        while self.is_running:
+            started = time.time()
+            batch = self._collect_batch()
+
+            if batch:
+                try:
+                    detections = self.engine.detect([frame for _, _, frame in batch])
+                except Exception as e:
+                    print(f"Batch inference failed: {e}")
+                    detections = None
+
+                if detections is not None:
+                    self._publish(batch, detections)
+                    self.batch_count += 1
+                    self.frame_count += len(batch)
+                    self.last_batch_size = len(batch)
+                    self.last_latency = time.time() - started
+
+            time.sleep(max(0.0, self.interval - (time.time() - started)))
+
+    def _publish(self, batch, detections):
+        """배치 결과를 카메라별로 저장하고 콜백 호출"""
+        timestamp = datetime.now().isoformat()
+        for (camera_id, seq, _), frame_detections in zip(batch, detections):
+            self._last_seq[camera_id] = seq
+            result = {
+                'camera_id': camera_id,
+                'frame_seq': seq,
+                'timestamp': timestamp,
+                'detections': [
+                    {
+                        'label': self.engine.label_of(class_id),
+                        'confidence': round(float(score), 4),
+                        'bbox': [int(v) for v in box],
+                    }
+                    for box, score, class_id in zip(*frame_detections)
+                ],
+            }
+
+            with self.results_lock:
+                self.results[camera_id] = result
+
+            if self.on_result:
+                try:
+                    self.on_result(camera_id, result)
+                except Exception as e:
+                    print(f"Result callback failed (camera {camera_id}): {e}")
+
+    def get_result(self, camera_id):
+        """카메라의 최신 감지 결과 반환 (없으면 None)"""
+        with self.results_lock:
+            return self.results.get(camera_id)
+
+    def stats(self):
+        """스케줄러 통계"""
+        return {
+            'running': self.is_running,
+            'batches': self.batch_count,
+            'frames': self.frame_count,
+            'avg_batch_size': round(self.frame_count / self.batch_count, 2) if self.batch_count else 0.0,
+            'last_batch_size': self.last_batch_size,
+            'last_latency_ms': round(self.last_latency * 1000, 1),
+        }
@@ -0,0 +1,121 @@
+"""
+감지 이벤트 수신 워커 풀
+요청 스레드는 검증 후 작업을 대기열에 넣고 바로 응답하며,
+이미지 기록/이벤트 저장 같은 디스크 작업은 워커 스레드가 처리합니다.
+"""
+
+import queue
+import threading
+import time
+
+
+class IngestWorkerPool:
+    """제한 크기 큐 + 워커 스레드 기반 수신 처리기"""
+
+    def __init__(self, handler, max_queue=100, workers=4):
+        """
+        Args:
+            handler: 작업 1건을 처리하는 함수 handler(job) (예외는 기록 후 무시)
+            max_queue: 대기열 최대 크기 (가득 차면 submit()이 False 반환)
+            workers: 워커 스레드 수
+        """
+        self.handler = handler
+        self.max_queue = max_queue
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+
+        # 통계
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self._lag_total = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._process_time_total = 0.0
+
+        self._workers = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f'ingest-worker-{i}', daemon=True)
+            thread.start()
+            self._workers.append(thread)
+
+    def submit(self, job):
+        """
+        작업을 대기열에 추가 (블록하지 않음)
+
+        Returns:
+            bool: 추가 성공 여부 (대기열이 가득 차면 False - 호출 측에서 429 응답)
+        """
+        try:
+            self._queue.put_nowait((time.time(), job))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            return False
+
+        with self._stats_lock:
+            self.accepted += 1
+        return True
+
+    def _worker(self):
+        """대기열에서 작업을 꺼내 처리"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            enqueued_at, job = item
+            started = time.time()
+            lag = started - enqueued_at
+            try:
+                self.handler(job)
+            except Exception as e:
+                print(f"Ingest job failed: {e}")
+                with self._stats_lock:
+                    self.failed += 1
+            else:
+                with self._stats_lock:
+                    self.processed += 1
+            finally:
+                with self._stats_lock:
+                    self._lag_total += lag
+                    self.last_lag = lag
+                    self.max_lag = max(self.max_lag, lag)
+                    self._process_time_total += time.time() - started
+                self._queue.task_done()
+
+    def join(self):
+        """대기 중인 작업이 모두 처리될 때까지 대기"""
+        self._queue.join()
+
+    def stop(self, timeout=10.0):
+        """
+        남은 작업을 처리한 뒤 워커 종료
+
+        Args:
+            timeout: 워커별 최대 대기 시간 (초)
+        """
+        for _ in self._workers:
+            self._queue.put(None)
+        for thread in self._workers:
+            thread.join(timeout)
+
+    def stats(self):
+        """대기열 깊이 및 대기 지연(lag) 통계"""
+        with self._stats_lock:
+            done = self.processed + self.failed
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_queue': self.max_queue,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'processed': self.processed,
+                'failed': self.failed,
+                'avg_lag_ms': round(self._lag_total / done * 1000, 1) if done else 0.0,
+                'max_lag_ms': round(self.max_lag * 1000, 1),
+                'last_lag_ms': round(self.last_lag * 1000, 1),
+                'avg_process_ms': round(self._process_time_total / done * 1000, 1) if done else 0.0,
+            }
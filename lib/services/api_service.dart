@@ -145,7 +145,8 @@ class ApiService {
         }),
       );
 
-      return response.statusCode == 201;
+      // 201: 바로 저장됨, 202: 서버 수신 대기열에 접수됨
+      return response.statusCode == 201 || response.statusCode == 202;
     } catch (e) {
       print('Error reporting detection: $e');
       return false;
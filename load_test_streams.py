@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+MJPEG 스트림 부하 테스트
+시청자 수를 단계적으로 늘리며 동시 연결을 열고, 시청자당 수신 FPS와
+서버 프로세스 CPU 사용량을 측정해 코어당 시청자 수를 계산합니다.
+
+클라이언트는 asyncio 소켓 하나로 수백 개 연결을 처리하므로 부하 생성 쪽 스레드가 병목이 되지 않습니다.
+서버 CPU는 Linux /proc/<pid>/stat에서 읽으므로 서버와 같은 머신에서 --server-pid를 지정해야 합니다.
+
+사용 방법:
+    gunicorn -c gunicorn.conf.py wsgi:app &
+    python3 load_test_streams.py --url http://localhost:5000/api/camera/1/stream \\
+        --viewers 50 100 200 400 --duration 20 --server-pid $(pgrep -f wsgi:app | head -1)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+BOUNDARY_MARKER = b'--frame'
+
+
+def read_cpu_seconds(pid):
+    """프로세스의 누적 CPU 시간 (user + system, 초)"""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    # utime, stime은 ')' 이후 12, 13번째 필드
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+async def watch_stream(host, port, path, deadline, counters, index):
+    """
+    스트림 1개에 연결해 deadline까지 받은 프레임 수 기록
+
+    Returns:
+        str 또는 None: 오류 메시지
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError as e:
+        return f'connect: {e}'
+
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+
+    tail = b''
+    try:
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                data = await asyncio.wait_for(reader.read(65536), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                return 'closed by server'
+            # 청크 경계에 걸친 구분자도 세도록 이전 데이터 끝부분을 붙여서 검사
+            buffer = tail + data
+            counters[index] += buffer.count(BOUNDARY_MARKER)
+            tail = buffer[-(len(BOUNDARY_MARKER) - 1):]
+    except OSError as e:
+        return f'read: {e}'
+    finally:
+        writer.close()
+    return None
+
+
+async def run_step(url, viewers, duration, ramp):
+    """
+    viewers개 연결을 ramp초에 걸쳐 열고 duration초 동안 수신
+
+    Returns:
+        tuple: (시청자별 프레임 수 리스트, 오류 리스트)
+    """
+    parsed = urlparse(url)
+    host = parsed.hostname
+    port = parsed.port or 80
+    path = parsed.path + (f'?{parsed.query}' if parsed.query else '')
+
+    counters = [0] * viewers
+    deadline = time.time() + ramp + duration
+    tasks = []
+    for i in range(viewers):
+        tasks.append(asyncio.create_task(watch_stream(host, port, path, deadline, counters, i)))
+        if ramp:
+            await asyncio.sleep(ramp / viewers)
+
+    # 연결이 모두 열린 뒤의 구간만 측정
+    warm_counts = list(counters)
+    await asyncio.sleep(max(0.0, deadline - time.time() - 0.05))
+    counts = [c - w for c, w in zip(counters, warm_counts)]
+    errors = [e for e in await asyncio.gather(*tasks) if e]
+    return counts, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MJPEG 스트림 부하 테스트')
+    parser.add_argument('--url', default='http://localhost:5000/api/camera/1/stream', help='스트림 URL')
+    parser.add_argument('--viewers', type=int, nargs='+', default=[50, 100, 200, 400], help='단계별 시청자 수')
+    parser.add_argument('--duration', type=float, default=20.0, help='단계별 측정 시간 (초)')
+    parser.add_argument('--ramp', type=float, default=5.0, help='연결을 여는 데 쓰는 시간 (초)')
+    parser.add_argument('--server-pid', type=int, default=None, help='서버 프로세스 PID (CPU 측정용)')
+    parser.add_argument('--min-fps', type=float, default=10.0, help='정상 시청으로 볼 최소 FPS')
+    args = parser.parse_args()
+
+    results = []
+    for viewers in args.viewers:
+        cpu_before = read_cpu_seconds(args.server_pid) if args.server_pid else None
+        started = time.time()
+        counts, errors = asyncio.run(run_step(args.url, viewers, args.duration, args.ramp))
+        wall = time.time() - started
+
+        fps = sorted(count / args.duration for count in counts)
+        healthy = sum(1 for f in fps if f >= args.min_fps)
+        result = {
+            'viewers': viewers,
+            'errors': len(errors),
+            'fps_min': round(fps[0], 1) if fps else 0.0,
+            'fps_median': round(fps[len(fps) // 2], 1) if fps else 0.0,
+            'fps_mean': round(sum(fps) / len(fps), 1) if fps else 0.0,
+            'healthy_viewers': healthy,
+        }
+
+        if cpu_before is not None:
+            cores_used = (read_cpu_seconds(args.server_pid) - cpu_before) / wall
+            result['server_cores_used'] = round(cores_used, 3)
+            result['viewers_per_core'] = round(healthy / cores_used, 1) if cores_used > 0 else None
+
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False))
+        if errors:
+            print(f"  errors (first 3): {errors[:3]}")
+
+    print(json.dumps({'url': args.url, 'duration': args.duration, 'steps': results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+MJPEG 프레임 공유 (카메라/프로필당 1회 인코딩)
+같은 카메라를 같은 화질로 보는 모든 클라이언트가 한 번 인코딩된 JPEG 바이트를 함께 사용합니다.
+
+스트림 쿼리 파라미터:
+    q: JPEG 품질 (10~95)
+    w: 최대 가로 크기 (원본보다 작을 때만 축소, 32 단위로 반올림)
+    fps: 최대 전송 FPS
+    adaptive=1: 소켓 쓰기가 밀리면 화질/해상도를 단계적으로 낮추고, 여유가 생기면 다시 올림
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import cv2
+
+MJPEG_BOUNDARY = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+# 인코딩 프로필 (None이면 OpenCV 기본 품질 / 원본 크기)
+StreamProfile = namedtuple('StreamProfile', ['quality', 'width'])
+FULL_PROFILE = StreamProfile(None, None)
+
+# 적응형 모드에서 차례로 내려갈 프로필 (고정 값이라 여러 시청자가 같은 캐시를 공유)
+ADAPTIVE_LADDER = [
+    StreamProfile(70, 960),
+    StreamProfile(55, 640),
+    StreamProfile(45, 480),
+    StreamProfile(35, 320),
+]
+
+OPENCV_DEFAULT_QUALITY = 95
+
+# 적응형 스트림의 소켓 송신 버퍼 크기
+# 커널 자동 조절에 맡기면 수 MB까지 커져서 쓰기 지연이 한참 뒤에야 드러남
+ADAPTIVE_SEND_BUFFER = 256 * 1024
+
+
+def make_mjpeg_chunk(jpeg_bytes):
+    """JPEG 바이트를 multipart/x-mixed-replace 청크로 감싸기"""
+    return MJPEG_BOUNDARY + jpeg_bytes + b'\r\n'
+
+
+class MjpegBroadcaster:
+    """카메라별 인코딩 결과 공유기"""
+
+    def __init__(self, channel, quality=None, cache_size=4):
+        """
+        Args:
+            channel: 카메라 원본 프레임이 게시되는 FrameChannel
+            quality: 기본 프로필의 JPEG 품질 (None이면 OpenCV 기본값)
+            cache_size: 프로필별로 보관할 최근 인코딩 결과 수
+        """
+        self.channel = channel
+        self.default_profile = StreamProfile(quality, None)
+        self.cache_size = cache_size
+        self._locks_guard = threading.Lock()
+        self._encode_locks = {}  # profile -> lock (프로필끼리는 동시에 인코딩)
+        self._cache = OrderedDict()  # (frame_seq, profile) -> mjpeg chunk
+
+        # 통계
+        self.encode_count = 0
+        self.viewers = 0
+        self._viewers_lock = threading.Lock()
+
+    def get_chunk(self, profile=None):
+        """
+        최신 프레임의 MJPEG 청크 반환 (대기 없음)
+
+        Returns:
+            tuple: (frame_seq, chunk) - 프레임이 없으면 chunk는 None
+        """
+        seq, frame = self.channel.latest()
+        return self.encode(seq, frame, profile)
+
+    def wait_chunk(self, last_seq, timeout=1.0, drop_frames=True, profile=None):
+        """
+        last_seq 이후의 새 프레임이 올 때까지 대기한 뒤 MJPEG 청크 반환
+
+        Args:
+            last_seq: 클라이언트가 마지막으로 받은 시퀀스 번호
+            timeout: 최대 대기 시간 (초)
+            drop_frames: False면 밀린 프레임도 순서대로 전달 (채널 보관 범위 내)
+            profile: 인코딩 프로필 (None이면 기본 프로필)
+
+        Returns:
+            tuple: (frame_seq, chunk) - 시간 초과 시 (last_seq, None)
+        """
+        seq, frame = self.channel.wait_next(last_seq, timeout, drop_frames)
+        if frame is None:
+            return last_seq, None
+        return self.encode(seq, frame, profile)
+
+    def _lock_for(self, profile):
+        """프로필별 인코딩 잠금"""
+        lock = self._encode_locks.get(profile)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._encode_locks.setdefault(profile, threading.Lock())
+        return lock
+
+    def encode(self, seq, frame, profile=None):
+        """
+        프레임을 프로필별로 한 번만 인코딩하여 캐시된 청크 반환
+
+        새 프레임을 처음 요청한 클라이언트만 인코딩하고,
+        같은 프로필의 나머지 클라이언트는 같은 바이트를 그대로 받습니다.
+        """
+        if frame is None:
+            return seq, None
+
+        profile = self._resolve(profile)
+        key = (seq, profile)
+        chunk = self._cache.get(key)
+        if chunk is not None:
+            return seq, chunk
+
+        with self._lock_for(profile):
+            # 대기하는 동안 다른 클라이언트가 이미 인코딩했을 수 있음
+            chunk = self._cache.get(key)
+            if chunk is None:
+                image = frame
+                if profile.width and profile.width < frame.shape[1]:
+                    height = max(1, round(frame.shape[0] * profile.width / frame.shape[1]))
+                    image = cv2.resize(frame, (profile.width, height), interpolation=cv2.INTER_AREA)
+                params = [cv2.IMWRITE_JPEG_QUALITY, profile.quality] if profile.quality else []
+                ret, buffer = cv2.imencode('.jpg', image, params)
+                if not ret:
+                    return seq, None
+                chunk = make_mjpeg_chunk(buffer.tobytes())
+                with self._locks_guard:
+                    self._cache[key] = chunk
+                    # 활성 프로필 수만큼 캐시 크기 확장
+                    while len(self._cache) > self.cache_size * max(1, len(self._encode_locks)):
+                        self._cache.popitem(last=False)
+                self.encode_count += 1
+            return seq, chunk
+
+    def _resolve(self, profile):
+        """프로필의 빈 항목을 기본 프로필 값으로 채움"""
+        if profile is None:
+            return self.default_profile
+        if profile.quality is None and self.default_profile.quality is not None:
+            return StreamProfile(self.default_profile.quality, profile.width)
+        return profile
+
+    def stream(self, is_running, drop_frames=True, profile=None, max_fps=None, adaptive=False):
+        """
+        MJPEG 청크 생성기 (시청자 등록/해제 포함)
+
+        WSGI 서버는 yield한 청크를 소켓에 다 쓴 뒤 다음 청크를 요청하므로,
+        yield 후 돌아오기까지의 시간을 소켓 쓰기 시간으로 보고 적응형 화질 조절에 사용합니다.
+
+        Args:
+            is_running: 카메라 동작 여부를 돌려주는 함수
+            drop_frames: False면 밀린 프레임도 순서대로 전달
+            profile: 시작 프로필 (None이면 기본 프로필)
+            max_fps: 최대 전송 FPS (None이면 제한 없음)
+            adaptive: True면 쓰기 지연에 따라 프로필을 자동 조절
+        """
+        controller = AdaptiveProfile(self._resolve(profile)) if adaptive else None
+        min_interval = 1.0 / max_fps if max_fps else 0.0
+
+        self.add_viewer()
+        current_seq, _ = self.channel.latest()
+        last_seq = max(current_seq - 1, 0)  # 접속 직후 현재 프레임부터 전송
+        last_sent = 0.0
+        try:
+            while is_running():
+                # FPS 제한: 다음 전송 시각까지 대기 후 최신 프레임 전송
+                if min_interval:
+                    delay = last_sent + min_interval - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                # 새 프레임이 게시될 때까지 블록 (시간 초과 시 카메라 상태 재확인)
+                current = controller.profile if controller else profile
+                seq, chunk = self.wait_chunk(last_seq, timeout=1.0, drop_frames=drop_frames, profile=current)
+                if chunk is None:
+                    continue
+
+                last_seq = seq
+                started = time.time()
+                yield chunk
+                finished = time.time()
+                if controller:
+                    controller.record(finished - started, started - last_sent if last_sent else None)
+                last_sent = started
+        finally:
+            self.remove_viewer()
+
+    def add_viewer(self):
+        """스트림 시청자 등록"""
+        with self._viewers_lock:
+            self.viewers += 1
+
+    def remove_viewer(self):
+        """스트림 시청자 해제"""
+        with self._viewers_lock:
+            self.viewers -= 1
+
+
+class AdaptiveProfile:
+    """소켓 쓰기 지연에 따라 인코딩 프로필을 한 단계씩 조절"""
+
+    def __init__(self, base_profile, ladder=ADAPTIVE_LADDER, slow_ratio=0.5, fast_ratio=0.15,
+                 smoothing=0.2, hold_frames=30):
+        """
+        Args:
+            base_profile: 최고 단계 프로필 (클라이언트가 요청한 q/w)
+            ladder: 내려갈 프로필 목록 (base보다 낮은 것만 사용)
+            slow_ratio: 쓰기 시간이 프레임 간격의 이 비율을 넘으면 한 단계 낮춤
+            fast_ratio: 쓰기 시간이 프레임 간격의 이 비율보다 작으면 한 단계 올림
+            smoothing: 지수 이동 평균 계수
+            hold_frames: 단계를 바꾼 뒤 다음 변경까지 최소 프레임 수
+                (올릴 때는 4배 - 낮춘 직후 송신 버퍼가 비워지는 동안 빨라 보이는 것을 무시)
+        """
+        base_quality = base_profile.quality or OPENCV_DEFAULT_QUALITY
+        base_width = base_profile.width or float('inf')
+        self.levels = [base_profile] + [
+            p for p in ladder if p.quality < base_quality and p.width < base_width
+        ]
+        self.level = 0
+        self.slow_ratio = slow_ratio
+        self.fast_ratio = fast_ratio
+        self.smoothing = smoothing
+        self.hold_frames = hold_frames
+
+        self._write_avg = None
+        self._interval_avg = None
+        self._frames_since_change = 0
+
+    @property
+    def profile(self):
+        """현재 프로필"""
+        return self.levels[self.level]
+
+    def record(self, write_seconds, interval_seconds=None):
+        """
+        청크 1개 전송 결과 기록
+
+        Args:
+            write_seconds: 청크를 소켓에 쓰는 데 걸린 시간
+            interval_seconds: 직전 전송 시작부터 이번 전송 시작까지의 시간 (첫 프레임은 None)
+        """
+        a = self.smoothing
+        self._write_avg = write_seconds if self._write_avg is None else \
+            (1 - a) * self._write_avg + a * write_seconds
+        if interval_seconds:
+            self._interval_avg = interval_seconds if self._interval_avg is None else \
+                (1 - a) * self._interval_avg + a * interval_seconds
+
+        self._frames_since_change += 1
+        if self._interval_avg is None or self._frames_since_change < self.hold_frames:
+            return
+
+        ratio = self._write_avg / self._interval_avg
+        if ratio > self.slow_ratio and self.level < len(self.levels) - 1:
+            self._change(self.level + 1)
+        elif ratio < self.fast_ratio and self.level > 0 and self._frames_since_change >= self.hold_frames * 4:
+            self._change(self.level - 1)
+
+    def _change(self, level):
+        """단계 변경 (평균은 새 단계에서 다시 측정)"""
+        self.level = level
+        self._frames_since_change = 0
+        self._write_avg = None
+        self._interval_avg = None
+
+
+def parse_stream_options(args):
+    """
+    스트림 쿼리 파라미터 해석
+
+    Args:
+        args: request.args 같은 매핑 (q, w, fps, adaptive, drop)
+
+    Returns:
+        dict: MjpegBroadcaster.stream()에 넘길 키워드 인자
+
+    Raises:
+        ValueError: 숫자가 아닌 값이 들어온 경우
+    """
+    quality = args.get('q')
+    width = args.get('w')
+    fps = args.get('fps')
+
+    quality = min(95, max(10, int(quality))) if quality else None
+    # 32 단위로 맞춰 비슷한 요청끼리 같은 캐시를 쓰도록 함
+    width = min(3840, max(160, round(int(width) / 32) * 32)) if width else None
+    fps = min(60.0, max(0.5, float(fps))) if fps else None
+
+    return {
+        # ?drop=0 이면 느린 클라이언트도 프레임을 건너뛰지 않음 (보관 범위 내)
+        'drop_frames': args.get('drop', '1') != '0',
+        'profile': StreamProfile(quality, width) if quality or width else None,
+        'max_fps': fps,
+        'adaptive': args.get('adaptive', '0') == '1',
+    }
+
+
+def limit_send_buffer(environ, size=ADAPTIVE_SEND_BUFFER):
+    """
+    WSGI 서버가 노출한 클라이언트 소켓의 송신 버퍼 크기 제한
+
+    gunicorn('gunicorn.socket')과 Werkzeug 개발 서버('werkzeug.socket')를 지원하며,
+    소켓을 얻을 수 없으면 아무것도 하지 않습니다.
+
+    Returns:
+        bool: 적용 여부
+    """
+    sock = environ.get('gunicorn.socket') or environ.get('werkzeug.socket')
+    if sock is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, size)
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,142 @@
+"""
+움직임 게이트 (정지 장면에서 감지 생략)
+축소한 흑백 프레임을 마지막으로 추론한 프레임과 비교해서, 장면이 바뀌었거나
+keep-alive 주기가 지났을 때만 감지기를 실행하도록 알려줍니다.
+
+추론을 건너뛴 프레임은 장면이 그대로이므로 직전 감지 결과를 그대로 사용하면 됩니다.
+
+사용 예:
+    gate = MotionGate()
+    if gate.should_infer(frame, active=len(detections.boxes) > 0):
+        detections = engine.detect(frame)[0]
+"""
+
+import threading
+import time
+
+import cv2
+
+# 라즈베리파이 CPU 온도 (섭씨 1/1000 단위)
+THERMAL_ZONE_PATH = '/sys/class/thermal/thermal_zone0/temp'
+
+
+class MotionGate:
+    """축소 프레임 차분 기반 추론 게이트"""
+
+    def __init__(self, scale_width=160, pixel_threshold=15, min_changed_ratio=0.005,
+                 keepalive_interval=2.0, active_keepalive_interval=0.5):
+        """
+        Args:
+            scale_width: 비교용 축소 프레임 가로 크기
+            pixel_threshold: 변화로 볼 픽셀 밝기 차이 (0~255)
+            min_changed_ratio: 추론할 변화 픽셀 비율 (0.005 = 0.5%)
+            keepalive_interval: 변화가 없어도 추론할 주기 (초)
+            active_keepalive_interval: 직전 추론에서 물체가 감지된 경우의 keep-alive 주기 (초)
+                (가만히 서서 담배를 피우는 사람처럼 움직임이 작은 경우를 놓치지 않도록 짧게 둠)
+        """
+        self.scale_width = scale_width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.keepalive_interval = keepalive_interval
+        self.active_keepalive_interval = active_keepalive_interval
+
+        self._reference = None  # 마지막으로 추론한 프레임 (축소 흑백)
+        self._last_infer_time = 0.0
+        self._lock = threading.Lock()
+
+        # 통계
+        self.frames = 0
+        self.inferred_motion = 0
+        self.inferred_keepalive = 0
+        self.gated = 0
+        self.last_changed_ratio = 0.0
+        self._gate_time_total = 0.0
+
+    def _prepare(self, frame):
+        """비교용 축소 흑백 프레임 (노이즈 완화를 위해 블러 적용)"""
+        height, width = frame.shape[:2]
+        scaled_height = max(1, round(height * self.scale_width / width))
+        small = cv2.resize(frame, (self.scale_width, scaled_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def should_infer(self, frame, active=False, now=None):
+        """
+        이 프레임에서 감지기를 실행할지 판단
+
+        True를 반환하면 호출 측이 추론한 것으로 보고 기준 프레임을 이 프레임으로 바꿉니다.
+
+        Args:
+            frame: 카메라 프레임 (HWC 컬러 또는 흑백)
+            active: 직전 감지 결과에 물체가 있었는지 여부
+            now: 현재 시각 (기본값: time.time())
+
+        Returns:
+            bool: 추론 필요 여부
+        """
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        small = self._prepare(frame)
+
+        with self._lock:
+            self.frames += 1
+            interval = self.active_keepalive_interval if active else self.keepalive_interval
+
+            if self._reference is None or self._reference.shape != small.shape:
+                changed_ratio = 1.0
+            else:
+                diff = cv2.absdiff(small, self._reference)
+                changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+                changed_ratio = changed / diff.size
+            self.last_changed_ratio = changed_ratio
+
+            if changed_ratio >= self.min_changed_ratio:
+                self.inferred_motion += 1
+                infer = True
+            elif now - self._last_infer_time >= interval:
+                self.inferred_keepalive += 1
+                infer = True
+            else:
+                self.gated += 1
+                infer = False
+
+            if infer:
+                self._reference = small
+                self._last_infer_time = now
+            self._gate_time_total += time.perf_counter() - started
+        return infer
+
+    def reset(self):
+        """기준 프레임 초기화 (다음 프레임은 반드시 추론)"""
+        with self._lock:
+            self._reference = None
+
+    def stats(self):
+        """게이트/추론 프레임 수 및 절감 비율"""
+        with self._lock:
+            inferred = self.inferred_motion + self.inferred_keepalive
+            return {
+                'frames': self.frames,
+                'inferred': inferred,
+                'inferred_motion': self.inferred_motion,
+                'inferred_keepalive': self.inferred_keepalive,
+                'gated': self.gated,
+                'gated_ratio': round(self.gated / self.frames, 3) if self.frames else 0.0,
+                'avg_gate_ms': round(self._gate_time_total / self.frames * 1000, 2) if self.frames else 0.0,
+                'cpu_temp_c': read_cpu_temperature(),
+            }
+
+
+def read_cpu_temperature(path=THERMAL_ZONE_PATH):
+    """
+    CPU 온도 읽기 (라즈베리파이/리눅스)
+
+    Returns:
+        float 또는 None: 섭씨 온도 (읽을 수 없으면 None)
+    """
+    try:
+        with open(path) as f:
+            return round(int(f.read().strip()) / 1000.0, 1)
+    except (OSError, ValueError):
+        return None
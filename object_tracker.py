@@ -0,0 +1,372 @@
+"""
+경량 다중 객체 추적기 (ByteTrack 방식)
+감지 결과를 IoU로 기존 트랙과 연결하고, 트랙마다 칼만 필터로 위치/속도를 추정합니다.
+트랙별로 처음/마지막으로 보인 시각을 유지하므로 "한 사람이 3초 이상 머무름"과
+"여러 사람이 잠깐씩 지나감"을 구분할 수 있습니다.
+
+ByteTrack처럼 연결을 두 번 합니다:
+  1) 신뢰도가 높은 감지 ↔ 모든 트랙
+  2) 신뢰도가 낮은 감지 ↔ 1)에서 남은 트랙 (가려지거나 흐려진 물체를 놓치지 않도록)
+따라서 감지기의 신뢰도 임계값은 low_threshold 이하로 낮춰서 사용합니다.
+
+감지는 N프레임마다 한 번만 하고 그 사이 프레임은 predict()로 위치만 예측하면 추론 부하가 1/N로 줄어듭니다.
+모든 트랙의 예측/보정은 배열 연산 한 번으로 처리합니다.
+
+사용 예:
+    tracker = ObjectTracker()
+    tracks = tracker.update(engine.detect(frame)[0], timestamp)  # 감지한 프레임
+    tracks = tracker.predict(timestamp)                          # 감지를 건너뛴 프레임
+    for box, track_id, dwell in zip(tracks.boxes, tracks.track_ids, tracks.dwell): ...
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# 추적 결과 (확정된 트랙만)
+#   boxes:     (T, 4) float32 - [x1, y1, x2, y2]
+#   scores:    (T,)   float32 - 마지막으로 연결된 감지의 신뢰도
+#   class_ids: (T,)   int32
+#   track_ids: (T,)   int64
+#   dwell:     (T,)   float64 - 처음 감지부터 마지막 감지까지의 시간 (초)
+Tracks = namedtuple('Tracks', ['boxes', 'scores', 'class_ids', 'track_ids', 'dwell'])
+
+# 칼만 필터 상태: [cx, cy, w, h, vx, vy, vw, vh] (속도는 초당 변화량)
+_STATE_DIM = 8
+_MEASURE_DIM = 4
+
+
+def empty_tracks():
+    """빈 추적 결과 반환"""
+    return Tracks(
+        np.zeros((0, 4), dtype=np.float32),
+        np.zeros((0,), dtype=np.float32),
+        np.zeros((0,), dtype=np.int32),
+        np.zeros((0,), dtype=np.int64),
+        np.zeros((0,), dtype=np.float64),
+    )
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    두 박스 집합 사이의 IoU 행렬
+
+    Args:
+        boxes_a: (N, 4) [x1, y1, x2, y2]
+        boxes_b: (M, 4) [x1, y1, x2, y2]
+
+    Returns:
+        np.ndarray: (N, M) IoU
+    """
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def greedy_match(iou, threshold):
+    """
+    IoU가 높은 쌍부터 차례로 연결 (트랙/감지는 한 번씩만 사용)
+
+    Args:
+        iou: (T, D) IoU 행렬
+        threshold: 연결할 최소 IoU
+
+    Returns:
+        tuple: (트랙 인덱스 배열, 감지 인덱스 배열)
+    """
+    rows, cols = np.nonzero(iou >= threshold)
+    if rows.size == 0:
+        return np.zeros((0,), dtype=np.int64), np.zeros((0,), dtype=np.int64)
+
+    order = np.argsort(-iou[rows, cols], kind='stable')
+    used_rows = np.zeros(iou.shape[0], dtype=bool)
+    used_cols = np.zeros(iou.shape[1], dtype=bool)
+    matched_rows = []
+    matched_cols = []
+    for row, col in zip(rows[order], cols[order]):
+        if used_rows[row] or used_cols[col]:
+            continue
+        used_rows[row] = True
+        used_cols[col] = True
+        matched_rows.append(row)
+        matched_cols.append(col)
+    return np.asarray(matched_rows, dtype=np.int64), np.asarray(matched_cols, dtype=np.int64)
+
+
+def max_dwell(tracks, class_ids):
+    """
+    지정한 클래스 트랙 중 가장 오래 머문 시간
+
+    Args:
+        tracks: Tracks
+        class_ids: 클래스 ID 목록
+
+    Returns:
+        float: 최대 머문 시간 (초, 트랙이 없으면 0)
+    """
+    mask = np.isin(tracks.class_ids, class_ids)
+    return float(tracks.dwell[mask].max()) if mask.any() else 0.0
+
+
+def _xyxy_to_xywh(boxes):
+    wh = boxes[:, 2:4] - boxes[:, 0:2]
+    return np.concatenate((boxes[:, 0:2] + wh * 0.5, wh), axis=1)
+
+
+def _xywh_to_xyxy(xywh):
+    half_wh = xywh[:, 2:4] * 0.5
+    return np.concatenate((xywh[:, 0:2] - half_wh, xywh[:, 0:2] + half_wh), axis=1)
+
+
+class ObjectTracker:
+    """IoU + 칼만 필터 기반 다중 객체 추적기"""
+
+    def __init__(self, high_threshold=0.4, low_threshold=0.1, new_track_threshold=0.5,
+                 match_iou=0.3, low_match_iou=0.5, min_hits=2, track_buffer=1.0,
+                 position_noise=0.05, velocity_noise=0.2):
+        """
+        Args:
+            high_threshold: 1차 연결에 쓰는 감지 신뢰도 (이 값 이상)
+            low_threshold: 2차 연결에 쓰는 최소 신뢰도 (이 값 미만 감지는 무시)
+            new_track_threshold: 새 트랙을 만들 최소 신뢰도
+            match_iou: 1차 연결 최소 IoU
+            low_match_iou: 2차 연결 최소 IoU (신뢰도 낮은 감지는 더 엄격하게)
+            min_hits: 트랙을 확정할 연결 횟수 (한 번 튄 오감지는 결과에서 제외)
+            track_buffer: 감지되지 않은 트랙을 유지할 시간 (초, 잠깐 가려져도 같은 ID 유지)
+            position_noise: 위치 잡음 (박스 높이 대비 비율)
+            velocity_noise: 속도 잡음 (박스 높이 대비 초당 비율)
+        """
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.new_track_threshold = new_track_threshold
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.min_hits = min_hits
+        self.track_buffer = track_buffer
+        self.position_noise = position_noise
+        self.velocity_noise = velocity_noise
+
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._last_time = None
+        self._reset_arrays()
+
+        # 통계
+        self.updates = 0
+        self.predictions = 0
+        self.tracks_created = 0
+        self._update_time_total = 0.0
+
+    def _reset_arrays(self):
+        self._mean = np.zeros((0, _STATE_DIM), dtype=np.float64)
+        self._cov = np.zeros((0, _STATE_DIM, _STATE_DIM), dtype=np.float64)
+        self._ids = np.zeros((0,), dtype=np.int64)
+        self._class_ids = np.zeros((0,), dtype=np.int32)
+        self._scores = np.zeros((0,), dtype=np.float32)
+        self._hits = np.zeros((0,), dtype=np.int32)
+        self._first_seen = np.zeros((0,), dtype=np.float64)
+        self._last_seen = np.zeros((0,), dtype=np.float64)
+        self._active = np.zeros((0,), dtype=bool)  # 마지막 감지 프레임에서 연결되었는지
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ---------------- 칼만 필터 (모든 트랙 일괄 처리) ----------------
+
+    def _predict_to(self, timestamp):
+        """모든 트랙 상태를 timestamp 시점으로 예측"""
+        dt = 0.0 if self._last_time is None else max(0.0, timestamp - self._last_time)
+        self._last_time = timestamp
+        if dt == 0.0 or len(self._ids) == 0:
+            return
+
+        transition = np.eye(_STATE_DIM)
+        transition[:_MEASURE_DIM, _MEASURE_DIM:] = np.eye(_MEASURE_DIM) * dt
+        self._mean = self._mean @ transition.T
+
+        # 박스 크기에 비례하는 잡음 (멀리 있는 작은 물체는 작게 움직임)
+        height = np.maximum(self._mean[:, 3], 1.0)
+        position_std = self.position_noise * height
+        velocity_std = self.velocity_noise * height
+        process_noise = np.zeros((len(self._ids), _STATE_DIM))
+        process_noise[:, :_MEASURE_DIM] = (position_std ** 2 * dt)[:, None]
+        process_noise[:, _MEASURE_DIM:] = (velocity_std ** 2 * dt)[:, None]
+
+        self._cov = transition @ self._cov @ transition.T
+        self._cov[:, np.arange(_STATE_DIM), np.arange(_STATE_DIM)] += process_noise
+
+    def _correct(self, track_idx, boxes):
+        """연결된 트랙 상태를 감지 박스로 보정"""
+        measurement = _xyxy_to_xywh(boxes.astype(np.float64))
+        mean = self._mean[track_idx]
+        cov = self._cov[track_idx]
+
+        measure_std = self.position_noise * np.maximum(mean[:, 3], 1.0)
+        innovation_cov = cov[:, :_MEASURE_DIM, :_MEASURE_DIM].copy()
+        innovation_cov[:, np.arange(_MEASURE_DIM), np.arange(_MEASURE_DIM)] += (measure_std ** 2)[:, None]
+
+        gain = cov[:, :, :_MEASURE_DIM] @ np.linalg.inv(innovation_cov)
+        residual = measurement - mean[:, :_MEASURE_DIM]
+        self._mean[track_idx] = mean + (gain @ residual[:, :, None])[:, :, 0]
+        self._cov[track_idx] = cov - gain @ cov[:, :_MEASURE_DIM, :]
+
+    def _predicted_boxes(self):
+        return _xywh_to_xyxy(self._mean[:, :_MEASURE_DIM])
+
+    # ---------------- 연결 ----------------
+
+    def _match(self, track_idx, det_idx, track_boxes, boxes, class_ids, threshold):
+        """같은 클래스끼리만 IoU로 연결"""
+        if track_idx.size == 0 or det_idx.size == 0:
+            return np.zeros((0,), dtype=np.int64), np.zeros((0,), dtype=np.int64)
+        iou = iou_matrix(track_boxes[track_idx], boxes[det_idx])
+        iou[self._class_ids[track_idx][:, None] != class_ids[det_idx][None, :]] = 0.0
+        rows, cols = greedy_match(iou, threshold)
+        return track_idx[rows], det_idx[cols]
+
+    def update(self, detections, timestamp=None):
+        """
+        감지 결과로 트랙 갱신
+
+        Args:
+            detections: Detections (boxes, scores, class_ids)
+            timestamp: 프레임 시각 (기본값: time.time())
+
+        Returns:
+            Tracks: 확정된 트랙 (이번 프레임에서 연결된 것)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        started = time.perf_counter()
+        boxes, scores, class_ids = detections
+        scores = np.asarray(scores, dtype=np.float32)
+        class_ids = np.asarray(class_ids, dtype=np.int32)
+
+        with self._lock:
+            self._predict_to(timestamp)
+            track_boxes = self._predicted_boxes()
+            all_tracks = np.arange(len(self._ids))
+            high = np.flatnonzero(scores >= self.high_threshold)
+            low = np.flatnonzero((scores >= self.low_threshold) & (scores < self.high_threshold))
+
+            # 1차: 신뢰도 높은 감지 ↔ 모든 트랙 (잠깐 놓친 트랙 포함)
+            matched_tracks, matched_dets = self._match(all_tracks, high, track_boxes, boxes, class_ids,
+                                                       self.match_iou)
+            # 2차: 신뢰도 낮은 감지 ↔ 직전에 연결되어 있던 남은 트랙
+            remaining = all_tracks[self._active & ~np.isin(all_tracks, matched_tracks)]
+            low_tracks, low_dets = self._match(remaining, low, track_boxes, boxes, class_ids, self.low_match_iou)
+            matched_tracks = np.concatenate((matched_tracks, low_tracks))
+            matched_dets = np.concatenate((matched_dets, low_dets))
+
+            if matched_tracks.size:
+                self._correct(matched_tracks, boxes[matched_dets])
+                self._scores[matched_tracks] = scores[matched_dets]
+                self._hits[matched_tracks] += 1
+                self._last_seen[matched_tracks] = timestamp
+            self._active[:] = False
+            self._active[matched_tracks] = True
+
+            # 연결되지 않은 트랙 정리: 확정 전 트랙은 바로, 확정된 트랙은 track_buffer 후 삭제
+            confirmed = self._hits >= self.min_hits
+            keep = self._active | (confirmed & (timestamp - self._last_seen <= self.track_buffer))
+            if not keep.all():
+                self._select(keep)
+
+            # 연결되지 않은 신뢰도 높은 감지로 새 트랙 생성
+            new_dets = high[~np.isin(high, matched_dets)]
+            new_dets = new_dets[scores[new_dets] >= self.new_track_threshold]
+            if new_dets.size:
+                self._add(boxes[new_dets], scores[new_dets], class_ids[new_dets], timestamp)
+
+            result = self._output(self._active & (self._hits >= self.min_hits))
+            self.updates += 1
+            self._update_time_total += time.perf_counter() - started
+        return result
+
+    def predict(self, timestamp=None):
+        """
+        감지 없이 트랙 위치만 예측 (감지를 건너뛴 프레임용)
+
+        트랙 유지/삭제는 다음 update()에서 판단합니다.
+
+        Args:
+            timestamp: 프레임 시각 (기본값: time.time())
+
+        Returns:
+            Tracks: 직전 감지 프레임에서 확정되어 있던 트랙의 예측 위치
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._predict_to(timestamp)
+            self.predictions += 1
+            return self._output(self._active & (self._hits >= self.min_hits))
+
+    def _add(self, boxes, scores, class_ids, timestamp):
+        """새 트랙 추가 (속도 0에서 시작)"""
+        count = len(boxes)
+        mean = np.zeros((count, _STATE_DIM))
+        mean[:, :_MEASURE_DIM] = _xyxy_to_xywh(boxes.astype(np.float64))
+        height = np.maximum(mean[:, 3], 1.0)
+        cov = np.zeros((count, _STATE_DIM, _STATE_DIM))
+        diag = np.arange(_STATE_DIM)
+        cov[:, diag[:_MEASURE_DIM], diag[:_MEASURE_DIM]] = ((2 * self.position_noise * height) ** 2)[:, None]
+        cov[:, diag[_MEASURE_DIM:], diag[_MEASURE_DIM:]] = ((10 * self.velocity_noise * height) ** 2)[:, None]
+
+        ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        self._next_id += count
+        self.tracks_created += count
+
+        self._mean = np.concatenate((self._mean, mean))
+        self._cov = np.concatenate((self._cov, cov))
+        self._ids = np.concatenate((self._ids, ids))
+        self._class_ids = np.concatenate((self._class_ids, class_ids))
+        self._scores = np.concatenate((self._scores, scores))
+        self._hits = np.concatenate((self._hits, np.ones(count, dtype=np.int32)))
+        self._first_seen = np.concatenate((self._first_seen, np.full(count, timestamp)))
+        self._last_seen = np.concatenate((self._last_seen, np.full(count, timestamp)))
+        self._active = np.concatenate((self._active, np.ones(count, dtype=bool)))
+
+    def _select(self, mask):
+        """mask에 해당하는 트랙만 남김"""
+        self._mean = self._mean[mask]
+        self._cov = self._cov[mask]
+        self._ids = self._ids[mask]
+        self._class_ids = self._class_ids[mask]
+        self._scores = self._scores[mask]
+        self._hits = self._hits[mask]
+        self._first_seen = self._first_seen[mask]
+        self._last_seen = self._last_seen[mask]
+        self._active = self._active[mask]
+
+    def _output(self, mask):
+        return Tracks(
+            self._predicted_boxes()[mask].astype(np.float32),
+            self._scores[mask].copy(),
+            self._class_ids[mask].copy(),
+            self._ids[mask].copy(),
+            self._last_seen[mask] - self._first_seen[mask],
+        )
+
+    def reset(self):
+        """모든 트랙 삭제"""
+        with self._lock:
+            self._reset_arrays()
+            self._last_time = None
+
+    def stats(self):
+        """트랙 수 및 감지/예측 프레임 수"""
+        with self._lock:
+            return {
+                'tracks': len(self._ids),
+                'active_tracks': int(np.count_nonzero(self._active & (self._hits >= self.min_hits))),
+                'tracks_created': self.tracks_created,
+                'updates': self.updates,
+                'predictions': self.predictions,
+                'avg_update_ms': round(self._update_time_total / self.updates * 1000, 3) if self.updates else 0.0,
+            }
@@ -0,0 +1,179 @@
+"""
+ONNX Runtime 세션 생성/실행 도우미
+라즈베리파이 CPU에 맞춘 세션 옵션과 시작 시간 단축, 프레임마다 출력 메모리를 새로 만들지 않는 실행을 제공합니다.
+
+- 스레드 수: intra-op는 CPU 코어 수, inter-op는 1 (YOLO 그래프는 순차 실행이 유리)
+- 그래프 최적화: ORT_ENABLE_ALL, 최적화된 모델을 캐시 디렉토리에 저장해 다음 실행부터 최적화 과정을 건너뜀
+  (캐시 키에 원본 모델 크기/수정 시각, ONNX Runtime 버전, CPU 종류를 넣어 바뀌면 다시 만듦)
+- IOBinding: 입력은 복사 없이 바인딩하고 출력은 배치 크기별로 미리 할당한 배열에 바로 기록
+- 워밍업: 첫 실제 프레임이 메모리 할당/커널 선택 비용을 떠안지 않도록 미리 몇 번 실행
+
+사용 예:
+    session = create_session('final_detection416.onnx')
+    runner = IoBindingRunner(session)
+    runner.warmup()
+    output = runner.run(input_tensor)  # 다음 run() 호출 시 덮어쓰여짐
+"""
+
+import hashlib
+import os
+import platform
+import time
+
+import numpy as np
+
+# 최적화된 모델 캐시 디렉토리 (None이면 캐시 사용 안 함)
+DEFAULT_CACHE_DIR = '.onnx_cache'
+
+
+def _cache_path(model_path, cache_dir, ort_version):
+    """원본 모델/런타임/CPU 조합별 최적화 모델 경로"""
+    stat = os.stat(model_path)
+    key = f'{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}:{ort_version}:{platform.machine()}'
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(cache_dir, f'{name}.{digest}.opt.onnx')
+
+
+def create_session(model_path, providers=None, intra_op_threads=None, inter_op_threads=1,
+                   cache_dir=DEFAULT_CACHE_DIR):
+    """
+    튜닝된 ONNX Runtime 세션 생성
+
+    Args:
+        model_path: ONNX 모델 경로
+        providers: 실행 프로바이더 목록 (기본값: CPU)
+        intra_op_threads: 연산 내부 스레드 수 (기본값: CPU 코어 수)
+        inter_op_threads: 연산 간 병렬 스레드 수
+        cache_dir: 최적화된 모델 캐시 디렉토리 (None이면 매번 최적화)
+
+    Returns:
+        onnxruntime.InferenceSession: 생성된 세션 (session_info 속성에 생성 정보)
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads or os.cpu_count() or 1
+    options.inter_op_num_threads = inter_op_threads
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    load_path = model_path
+    cache_hit = False
+    tmp_path = None
+    if cache_dir:
+        cached_path = _cache_path(model_path, cache_dir, ort.__version__)
+        if os.path.exists(cached_path):
+            # 이미 최적화된 모델은 다시 최적화하지 않음
+            load_path = cached_path
+            cache_hit = True
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f'{cached_path}.{os.getpid()}.tmp'
+            options.optimized_model_filepath = tmp_path
+
+    started = time.perf_counter()
+    try:
+        session = ort.InferenceSession(load_path, sess_options=options,
+                                       providers=providers or ['CPUExecutionProvider'])
+    except Exception:
+        if not cache_hit:
+            raise
+        # 캐시 파일이 손상된 경우 원본으로 다시 생성
+        print(f"⚠️  Optimized model cache unusable, rebuilding: {load_path}")
+        os.remove(load_path)
+        return create_session(model_path, providers, intra_op_threads, inter_op_threads, cache_dir)
+    load_time = time.perf_counter() - started
+
+    if tmp_path and os.path.exists(tmp_path):
+        os.replace(tmp_path, cached_path)
+
+    session.session_info = {
+        'model_path': model_path,
+        'loaded_from': load_path,
+        'cache_hit': cache_hit,
+        'load_ms': round(load_time * 1000, 1),
+        'intra_op_threads': options.intra_op_num_threads,
+        'inter_op_threads': options.inter_op_num_threads,
+    }
+    return session
+
+
+class IoBindingRunner:
+    """IOBinding 기반 단일 입력/출력 실행기 (출력 배열 재사용)"""
+
+    def __init__(self, session, input_name=None, output_name=None):
+        """
+        Args:
+            session: onnxruntime.InferenceSession
+            input_name: 입력 이름 (기본값: 첫 번째 입력)
+            output_name: 출력 이름 (기본값: 첫 번째 출력)
+        """
+        import onnxruntime as ort
+
+        self._ort = ort
+        self.session = session
+        self.input_name = input_name or session.get_inputs()[0].name
+        self.output_name = output_name or session.get_outputs()[0].name
+        self._bindings = {}  # 배치 크기 -> (IOBinding, 출력 배열)
+
+    def _binding_for(self, tensor):
+        """입력 배치 크기에 맞는 바인딩 (처음이면 출력 크기를 확인해서 출력 배열 할당)"""
+        batch_size = tensor.shape[0]
+        cached = self._bindings.get(batch_size)
+        if cached is not None:
+            return cached
+
+        # 출력 크기를 모르면(동적 차원) 한 번 실행해서 확인
+        probe = self.session.io_binding()
+        probe.bind_cpu_input(self.input_name, tensor)
+        probe.bind_output(self.output_name, 'cpu')
+        self.session.run_with_iobinding(probe)
+        sample = probe.copy_outputs_to_cpu()[0]
+
+        output = np.empty(sample.shape, dtype=sample.dtype)
+        binding = self.session.io_binding()
+        binding.bind_ortvalue_output(self.output_name, self._ort.OrtValue.ortvalue_from_numpy(output))
+        self._bindings[batch_size] = (binding, output)
+        return binding, output
+
+    def run(self, tensor):
+        """
+        추론 실행
+
+        Args:
+            tensor: 입력 배열 (C 연속 배열, 복사 없이 바인딩)
+
+        Returns:
+            np.ndarray: 출력 배열 (내부 버퍼, 같은 배치 크기로 다음 run() 호출 시 덮어쓰여짐)
+        """
+        tensor = np.ascontiguousarray(tensor)
+        binding, output = self._binding_for(tensor)
+        binding.bind_cpu_input(self.input_name, tensor)
+        self.session.run_with_iobinding(binding)
+        return output
+
+    def warmup(self, input_shape=None, runs=3, dtype=np.float32):
+        """
+        빈 입력으로 미리 실행 (메모리 할당/커널 준비)
+
+        Args:
+            input_shape: 입력 크기 (기본값: 모델 입력 크기, 동적 차원은 (1, 3, 640, 640) 기준)
+            runs: 실행 횟수
+            dtype: 입력 자료형
+
+        Returns:
+            float: 마지막 실행 시간 (ms)
+        """
+        if input_shape is None:
+            input_shape = [dim if isinstance(dim, int) else default
+                           for dim, default in zip(self.session.get_inputs()[0].shape, (1, 3, 640, 640))]
+        dummy = np.zeros(input_shape, dtype=dtype)
+
+        elapsed = 0.0
+        for _ in range(runs):
+            started = time.perf_counter()
+            self.run(dummy)
+            elapsed = time.perf_counter() - started
+        return round(elapsed * 1000, 2)
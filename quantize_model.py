@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+INT8 양자화 도구
+녹화된 프레임으로 보정(calibration)해서 ONNX Runtime 정적 양자화 모델(INT8)을 만들고,
+FP32 모델과 클래스별 정밀도/재현율 및 프레임당 지연 시간을 비교한 보고서를 씁니다.
+
+보정/평가 프레임은 실제 감지 스크립트와 같은 레터박스 전처리(LetterboxPreprocessor)를 거칩니다.
+raspberry_pi_onnx_detection.py처럼 swap_rb=True로 실행하는 모델은 --swap-rb를 함께 지정하세요.
+
+평가 정답:
+    --eval 폴더에 YOLO 형식 라벨(images/x.jpg ↔ labels/x.txt, "class cx cy w h" 정규화 좌표)이 있으면 라벨 기준,
+    없으면 FP32 모델의 감지 결과를 기준으로 INT8 모델이 얼마나 일치하는지 계산합니다.
+
+검출 헤드의 박스 좌표(0~640)와 클래스 점수(0~1)는 한 텐서로 합쳐지므로 INT8로 양자화하면 정확도가 크게 떨어집니다.
+그래서 기본적으로 마지막 Conv 이후의 디코딩 노드는 FP32로 남깁니다 (--quantize-head로 해제).
+
+사용 방법 (개발 PC에서 실행, onnx 패키지 필요):
+    python3 quantize_model.py final_detection640.onnx final_detection416.onnx \\
+        --calib detection_events/ --eval eval_set/ --report quantization_report.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from detection_preprocess import LetterboxPreprocessor
+from detector_engine import DEFAULT_LABELS, DetectorEngine, OnnxRuntimeBackend
+from frame_sources import iter_frames
+from object_tracker import greedy_match, iou_matrix
+
+
+class FrameCalibrationReader:
+    """녹화 프레임을 레터박스 전처리해서 양자화 보정 입력으로 제공"""
+
+    def __init__(self, frames, input_name, input_width, input_height, swap_rb=False):
+        """
+        Args:
+            frames: BGR 프레임 목록
+            input_name: 모델 입력 이름
+            input_width: 모델 입력 너비
+            input_height: 모델 입력 높이
+            swap_rb: True면 BGR 프레임을 RGB로 바꿔서 입력 (감지 스크립트 설정과 같게)
+        """
+        self.frames = frames
+        self.input_name = input_name
+        self.preprocessor = LetterboxPreprocessor(input_width, input_height, swap_rb=swap_rb)
+        self._index = 0
+
+    def get_next(self):
+        """다음 보정 입력 (onnxruntime CalibrationDataReader 인터페이스)"""
+        if self._index >= len(self.frames):
+            return None
+        tensor = self.preprocessor(self.frames[self._index])
+        self._index += 1
+        # 보정기가 입력을 보관할 수 있으므로 재사용 버퍼를 복사해서 전달
+        return {self.input_name: tensor.copy()}
+
+    def rewind(self):
+        self._index = 0
+
+
+def _model_input(model_path):
+    """모델 입력 이름과 (너비, 높이) (동적 크기면 None)"""
+    import onnx
+
+    model = onnx.load(model_path, load_external_data=False)
+    model_input = model.graph.input[0]
+    dims = [dim.dim_value or None for dim in model_input.type.tensor_type.shape.dim]
+    return model_input.name, dims[3], dims[2]
+
+
+def _head_nodes(model_path):
+    """마지막 Conv 이후의 노드 이름 (검출 헤드 디코딩 부분)"""
+    import onnx
+
+    nodes = onnx.load(model_path, load_external_data=False).graph.node
+    last_conv = max((i for i, node in enumerate(nodes) if node.op_type == 'Conv'), default=len(nodes) - 1)
+    return [node.name for node in nodes[last_conv + 1:] if node.name]
+
+
+def quantize(model_path, output_path, calibration_frames, swap_rb=False, input_size=None,
+             per_channel=True, calibrate_method='minmax', quantize_head=False):
+    """
+    정적 INT8 양자화 (QDQ 형식, 가중치 INT8 / 활성값 UINT8)
+
+    Args:
+        model_path: FP32 ONNX 모델 경로
+        output_path: INT8 모델 저장 경로
+        calibration_frames: 보정용 BGR 프레임 목록
+        swap_rb: 보정 입력을 RGB로 변환할지 여부
+        input_size: 동적 크기 모델의 입력 크기 (너비, 높이)
+        per_channel: 채널별 가중치 양자화 여부
+        calibrate_method: 'minmax', 'entropy', 'percentile'
+        quantize_head: True면 검출 헤드 디코딩 노드도 양자화
+
+    Returns:
+        dict: 양자화 정보 (소요 시간, 제외한 노드 수)
+    """
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    input_name, width, height = _model_input(model_path)
+    width = width or (input_size[0] if input_size else 640)
+    height = height or (input_size[1] if input_size else 640)
+
+    started = time.time()
+    # 형태 추론 + 그래프 정리 후 양자화 (권장 전처리, 내보낸 YOLO 모델은 고정 크기라 기호 형태 추론은 생략)
+    prepared_path = output_path + '.prep.onnx'
+    quant_pre_process(model_path, prepared_path, skip_symbolic_shape=True)
+
+    excluded = [] if quantize_head else _head_nodes(prepared_path)
+    methods = {
+        'minmax': CalibrationMethod.MinMax,
+        'entropy': CalibrationMethod.Entropy,
+        'percentile': CalibrationMethod.Percentile,
+    }
+    try:
+        quantize_static(
+            prepared_path, output_path,
+            FrameCalibrationReader(calibration_frames, input_name, width, height, swap_rb=swap_rb),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            nodes_to_exclude=excluded,
+            calibrate_method=methods[calibrate_method],
+        )
+    finally:
+        if os.path.exists(prepared_path):
+            os.remove(prepared_path)
+
+    return {
+        'quantize_s': round(time.time() - started, 1),
+        'calibration_frames': len(calibration_frames),
+        'excluded_nodes': len(excluded),
+    }
+
+
+def load_labels(image_path, width, height):
+    """
+    YOLO 형식 라벨 읽기 (images/x.jpg → labels/x.txt, 없으면 같은 폴더의 x.txt)
+
+    Returns:
+        tuple: (boxes (N, 4) 원본 좌표 xyxy, class_ids (N,)) - 라벨 파일이 없으면 None
+    """
+    stem = os.path.splitext(image_path)[0]
+    candidates = [stem + '.txt']
+    parts = stem.split(os.sep)
+    if 'images' in parts:
+        index = len(parts) - 1 - parts[::-1].index('images')
+        candidates.insert(0, os.sep.join(parts[:index] + ['labels'] + parts[index + 1:]) + '.txt')
+
+    for label_path in candidates:
+        if not os.path.exists(label_path):
+            continue
+        rows = np.loadtxt(label_path, ndmin=2, dtype=np.float32)
+        if rows.size == 0:
+            return np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.int32)
+        cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+        boxes = np.stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2), axis=1)
+        return boxes, rows[:, 0].astype(np.int32)
+    return None
+
+
+class ClassMatchCounter:
+    """클래스별 TP/FP/FN 누적 (IoU 기준 1:1 매칭)"""
+
+    def __init__(self, labels, iou_threshold=0.5):
+        self.labels = labels
+        self.iou_threshold = iou_threshold
+        self.tp = np.zeros(len(labels), dtype=np.int64)
+        self.fp = np.zeros(len(labels), dtype=np.int64)
+        self.fn = np.zeros(len(labels), dtype=np.int64)
+
+    def add(self, pred_boxes, pred_classes, true_boxes, true_classes):
+        for class_id in range(len(self.labels)):
+            pred = pred_boxes[pred_classes == class_id]
+            true = true_boxes[true_classes == class_id]
+            matched = 0
+            if len(pred) and len(true):
+                matched = len(greedy_match(iou_matrix(pred, true), self.iou_threshold)[0])
+            self.tp[class_id] += matched
+            self.fp[class_id] += len(pred) - matched
+            self.fn[class_id] += len(true) - matched
+
+    def summary(self):
+        result = {}
+        for class_id, label in enumerate(self.labels):
+            tp, fp, fn = int(self.tp[class_id]), int(self.fp[class_id]), int(self.fn[class_id])
+            result[label] = {
+                'precision': round(tp / (tp + fp), 3) if tp + fp else None,
+                'recall': round(tp / (tp + fn), 3) if tp + fn else None,
+                'tp': tp,
+                'fp': fp,
+                'fn': fn,
+            }
+        return result
+
+
+def _latency_summary(values):
+    """지연 시간 목록(ms)의 평균/백분위수"""
+    if not values:
+        return {}
+    values = np.asarray(values)
+    return {
+        'mean': round(float(values.mean()), 2),
+        'p50': round(float(np.percentile(values, 50)), 2),
+        'p90': round(float(np.percentile(values, 90)), 2),
+        'p99': round(float(np.percentile(values, 99)), 2),
+    }
+
+
+def run_model(model_path, frames, labels, swap_rb, conf_threshold, nms_threshold, threads):
+    """모델로 평가 프레임 전체 감지 (프레임별 감지 결과와 지연 시간)"""
+    engine = DetectorEngine(
+        OnnxRuntimeBackend(model_path, swap_rb=swap_rb, intra_op_threads=threads, cache_dir=None),
+        labels, conf_threshold, nms_threshold
+    )
+    detections = []
+    total_ms = []
+    inference_ms = []
+    for frame in frames:
+        started = time.perf_counter()
+        result = engine.detect(frame)[0]
+        total_ms.append((time.perf_counter() - started) * 1000)
+        inference_ms.append(engine.last_timings['inference'] * 1000)
+        detections.append(result)
+    return detections, {
+        'model': model_path,
+        'size_mb': round(os.path.getsize(model_path) / 1024 / 1024, 2),
+        'frame_ms': _latency_summary(total_ms),
+        'inference_ms': _latency_summary(inference_ms),
+        'fps': round(1000 / np.mean(total_ms), 1) if total_ms else 0.0,
+    }
+
+
+def evaluate(model_paths, eval_items, labels, swap_rb, conf_threshold, nms_threshold, iou_threshold, threads):
+    """
+    모델별 정밀도/재현율 및 지연 시간 비교
+
+    Args:
+        model_paths: [FP32 모델, 비교할 모델...] (라벨이 없으면 첫 번째 모델이 기준)
+        eval_items: [(이름, 프레임)] 목록
+
+    Returns:
+        dict: 보고서
+    """
+    names = [name for name, _ in eval_items]
+    frames = [frame for _, frame in eval_items]
+    truths = [load_labels(name, frame.shape[1], frame.shape[0]) for name, frame in eval_items]
+    has_labels = all(truth is not None for truth in truths) and len(truths) > 0
+
+    results = []
+    reference = None
+    for model_path in model_paths:
+        detections, info = run_model(model_path, frames, labels, swap_rb, conf_threshold, nms_threshold, threads)
+        if not has_labels and reference is None:
+            # 라벨이 없으면 첫 번째(FP32) 모델 결과를 정답으로 사용
+            reference = [(d.boxes, d.class_ids) for d in detections]
+        counter = ClassMatchCounter(labels, iou_threshold)
+        for index, result in enumerate(detections):
+            true_boxes, true_classes = truths[index] if has_labels else reference[index]
+            counter.add(result.boxes, result.class_ids, true_boxes, true_classes)
+        info['per_class'] = counter.summary()
+        results.append(info)
+
+    return {
+        'reference': 'labels' if has_labels else model_paths[0],
+        'frames': len(names),
+        'iou_threshold': iou_threshold,
+        'conf_threshold': conf_threshold,
+        'models': results,
+    }
+
+
+def print_report(report):
+    """보고서 표 출력"""
+    print(f"\n📊 기준: {report['reference']} ({report['frames']} frames, IoU ≥ {report['iou_threshold']})")
+    for info in report['models']:
+        print(f"\n{info['model']} ({info['size_mb']} MB) - "
+              f"frame p50 {info['frame_ms'].get('p50')} ms / p90 {info['frame_ms'].get('p90')} ms, "
+              f"inference p50 {info['inference_ms'].get('p50')} ms, {info['fps']} FPS")
+        for label, stats in info['per_class'].items():
+            print(f"   {label:<10} P={stats['precision']}  R={stats['recall']}  "
+                  f"(TP {stats['tp']}, FP {stats['fp']}, FN {stats['fn']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='INT8 정적 양자화 및 정확도/지연 시간 비교')
+    parser.add_argument('models', nargs='+', help='FP32 ONNX 모델')
+    parser.add_argument('--calib', nargs='+', required=True, help='보정용 이미지/영상 (파일 또는 폴더)')
+    parser.add_argument('--calib-frames', type=int, default=200, help='보정 프레임 수')
+    parser.add_argument('--calib-stride', type=int, default=10, help='영상에서 N프레임마다 1장 사용')
+    parser.add_argument('--eval', nargs='+', help='평가용 이미지/영상 (기본값: 보정 데이터)')
+    parser.add_argument('--eval-frames', type=int, default=300, help='평가 프레임 수')
+    parser.add_argument('--swap-rb', action='store_true', help='BGR → RGB 변환 (raspberry_pi_onnx_detection.py 모델)')
+    parser.add_argument('--method', choices=['minmax', 'entropy', 'percentile'], default='minmax',
+                        help='보정 방법')
+    parser.add_argument('--no-per-channel', action='store_true', help='채널별 가중치 양자화 끄기')
+    parser.add_argument('--quantize-head', action='store_true', help='검출 헤드 디코딩 노드도 양자화')
+    parser.add_argument('--conf', type=float, default=0.4, help='신뢰도 임계값')
+    parser.add_argument('--nms', type=float, default=0.4, help='NMS IoU 임계값')
+    parser.add_argument('--iou', type=float, default=0.5, help='정답 매칭 IoU 임계값')
+    parser.add_argument('--threads', type=int, default=None, help='추론 스레드 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--report', default='quantization_report.json', help='보고서 저장 경로')
+    args = parser.parse_args()
+
+    calibration_frames = [frame for _, frame in iter_frames(args.calib, args.calib_stride, args.calib_frames)]
+    if not calibration_frames:
+        parser.error('보정 프레임이 없습니다')
+    eval_items = list(iter_frames(args.eval or args.calib, args.calib_stride, args.eval_frames))
+    print(f"보정 프레임 {len(calibration_frames)}장, 평가 프레임 {len(eval_items)}장")
+
+    reports = []
+    for model_path in args.models:
+        output_path = os.path.splitext(model_path)[0] + '.int8.onnx'
+        print(f"\n🔧 Quantizing {model_path} → {output_path}")
+        info = quantize(model_path, output_path, calibration_frames, swap_rb=args.swap_rb,
+                        per_channel=not args.no_per_channel, calibrate_method=args.method,
+                        quantize_head=args.quantize_head)
+        print(f"✅ {info}")
+
+        report = evaluate([model_path, output_path], eval_items, DEFAULT_LABELS, args.swap_rb,
+                          args.conf, args.nms, args.iou, args.threads)
+        report['quantization'] = info
+        print_report(report)
+        reports.append(report)
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, indent=2, ensure_ascii=False)
+    print(f"\n📝 Report saved: {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,10 @@ import numpy as np
 from datetime import datetime
 import time
 import io
+from concurrent.futures import ThreadPoolExecutor
+from event_uploader import EventUploader
+from event_outbox import EventOutbox, FirestoreOutboxSink, make_firestore_record
+from firestore_bulk_writer import FirestoreBulkWriter
 
 class SmokingDetectionClient:
     def __init__(self, service_account_path='firebase-service-account.json'):
@@ -32,9 +36,95 @@ class SmokingDetectionClient:
 
         self.db = firestore.client()
         self.bucket = storage.bucket()
+        # 동시에 들어오는 이벤트 쓰기를 WriteBatch로 병합
+        self.bulk_writer = FirestoreBulkWriter(self.db)
+        # 커밋 완료 콜백은 일괄 쓰기 스레드에서 실행되므로 푸시 알림은 별도 스레드에서 전송
+        self.notifier = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fcm-notifier')
+        self.uploader = None
+        self.outbox = None
 
         print("Firebase 클라이언트 초기화 완료")
 
+    def enable_outbox(self, path='outbox.db', max_bytes=200 * 1024 * 1024, drain_interval=30.0):
+        """
+        오프라인 아웃박스 활성화
+
+        전송에 실패한 이벤트를 디스크에 보관하고, 연결이 돌아오면 배치로 다시 전송합니다.
+
+        Args:
+            path: SQLite 파일 경로
+            max_bytes: 아웃박스 최대 용량
+            drain_interval: 재전송 시도 주기 (초)
+        """
+        if self.outbox is None:
+            self.outbox = EventOutbox(path, max_bytes=max_bytes)
+            self.outbox.start_drainer(
+                FirestoreOutboxSink(self.db, self.bucket, notify=self._notify_from_outbox),
+                kind='firestore',
+                interval=drain_interval
+            )
+            pending = self.outbox.stats()['pending']
+            if pending:
+                print(f"📦 아웃박스에 미전송 이벤트 {pending}건이 있습니다")
+        return self.outbox
+
+    def start_async_uploader(self, max_queue=50, workers=2, max_retries=3):
+        """
+        백그라운드 업로더 시작 (send_detection_async 사용 전 호출)
+
+        Args:
+            max_queue: 대기열 최대 크기
+            workers: 워커 스레드 수
+            max_retries: 실패 시 재시도 횟수
+        """
+        if self.uploader is None:
+            self.uploader = EventUploader(
+                self._write_detection,
+                max_queue=max_queue,
+                workers=workers,
+                max_retries=max_retries,
+                on_failure=self._on_upload_failure
+            )
+        return self.uploader
+
+    def _on_upload_failure(self, event, error):
+        """재시도를 모두 실패한 이벤트를 아웃박스에 보관"""
+        self._save_to_outbox(**event)
+
+    def stop_async_uploader(self, timeout=10.0):
+        """남은 이벤트를 전송한 뒤 백그라운드 업로더 종료"""
+        if self.uploader is not None:
+            self.uploader.stop(timeout)
+            self.uploader = None
+
+    def send_detection_async(self, camera_id, location, detected_objects, confidence, image=None, send_notification=True):
+        """
+        감지 결과를 백그라운드 업로더 대기열에 추가 (즉시 반환)
+
+        인자는 send_detection()과 같습니다. image 배열은 전송이 끝날 때까지 수정하면 안 됩니다.
+
+        Returns:
+            str: 미리 할당된 이벤트 ID 또는 None (대기열이 가득 찬 경우)
+        """
+        if self.uploader is None:
+            self.start_async_uploader()
+
+        # 문서 ID는 로컬에서 생성되므로 네트워크 없이 바로 반환 가능 (재시도 시에도 같은 문서에 기록)
+        event_id = self.db.collection('events').document().id
+        accepted = self.uploader.submit(
+            event_id=event_id,
+            camera_id=camera_id,
+            location=location,
+            detected_objects=detected_objects,
+            confidence=confidence,
+            image=image,
+            send_notification=send_notification
+        )
+        if not accepted:
+            print(f"⚠️  업로드 대기열이 가득 차서 이벤트를 버립니다 (카메라 {camera_id})")
+            return None
+        return event_id
+
     def send_detection(self, camera_id, location, detected_objects, confidence, image=None, send_notification=True):
         """
         감지 결과를 Firebase에 전송 및 푸시 알림 전송
@@ -48,20 +138,41 @@ class SmokingDetectionClient:
             send_notification: 푸시 알림 전송 여부 (기본값: True)
 
         Returns:
-            str: 생성된 이벤트 ID 또는 None
+            str: 생성된 이벤트 ID 또는 None (커밋은 일괄 쓰기에서 진행, 실패하면 아웃박스에 보관)
         """
         try:
-            # Firestore에 이벤트 문서 생성
-            doc_ref = self.db.collection('events').document()
-            event_id = doc_ref.id
+            return self._write_detection(
+                None, camera_id, location, detected_objects, confidence, image, send_notification,
+                require_image=False
+            ).document_id
 
-            # 이미지 업로드 (있으면)
-            image_url = None
+        except Exception as e:
+            print(f"❌ 감지 이벤트 전송 실패: {e}")
+            self._save_to_outbox(None, camera_id, location, detected_objects, confidence, image, send_notification)
+            return None
+
+    def _save_to_outbox(self, event_id, camera_id, location, detected_objects, confidence, image=None,
+                        send_notification=True):
+        """
+        전송 실패한 이벤트를 아웃박스에 보관 (아웃박스가 꺼져 있으면 아무것도 하지 않음)
+
+        Returns:
+            int: 아웃박스 항목 ID 또는 None
+        """
+        if self.outbox is None:
+            return None
+
+        try:
+            if event_id is None:
+                event_id = self.db.collection('events').document().id
+
+            image_bytes = None
             if image is not None:
-                image_url = self._upload_image(event_id, image)
+                ret, buffer = cv2.imencode('.jpg', image)
+                if ret:
+                    image_bytes = buffer.tobytes()
 
-            # 이벤트 데이터
-            event_data = {
+            record = make_firestore_record('events', {
                 'camera_id': camera_id,
                 'location': location,
                 'detected_objects': detected_objects,
@@ -69,29 +180,130 @@ class SmokingDetectionClient:
                 'timestamp': firestore.SERVER_TIMESTAMP,
                 'created_at': firestore.SERVER_TIMESTAMP,
                 'status': 'pending',
-            }
+            }, document_id=event_id, image_path=f'detection_images/{event_id}.jpg',
+                send_notification=send_notification)
 
-            if image_url:
-                event_data['image_url'] = image_url
+            item_id = self.outbox.put('firestore', record, image_bytes)
+            print(f"📦 아웃박스에 보관: {event_id}")
+            return item_id
 
-            # Firestore에 저장
-            doc_ref.set(event_data)
+        except Exception as e:
+            print(f"❌ 아웃박스 보관 실패: {e}")
+            return None
+
+    def _write_detection(self, event_id, camera_id, location, detected_objects, confidence, image=None,
+                         send_notification=True, require_image=True):
+        """
+        감지 이벤트 전송 (이미지 업로드 실패 시 예외 발생)
 
-            print(f"✅ 감지 이벤트 전송 성공: {event_id}")
-            print(f"   위치: {location}")
-            print(f"   감지 객체: {detected_objects}")
-            print(f"   신뢰도: {confidence:.2f}")
+        문서는 일괄 쓰기 대기열에 넣고 커밋을 기다리지 않으므로 업로더 워커가 바로 다음 이벤트를
+        처리할 수 있고, 여러 이벤트가 한 번의 커밋으로 묶입니다. 커밋 결과는 완료 콜백에서 처리합니다
+        (성공 시 푸시 알림, 실패 시 아웃박스에 보관).
 
-            # 푸시 알림 전송
-            if send_notification:
-                self._send_fcm_notification(camera_id, location, event_id, image_url)
+        Args:
+            event_id: 이벤트 ID (None이면 새로 생성)
+            require_image: True면 이미지 업로드 실패도 예외로 처리 (재시도 대상)
+            나머지 인자는 send_detection()과 동일
 
-            return event_id
+        Returns:
+            Future: 커밋이 끝나면 이벤트 ID를 돌려주는 Future (document_id 속성에 이벤트 ID)
+        """
+        # Firestore에 이벤트 문서 생성
+        events = self.db.collection('events')
+        doc_ref = events.document(event_id) if event_id else events.document()
+        event_id = doc_ref.id
+
+        # 이미지 업로드 (있으면)
+        image_url = None
+        if image is not None:
+            if require_image:
+                image_url = self._store_image(event_id, image)
+            else:
+                image_url = self._upload_image(event_id, image)
+
+        # 이벤트 데이터
+        event_data = {
+            'camera_id': camera_id,
+            'location': location,
+            'detected_objects': detected_objects,
+            'confidence': confidence,
+            'timestamp': firestore.SERVER_TIMESTAMP,
+            'created_at': firestore.SERVER_TIMESTAMP,
+            'status': 'pending',
+        }
+
+        if image_url:
+            event_data['image_url'] = image_url
+
+        # Firestore에 저장 (다른 이벤트와 함께 일괄 커밋, 결과는 콜백에서 처리)
+        future = self.bulk_writer.write('events', event_data, event_id)
+        future.add_done_callback(lambda f: self._on_detection_committed(
+            f, event_id, camera_id, location, detected_objects, confidence, image, send_notification, image_url
+        ))
+        return future
+
+    def _on_detection_committed(self, future, event_id, camera_id, location, detected_objects, confidence,
+                                image, send_notification, image_url):
+        """일괄 커밋 결과 처리 (성공하면 푸시 알림, 실패하면 아웃박스에 보관)"""
+        error = future.exception()
+        if error is not None:
+            print(f"❌ 감지 이벤트 전송 실패: {error}")
+            self._save_to_outbox(event_id, camera_id, location, detected_objects, confidence, image,
+                                 send_notification)
+            return
+
+        print(f"✅ 감지 이벤트 전송 성공: {event_id}")
+        print(f"   위치: {location}")
+        print(f"   감지 객체: {detected_objects}")
+        print(f"   신뢰도: {confidence:.2f}")
+
+        # 푸시 알림 전송 (다음 커밋을 막지 않도록 알림 스레드에서)
+        if send_notification:
+            self.notifier.submit(self._send_fcm_notification, camera_id, location, event_id, image_url)
+
+    def send_detections_bulk(self, detections, timeout=30):
+        """
+        여러 감지 결과를 한 번에 전송 (WriteBatch 병합, 푸시 알림 없음)
+
+        Args:
+            detections: send_detection() 인자 딕셔너리 리스트
+                        [{'camera_id', 'location', 'detected_objects', 'confidence', 'image'(선택)}, ...]
+            timeout: 커밋 완료 최대 대기 시간 (초)
+
+        Returns:
+            list: 입력 순서대로의 이벤트 ID (실패 시 None)
+        """
+        try:
+            items = []
+            for detection in detections:
+                event_id = self.db.collection('events').document().id
+                event_data = {
+                    'camera_id': detection['camera_id'],
+                    'location': detection['location'],
+                    'detected_objects': detection['detected_objects'],
+                    'confidence': detection['confidence'],
+                    'timestamp': firestore.SERVER_TIMESTAMP,
+                    'created_at': firestore.SERVER_TIMESTAMP,
+                    'status': 'pending',
+                }
+                if detection.get('image') is not None:
+                    image_url = self._upload_image(event_id, detection['image'])
+                    if image_url:
+                        event_data['image_url'] = image_url
+                items.append((event_id, event_data))
+
+            event_ids = self.bulk_writer.write_many('events', items, timeout)
+            print(f"✅ 감지 이벤트 {len(event_ids)}건 일괄 전송 성공")
+            return event_ids
 
         except Exception as e:
-            print(f"❌ 감지 이벤트 전송 실패: {e}")
+            print(f"❌ 감지 이벤트 일괄 전송 실패: {e}")
             return None
 
+    def _notify_from_outbox(self, event_id, data):
+        """아웃박스에서 다시 전송한 이벤트의 푸시 알림 (FirestoreOutboxSink 콜백)"""
+        self._send_fcm_notification(data['camera_id'], data['location'], event_id, data.get('image_url'))
+
     def _send_fcm_notification(self, camera_id, location, event_id, image_url=None):
         """
         FCM 푸시 알림 전송
@@ -155,26 +367,32 @@ class SmokingDetectionClient:
             str: 다운로드 URL 또는 None
         """
         try:
-            # 이미지를 JPEG로 인코딩
-            _, buffer = cv2.imencode('.jpg', image)
-            image_bytes = buffer.tobytes()
-
-            # Storage에 업로드
-            blob = self.bucket.blob(f'detection_images/{event_id}.jpg')
-            blob.upload_from_string(
-                image_bytes,
-                content_type='image/jpeg'
-            )
-
-            # Public URL 생성 (선택사항)
-            blob.make_public()
-
-            return blob.public_url
+            return self._store_image(event_id, image)
 
         except Exception as e:
             print(f"❌ 이미지 업로드 실패: {e}")
             return None
 
+    def _store_image(self, event_id, image):
+        """이미지를 JPEG로 인코딩하여 Storage에 업로드 (실패 시 예외 발생)"""
+        # 이미지를 JPEG로 인코딩
+        ret, buffer = cv2.imencode('.jpg', image)
+        if not ret:
+            raise ValueError("JPEG 인코딩 실패")
+        image_bytes = buffer.tobytes()
+
+        # Storage에 업로드
+        blob = self.bucket.blob(f'detection_images/{event_id}.jpg')
+        blob.upload_from_string(
+            image_bytes,
+            content_type='image/jpeg'
+        )
+
+        # Public URL 생성 (선택사항)
+        blob.make_public()
+
+        return blob.public_url
+
     def register_device(self, device_id, device_name, location, stream_url=None):
         """
         장치 정보를 Firebase에 등록
@@ -13,6 +13,8 @@ import time
 import threading
 from smoking_detector import SmokingDetector
 from raspberry_pi_client import SmokingDetectionClient
+from motion_gate import MotionGate
+from frame_pipeline import FramePipeline
 
 class IntegratedSmokingDetectionSystem:
     """통합 흡연 감지 시스템"""
@@ -22,7 +24,8 @@ class IntegratedSmokingDetectionSystem:
         camera_id=1,
         device_id='raspberry-pi-001',
         location='본관 1층 입구',
-        firebase_service_account='firebase-service-account.json'
+        firebase_service_account='firebase-service-account.json',
+        motion_gate=True
     ):
         """
         Args:
@@ -30,6 +33,7 @@ class IntegratedSmokingDetectionSystem:
             device_id: 장치 ID
             location: 설치 위치
             firebase_service_account: Firebase 서비스 계정 JSON 파일 경로
+            motion_gate: True면 장면 변화가 없을 때 YOLO 감지를 건너뜀
         """
         print("=" * 60)
         print("통합 흡연 감지 시스템 초기화 중...")
@@ -45,11 +49,18 @@ class IntegratedSmokingDetectionSystem:
             model_path='yolov8n.pt',  # YOLOv8 Nano 모델
             confidence_threshold=0.5
         )
+        # 정지 장면에서는 감지를 건너뛰고 직전 결과를 재사용
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.last_result = None
         print("✓ YOLO 감지기 준비 완료")
 
         # Firebase 클라이언트 초기화
         print("\n[2/3] Firebase 클라이언트 초기화...")
         self.firebase_client = SmokingDetectionClient(firebase_service_account)
+        # 이벤트 전송은 백그라운드 업로더가 처리 (감지 루프는 네트워크를 기다리지 않음)
+        self.firebase_client.start_async_uploader()
+        # 전송 실패 이벤트는 디스크에 보관했다가 연결 복구 시 배치 전송
+        self.firebase_client.enable_outbox()
         print("✓ Firebase 연결 완료")
 
         # 장치 등록
@@ -77,6 +88,9 @@ class IntegratedSmokingDetectionSystem:
         self.running = False
         self.heartbeat_thread = None
 
+        # 캡처 → 감지 → 출력 파이프라인 (start()에서 생성)
+        self.pipeline = None
+
         print("\n" + "=" * 60)
         print("✅ 시스템 초기화 완료!")
         print("=" * 60)
@@ -90,12 +104,38 @@ class IntegratedSmokingDetectionSystem:
         while self.running:
             try:
                 self.firebase_client.update_device_heartbeat(self.device_id)
-                print(f"💓 하트비트 전송 (감지 횟수: {self.detection_count})")
+                upload_stats = self.firebase_client.uploader.stats()
+                print(f"💓 하트비트 전송 (감지 횟수: {self.detection_count}, "
+                      f"업로드 대기: {upload_stats['queue_depth']}, "
+                      f"평균 지연: {upload_stats['avg_latency_ms']}ms)")
+                if self.pipeline:
+                    pipeline_stats = self.pipeline.stats()
+                    print(f"   파이프라인: 캡처 {pipeline_stats['capture']['fps']} FPS, "
+                          f"감지 {pipeline_stats['infer']['fps']} FPS ({pipeline_stats['infer']['avg_ms']}ms)")
+                if self.motion_gate:
+                    gate_stats = self.motion_gate.stats()
+                    print(f"   움직임 게이트: 추론 {gate_stats['inferred']} / 생략 {gate_stats['gated']} "
+                          f"({gate_stats['gated_ratio']:.0%}), CPU 온도 {gate_stats['cpu_temp_c']}°C")
             except Exception as e:
                 print(f"⚠️  하트비트 전송 실패: {e}")
 
             time.sleep(60)  # 1분 대기
 
+    def _capture_frame(self):
+        """캡처 스레드: 프레임 읽기 (실패 시 None)"""
+        ret, frame = self.cap.read()
+        if not ret:
+            print("⚠️  프레임을 읽을 수 없습니다")
+            return None
+        return frame
+
+    def _detect(self, frame, timestamp):
+        """감지 스레드: YOLO 감지 수행 (장면 변화가 없으면 직전 결과 재사용)"""
+        active = self.last_result is not None and self.last_result['persons_detected'] > 0
+        if self.motion_gate is None or self.motion_gate.should_infer(frame, active=active):
+            self.last_result = self.detector.analyze_frame(frame, self.camera_id)
+        return self.last_result
+
     def start(self, display=False):
         """
         감지 시스템 시작
@@ -115,20 +155,18 @@ class IntegratedSmokingDetectionSystem:
         )
         self.heartbeat_thread.start()
 
-        try:
-            while True:
-                # 프레임 읽기
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("⚠️  프레임을 읽을 수 없습니다")
-                    time.sleep(1)
-                    continue
+        # 캡처 스레드 → 감지 스레드 → 메인 스레드(업로드/화면 표시)
+        # 카메라는 YOLO를 기다리지 않고, 감지는 항상 최신 프레임을 처리
+        self.pipeline = FramePipeline(self._capture_frame, self._detect)
+        self.pipeline.start()
 
-                # YOLO 감지 수행
-                result = self.detector.analyze_frame(frame, self.camera_id)
+        try:
+            for item in self.pipeline.results():
+                frame = item.frame
+                result = item.result
 
                 # 사람이 감지되었고 쿨다운 시간이 지났다면
-                current_time = time.time()
+                current_time = item.timestamp
                 if (result['persons_detected'] > 0 and
                     current_time - self.last_detection_time > self.detection_cooldown):
 
@@ -142,9 +180,9 @@ class IntegratedSmokingDetectionSystem:
                     print(f"감지된 사람 수: {result['persons_detected']}")
                     print(f"신뢰도: {confidence:.2%}")
 
-                    # Firebase에 전송
-                    print("\n📤 Firebase에 전송 중...")
-                    event_id = self.firebase_client.send_detection(
+                    # Firebase 업로드 대기열에 추가 (즉시 반환)
+                    print("\n📤 Firebase 업로드 대기열에 추가...")
+                    event_id = self.firebase_client.send_detection_async(
                         camera_id=self.camera_id,
                         location=self.location,
                         detected_objects=['person'],  # 실제로는 YOLO 결과 사용
@@ -153,12 +191,12 @@ class IntegratedSmokingDetectionSystem:
                     )
 
                     if event_id:
-                        print(f"✅ 전송 성공! Event ID: {event_id}")
-                        print(f"📱 Flutter 앱에서 확인하세요!")
+                        print(f"✅ 대기열 추가 완료! Event ID: {event_id}")
+                        print(f"📱 업로드가 끝나면 Flutter 앱에서 확인하세요!")
                         self.detection_count += 1
                         self.last_detection_time = current_time
                     else:
-                        print("❌ 전송 실패")
+                        print("❌ 업로드 대기열이 가득 찼습니다")
 
                     print("="*60 + "\n")
 
@@ -191,9 +229,6 @@ class IntegratedSmokingDetectionSystem:
                     if cv2.waitKey(1) & 0xFF == ord('q'):
                         break
 
-                # CPU 사용률 조절
-                time.sleep(0.1)
-
         except KeyboardInterrupt:
             print("\n\n⏹️  시스템 중지 중...")
 
@@ -204,15 +239,38 @@ class IntegratedSmokingDetectionSystem:
         """시스템 중지"""
         self.running = False
 
+        # 캡처 스레드가 카메라를 놓은 뒤에 해제
+        if self.pipeline:
+            self.pipeline.stop()
+
         if self.cap:
             self.cap.release()
 
         cv2.destroyAllWindows()
 
+        # 남은 업로드 처리
+        uploader = self.firebase_client.uploader
+        upload_stats = None
+        if uploader is not None:
+            print(f"\n📤 남은 업로드 처리 중... (대기: {uploader.stats()['queue_depth']})")
+            self.firebase_client.stop_async_uploader(timeout=10)
+            upload_stats = uploader.stats()
+
         print("\n" + "="*60)
         print("📊 통계")
         print("="*60)
         print(f"총 감지 횟수: {self.detection_count}")
+        if self.pipeline:
+            pipeline_stats = self.pipeline.stats()
+            print(f"캡처: {pipeline_stats['capture']['count']}프레임 ({pipeline_stats['capture']['fps']} FPS) / "
+                  f"감지: {pipeline_stats['infer']['count']}프레임 ({pipeline_stats['infer']['fps']} FPS)")
+        if self.motion_gate:
+            gate_stats = self.motion_gate.stats()
+            print(f"YOLO 추론: {gate_stats['inferred']} / 생략: {gate_stats['gated']} ({gate_stats['gated_ratio']:.0%})")
+        if upload_stats:
+            print(f"업로드 성공: {upload_stats['sent']} / 실패: {upload_stats['failed']} / 버림: {upload_stats['dropped']}")
+        if self.firebase_client.outbox:
+            print(f"아웃박스 미전송: {self.firebase_client.outbox.stats()['pending']}건")
         print("="*60)
         print("\n✅ 시스템 종료 완료")
 
@@ -225,6 +283,7 @@ if __name__ == '__main__':
     parser.add_argument('--device-id', default='raspberry-pi-001', help='장치 ID')
     parser.add_argument('--location', default='본관 1층 입구', help='설치 위치')
     parser.add_argument('--display', action='store_true', help='화면에 감지 결과 표시')
+    parser.add_argument('--no-motion-gate', action='store_true', help='모든 프레임에서 YOLO 감지 수행')
 
     args = parser.parse_args()
 
@@ -232,7 +291,8 @@ if __name__ == '__main__':
     system = IntegratedSmokingDetectionSystem(
         camera_id=args.camera_id,
         device_id=args.device_id,
-        location=args.location
+        location=args.location,
+        motion_gate=not args.no_motion_gate
     )
 
     system.start(display=args.display)
@@ -1,16 +1,19 @@
 import cv2
-import numpy as np
 import time
-from collections import deque
-import onnxruntime as ort
 from picamera2 import Picamera2
 import os
 import pickle
-from google.auth.transport.requests import Request
+from google.auth.transport.requests import AuthorizedSession, Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 import pygame
+from detector_engine import DetectorEngine, OnnxRuntimeBackend
+from event_outbox import EventOutbox
+from frame_pipeline import FramePipeline
+from frame_ring_buffer import FrameRingBuffer, JpegFrameRingBuffer
+from clip_recorder import ClipRecorder
+from object_tracker import ObjectTracker, max_dwell
+from temporal_aggregator import TemporalAggregator
+from drive_uploader import ResumableDriveUploader
 
 # --- 설정 (Configuration) ---
 ONNX_MODEL_PATH = "final_detection416.onnx"
@@ -20,6 +23,12 @@ CONF_THRESHOLD = 0.4
 NMS_THRESHOLD = 0.4
 labels = ["Person", "Cigarette", "Smoke", "Fire"]
 
+# --- 추적 설정 (감지는 N프레임마다, 사이 프레임은 추적기가 위치 예측) ---
+DETECT_EVERY_N = 3
+TRACK_LOW_THRESHOLD = 0.1    # 추적기 2차 연결에 쓰는 낮은 신뢰도 감지까지 받음
+TRACK_BUFFER = 1.0           # 감지가 끊겨도 같은 트랙으로 유지할 시간 (초)
+PRESENCE_MAX_GAP = 2.0       # 감지 프레임 사이를 출현으로 채우는 최대 간격 (초, N프레임 간격보다 커야 함)
+
 # (★ 2개의 사운드 파일 및 "총 주기" 설정)
 GUIDE_FILE = "person.mp3"     # 안내용 (사람만)
 WARNING_FILE = "smoke.mp3"   # 경고용 (사람+담배)
@@ -28,9 +37,17 @@ WARNING_CYCLE = 31           # (★) 경고 총 주기 (재생 16초 + 휴식 15
 
 # --- Google Drive API 설정 ---
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
+DRIVE_UPLOAD_STATE_PATH = "drive_uploads.json"    # 이어 올리기 진행 상황 (재시작 후에도 유지)
+DRIVE_FOLDER_CACHE_PATH = "drive_folders.json"    # 폴더 이름 → ID 캐시
+DRIVE_CHUNK_SIZE = 1024 * 1024                    # 청크 크기 (256KB 배수)
+DRIVE_MAX_CONCURRENT_UPLOADS = 1                  # 동시 업로드 수 (좁은 업링크 공유 방지)
+
+# --- 오프라인 아웃박스 (업로드 실패 파일 보관, 최대 1GB) ---
+OUTBOX_PATH = "outbox.db"
+outbox = EventOutbox(OUTBOX_PATH, max_bytes=1024 * 1024 * 1024)
 
-def get_drive_service():
-    """Google Drive API 서비스 객체를 인증하고 반환합니다."""
+def get_drive_credentials():
+    """Google Drive API 인증 정보를 불러오거나 새로 발급받아 반환합니다."""
     creds = None
     if os.path.exists('token.pickle'):
         with open('token.pickle', 'rb') as token:
@@ -43,45 +60,53 @@ def get_drive_service():
             creds = flow.run_local_server(port=0)
         with open('token.pickle', 'wb') as token:
             pickle.dump(creds, token)
-    return build('drive', 'v3', credentials=creds)
-
-def get_or_create_folder(folder_name, service):
-    """지정한 이름의 폴더를 찾고, 없으면 생성한 뒤 폴더 ID를 반환합니다."""
-    query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-    response = service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-    files = response.get('files', [])
-    
-    if files:
-        folder_id = files[0].get('id')
-        print(f"✅ Folder '{folder_name}' already exists. ID: {folder_id}")
-        return folder_id
-    else:
-        file_metadata = {'name': folder_name, 'mimeType': 'application/vnd.google-apps.folder'}
-        folder = service.files().create(body=file_metadata, fields='id').execute()
-        folder_id = folder.get('id')
-        print(f"✅ Folder '{folder_name}' created. ID: {folder_id}")
-        return folder_id
-
-def upload_to_drive(file_path, file_name, service, folder_id):
-    """지정한 폴더 ID 안에 파일을 업로드합니다."""
+    return creds
+
+def get_drive_uploader():
+    """인증된 세션으로 이어 올리기 업로더를 만듭니다."""
+    return ResumableDriveUploader(
+        AuthorizedSession(get_drive_credentials()),
+        state_path=DRIVE_UPLOAD_STATE_PATH,
+        folder_cache_path=DRIVE_FOLDER_CACHE_PATH,
+        chunk_size=DRIVE_CHUNK_SIZE,
+        max_concurrent=DRIVE_MAX_CONCURRENT_UPLOADS
+    )
+
+def _upload_file(file_path, file_name, uploader, folder_id):
+    """파일을 이어 올리기로 업로드하고 로컬 파일을 삭제합니다. (실패 시 예외 발생, 진행 위치는 보존)"""
+    uploader.upload(file_path, file_name, folder_id)
+    os.remove(file_path) # 업로드 후 로컬 파일 삭제
+
+def upload_to_drive(file_path, file_name, uploader, folder_id):
+    """지정한 폴더 ID 안에 파일을 업로드합니다. 실패하면 아웃박스에 보관합니다."""
     try:
-        mimetype = 'video/mp4' if file_path.endswith('.mp4') else 'image/jpeg'
-        media = MediaFileUpload(file_path, mimetype=mimetype)
-        file_metadata = {'name': file_name, 'parents': [folder_id]}
-        file = service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+        _upload_file(file_path, file_name, uploader, folder_id)
         print(f"✅ File '{file_name}' uploaded successfully into folder.")
-        os.remove(file_path) # 업로드 후 로컬 파일 삭제
     except Exception as e:
         print(f"❌ Failed to upload {file_name}. Error: {e}")
+        # 파일이 없거나 기록 중이어도 기록기 스레드가 죽지 않도록 크기 확인 실패는 0으로 보관
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        outbox.put('drive_file', {'file_path': file_path, 'file_name': file_name, 'folder_id': folder_id},
+                   size=size)
+        print(f"📦 Saved to outbox for retry: {file_name}")
+
+def drive_outbox_sink(items):
+    """아웃박스에 보관된 파일을 다시 업로드합니다. (이미 올라간 파일은 건너뜀)"""
+    for item in items:
+        payload = item['payload']
+        if os.path.exists(payload['file_path']):
+            _upload_file(payload['file_path'], payload['file_name'], drive_uploader, payload['folder_id'])
 
-# --- ONNX 모델 초기화 ---
+# --- ONNX 모델 초기화 (BGR -> RGB 입력) ---
 try:
-    session = ort.InferenceSession(ONNX_MODEL_PATH, providers=['CPUExecutionProvider'])
-    print(f"✅ ONNX Model loaded successfully: {ONNX_MODEL_PATH}")
-    model_inputs = session.get_inputs()
-    input_name = model_inputs[0].name
-    model_outputs = session.get_outputs()
-    output_name = model_outputs[0].name
+    engine = DetectorEngine(
+        OnnxRuntimeBackend(ONNX_MODEL_PATH, INPUT_WIDTH, INPUT_HEIGHT, swap_rb=True),
+        labels, TRACK_LOW_THRESHOLD, NMS_THRESHOLD
+    )
+    print(f"✅ ONNX Model loaded successfully: {ONNX_MODEL_PATH} {engine.backend.session.session_info}")
 except Exception as e:
     print(f"❌ ONNX Model loading failed: {e}")
     exit()
@@ -124,102 +149,116 @@ cv2.namedWindow("YOLOv8 ONNX Detection", cv2.WINDOW_NORMAL)
 
 # --- 변수 초기화 ---
 prev_time = time.time(); frame_count = 0; fps = 0
-detection_window = 10; required_duration = 3
-person_timestamps = deque(); smoking_timestamps = deque()
+detection_window = 10; required_duration = 3  # 최근 10초 중 3초 이상 (사람은 같은 트랙이 3초 이상)
+# 사람+담배 동시 출현 시간 (고정 크기 시간 칸에 누적, FPS와 무관)
+presence = TemporalAggregator(["Smoking"], window=detection_window, max_gap=PRESENCE_MAX_GAP)
 last_upload_time = 0; upload_interval = 30 
 BUFFER_SIZE = 150
-frame_buffer = deque(maxlen=BUFFER_SIZE)
+BUFFER_JPEG_QUALITY = None  # 예: 80 → JPEG로 보관 (같은 메모리에 훨씬 긴 프리롤, 캡처 시 인코딩 비용 추가)
+# 미리 할당한 링 버퍼 (프레임마다 새 배열을 만들지 않음)
+if BUFFER_JPEG_QUALITY:
+    frame_buffer = JpegFrameRingBuffer(BUFFER_SIZE, quality=BUFFER_JPEG_QUALITY)
+else:
+    frame_buffer = FrameRingBuffer(BUFFER_SIZE, (INPUT_HEIGHT, INPUT_WIDTH, 3))
 
 # (★ "스마트 쿨타임"을 위한 2개의 시간 변수)
 last_guide_play_time = 0
 last_warning_play_time = 0
 
 
-# --- 구글 드라이브 서비스 및 폴더 초기화 ---
+# --- 구글 드라이브 업로더 및 폴더 초기화 (폴더 ID는 캐시 사용) ---
 try:
-    drive_service = get_drive_service()
-    print("✅ Google Drive service initialized.")
-    photo_folder_id = get_or_create_folder("Photos", drive_service)
-    video_folder_id = get_or_create_folder("Videos", drive_service)
+    drive_uploader = get_drive_uploader()
+    print("✅ Google Drive uploader initialized.")
+    photo_folder_id = drive_uploader.get_or_create_folder("Photos")
+    video_folder_id = drive_uploader.get_or_create_folder("Videos")
+    outbox.start_drainer(drive_outbox_sink, kind='drive_file', interval=60, batch_size=10)
 except Exception as e:
     print(f"❌ Failed to initialize Google Drive: {e}")
-    drive_service = None 
+    drive_uploader = None
 
 
-try:
-    while True:
-        current_time = time.time()
-        
-        # 1. 카메라 캡처
-        frame_bgr = picam2.capture_array()
-        
-        # 2. 버퍼 저장
-        frame_buffer.append(frame_bgr.copy()) 
+# --- 이벤트 영상 기록기 (이전 프레임 + 이후 POST_EVENT_SECONDS초) ---
+POST_EVENT_SECONDS = 3
 
-        # 3. RGB 변환
-        frame_rgb_for_model = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-        
-        # 4. 텐서 생성
-        input_tensor = np.transpose(frame_rgb_for_model, (2, 0, 1)) # HWC -> CHW
-        input_tensor = np.expand_dims(input_tensor, axis=0).astype(np.float32) / 255.0
-        
-        # 5. ONNX 추론
-        outputs = session.run([output_name], {input_name: input_tensor})[0]
+def upload_event_files(photo_path, video_path):
+    """기록이 끝난 사진/영상을 업로드합니다. (실패 시 아웃박스에 보관)"""
+    upload_to_drive(photo_path, os.path.basename(photo_path), drive_uploader, photo_folder_id)
+    if video_path:
+        upload_to_drive(video_path, os.path.basename(video_path), drive_uploader, video_folder_id)
+
+clip_recorder = ClipRecorder(frame_buffer, upload_fn=upload_event_files, post_event_seconds=POST_EVENT_SECONDS)
+
+# --- 객체 추적기 (트랙별 머문 시간으로 한 사람이 머무는지, 여러 사람이 지나가는지 구분) ---
+tracker = ObjectTracker(high_threshold=CONF_THRESHOLD, low_threshold=TRACK_LOW_THRESHOLD,
+                        new_track_threshold=CONF_THRESHOLD, track_buffer=TRACK_BUFFER)
+detect_frame_index = 0
+
+def run_detection(frame, timestamp):
+    """
+    추론 스레드에서 실행: N프레임마다 감지 후 추적기 갱신, 나머지 프레임은 위치 예측
+
+    Returns:
+        tuple: (트랙, 감지된 클래스 이름 집합 - 감지하지 않은 프레임은 None)
+    """
+    global detect_frame_index
+    detect_now = detect_frame_index % DETECT_EVERY_N == 0
+    detect_frame_index += 1
+    if detect_now:
+        detections = engine.detect(frame)[0]
+        confident = detections.class_ids[detections.scores >= CONF_THRESHOLD]
+        return tracker.update(detections, timestamp), {labels[class_id] for class_id in confident if class_id < len(labels)}
+    return tracker.predict(timestamp), None
+
+# --- 캡처/추론 파이프라인 ---
+# 1-2. 캡처 스레드: 카메라 속도로 읽어서 버퍼에 저장 (모델을 기다리지 않음)
+# 3-6. 추론 스레드: 최신 프레임만 감지 (전처리 → ONNX 추론 → 후처리/NMS → 추적)
+# 7-13. 메인 스레드: 그리기, 경고, 업로드, 화면 표시 (cv2.imshow는 메인 스레드에서만)
+pipeline = FramePipeline(
+    picam2.capture_array,
+    run_detection,
+    on_capture=frame_buffer.append
+)
+pipeline.start()
+
+try:
+    for item in pipeline.results():
+        current_time = item.timestamp
         
-        # 6. 후처리 (NMS)
-        predictions = np.squeeze(outputs).T
-        boxes, confidences, class_ids = [], [], []
+        # 캡처 프레임은 링 버퍼에 복사되었으므로 그대로 그려도 됨
+        frame_bgr = item.frame
+        tracks, detected_labels = item.result
         class_counts = {label: 0 for label in labels}
 
-        for pred in predictions:
-            class_probs = pred[4:]
-            class_id = np.argmax(class_probs)
-            confidence = class_probs[class_id]
-            
-            if confidence > CONF_THRESHOLD:
-                cx, cy, w, h = pred[0], pred[1], pred[2], pred[3]
-                x1 = int(cx - w / 2); y1 = int(cy - h / 2)
-                boxes.append([x1, y1, int(w), int(h)])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
-                
-        indices = cv2.dnn.NMSBoxes(boxes, confidences, CONF_THRESHOLD, NMS_THRESHOLD)
-
         # 7. 결과 그리기
-        if len(indices) > 0:
-            for i in indices.flatten():
-                if class_ids[i] < len(labels):
-                    class_name = labels[class_ids[i]]
-                    class_counts[class_name] += 1
-                    
-                    box = boxes[i]; x1, y1, w, h = box[0], box[1], box[2], box[3]; conf = confidences[i]
-                    color = (0, 255, 0) # Person
-                    
-                    if class_name == "Cigarette": color = (0, 0, 255)
-                    elif class_name == "Smoke": color = (255, 165, 0)
-                    elif class_name == "Fire": color = (0, 255, 255)
-                    
-                    label = f"{class_name} ({conf:.2f})"
-                    cv2.rectangle(frame_bgr, (x1, y1), (x1 + w, y1 + h), color, 2)
-                    cv2.putText(frame_bgr, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        for box, conf, class_id, track_id, dwell in zip(*tracks):
+            if class_id < len(labels):
+                class_name = labels[class_id]
+                class_counts[class_name] += 1
+
+                x1, y1, x2, y2 = map(int, box)
+                color = (0, 255, 0) # Person
+
+                if class_name == "Cigarette": color = (0, 0, 255)
+                elif class_name == "Smoke": color = (255, 165, 0)
+                elif class_name == "Fire": color = (0, 255, 255)
+
+                label = f"{class_name} #{track_id} {dwell:.1f}s"
+                cv2.rectangle(frame_bgr, (x1, y1), (x2, y2), color, 2)
+                cv2.putText(frame_bgr, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
         
         # 8. FPS 계산
         frame_count += 1; elapsed_time = current_time - prev_time
         if elapsed_time >= 1.0:
             fps = frame_count / elapsed_time; frame_count = 0; prev_time = current_time
         
-        # 9. 경고 로직
-        person_detected = class_counts["Person"] > 0
-        cigarette_detected = class_counts["Cigarette"] > 0
-        
-        if person_detected: person_timestamps.append(current_time)
-        if person_detected and cigarette_detected: smoking_timestamps.append(current_time)
-            
-        while person_timestamps and current_time - person_timestamps[0] > detection_window: person_timestamps.popleft()
-        while smoking_timestamps and current_time - smoking_timestamps[0] > detection_window: smoking_timestamps.popleft()
-            
-        person_duration = len(person_timestamps) / fps if fps > 0 else 0
-        smoking_duration = len(smoking_timestamps) / fps if fps > 0 else 0
+        # 9. 경고 로직 (사람은 가장 오래 머문 트랙 기준 - 지나가는 사람은 누적되지 않음,
+        #    흡연은 최근 detection_window초 중 사람+담배가 함께 감지된 시간 기준 - 트랙이 아닌 원본 감지 결과)
+        person_duration = max_dwell(tracks, [labels.index("Person")])
+        if detected_labels is not None:
+            smoking_seen = "Person" in detected_labels and "Cigarette" in detected_labels
+            presence.update(current_time, {"Smoking"} if smoking_seen else ())
+        smoking_duration = min(person_duration, presence.presence("Smoking", detection_window))
         
         show_smoking_warning = smoking_duration >= required_duration
         show_person_guide = person_duration >= required_duration and not show_smoking_warning
@@ -264,24 +303,17 @@ try:
             cv2.putText(frame_bgr, "WARNING: Smoking Detected!", (10, y_offset + 40), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 3)
             
             # 11. 업로드 로직 (경고 텍스트가 표시될 때 실행)
-            if drive_service and (current_time - last_upload_time > upload_interval):
+            if drive_uploader and (current_time - last_upload_time > upload_interval):
                 last_upload_time = current_time
                 print(f"[{time.strftime('%H:%M:%S')}] Smoking event triggered! Preparing to upload...")
                 timestamp_str = time.strftime("%Y%m%d_%H%M%S")
                 photo_name = f"smoking_snapshot_{timestamp_str}.jpg"
                 video_name = f"smoking_video_{timestamp_str}.mp4"
 
-                cv2.imwrite(photo_name, frame_bgr)
-                
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                record_fps = fps if fps > 0 else 10.0
-                writer = cv2.VideoWriter(video_name, fourcc, record_fps, (INPUT_WIDTH, INPUT_HEIGHT))
-                for buffered_frame in list(frame_buffer):
-                    writer.write(buffered_frame)
-                writer.release()
-                
-                upload_to_drive(photo_name, photo_name, drive_service, photo_folder_id)
-                upload_to_drive(video_name, video_name, drive_service, video_folder_id)
+                # 영상 인코딩/업로드는 백그라운드에서 처리 (감지 루프는 멈추지 않음)
+                # 버퍼는 캡처 스레드가 카메라 속도로 채우므로 캡처 FPS로 기록
+                clip_recorder.trigger(frame_bgr.copy(), photo_name, video_name,
+                                      fps=pipeline.stats()['capture']['fps'])
         
         elif show_person_guide:
             # 2. (사람만): 안내 텍스트
@@ -299,7 +331,14 @@ try:
 except KeyboardInterrupt:
     print("🛑 Program terminated")
 finally:
+    # 기록 중인 영상은 캡처가 멈추기 전에 마무리
+    clip_recorder.stop()
+    print(f"📊 Clip stats: {clip_recorder.stats()}")
+    pipeline.stop()
+    print(f"📊 Pipeline stats: {pipeline.stats()}")
+    print(f"📊 Tracker stats: {tracker.stats()}")
     cv2.destroyAllWindows()
     picam2.stop()
     pygame.mixer.quit()
+    outbox.close()
     print("✅ Camera, windows, and sound mixer closed")
\ No newline at end of file
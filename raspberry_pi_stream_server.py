@@ -4,23 +4,23 @@ Raspberry Pi Camera Streaming Server
 라즈베리파이 카메라 스트리밍 서버 (MJPEG)
 """
 
-from flask import Flask, Response, render_template_string
+from flask import Flask, Response, render_template_string, request
 import cv2
 import threading
 import time
+from frame_channel import FrameChannel
 
 app = Flask(__name__)
 
-# 전역 변수
-output_frame = None
-lock = threading.Lock()
-
 # 카메라 설정
 CAMERA_INDEX = 0  # 0 = 첫 번째 카메라
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 FPS = 30
 
+# 인코딩된 JPEG 프레임 채널 (느린 클라이언트용으로 최근 1초 분량 보관)
+frame_channel = FrameChannel(history=FPS)
+
 
 class VideoCamera:
     """비디오 카메라 클래스"""
@@ -63,8 +63,6 @@ class VideoCamera:
 
 def capture_frames():
     """백그라운드에서 프레임 캡처"""
-    global output_frame, lock
-
     camera = VideoCamera()
     print("✓ Camera initialized successfully")
 
@@ -72,23 +70,29 @@ def capture_frames():
         frame = camera.get_frame()
 
         if frame is not None:
-            with lock:
-                output_frame = frame
+            frame_channel.publish(frame)
 
         time.sleep(1 / FPS)
 
 
-def generate_frames():
-    """프레임 생성기 (MJPEG 스트림용)"""
-    global output_frame, lock
+def generate_frames(drop_frames=True):
+    """
+    프레임 생성기 (MJPEG 스트림용)
 
-    while True:
-        with lock:
-            if output_frame is None:
-                continue
+    새 프레임이 게시될 때까지 블록하므로 같은 프레임을 반복 전송하지 않습니다.
 
-            frame = output_frame
+    Args:
+        drop_frames: True면 느린 클라이언트는 밀린 프레임을 건너뛰고 최신 프레임을 받음
+    """
+    current_seq, _ = frame_channel.latest()
+    last_seq = max(current_seq - 1, 0)  # 접속 직후 현재 프레임부터 전송
 
+    while True:
+        seq, frame = frame_channel.wait_next(last_seq, timeout=1.0, drop_frames=drop_frames)
+        if frame is None:
+            continue
+
+        last_seq = seq
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
 
@@ -160,8 +164,11 @@ def index():
 @app.route('/video_feed')
 def video_feed():
     """비디오 스트림 엔드포인트"""
+    # ?drop=0 이면 느린 클라이언트도 프레임을 건너뛰지 않음 (최근 1초 범위 내)
+    drop_frames = request.args.get('drop', '1') != '0'
+
     return Response(
-        generate_frames(),
+        generate_frames(drop_frames),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
@@ -170,7 +177,7 @@ def video_feed():
 def camera_status():
     """카메라 상태 API"""
     return {
-        'status': 'active' if output_frame is not None else 'inactive',
+        'status': 'active' if frame_channel.latest()[1] is not None else 'inactive',
         'resolution': f'{FRAME_WIDTH}x{FRAME_HEIGHT}',
         'fps': FPS,
         'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
@@ -4,6 +4,7 @@ from firebase_admin import credentials, firestore, storage
 import numpy as np
 import cv2
 from datetime import datetime
+from firestore_bulk_writer import FirestoreBulkWriter
 
 print("=" * 60)
 print("Firebase Test - Sending Data")
@@ -17,6 +18,8 @@ firebase_admin.initialize_app(cred, {
 })
 db = firestore.client()
 bucket = storage.bucket()
+# Writes are held until flush() so device + event go out in one commit
+writer = FirestoreBulkWriter(db, max_delay=60)
 print("OK: Firebase initialized")
 
 # Register device
@@ -29,8 +32,8 @@ device_data = {
     'last_seen': firestore.SERVER_TIMESTAMP,
     'created_at': firestore.SERVER_TIMESTAMP,
 }
-db.collection('devices').document('raspberry-pi-001').set(device_data)
-print("OK: Device registered")
+device_future = writer.write('devices', device_data, 'raspberry-pi-001')
+print("OK: Device queued")
 
 # Create test image
 print("\n3. Creating test image...")
@@ -64,8 +67,14 @@ event_data = {
     'status': 'pending',
     'image_url': image_url,
 }
-doc_ref = db.collection('events').document(event_id)
-doc_ref.set(event_data)
+event_future = writer.write('events', event_data, event_id)
+writer.flush()
+
+# Device + event are committed together in one WriteBatch
+device_future.result(timeout=30)
+event_future.result(timeout=30)
+writer.close()
+print("OK: Device registered")
 print(f"OK: Event created - ID: {event_id}")
 
 print("\n" + "=" * 60)
@@ -3,12 +3,15 @@
 YOLOv8을 사용하여 사람을 감지합니다.
 """
 
-from ultralytics import YOLO
 import cv2
 import numpy as np
 from datetime import datetime
 import json
 import os
+from detector_engine import DetectorEngine, UltralyticsBackend
+
+# COCO 데이터셋의 person 클래스 ID
+PERSON_CLASS_ID = 0
 
 class SmokingDetector:
     """흡연 감지 클래스"""
@@ -20,7 +23,11 @@ class SmokingDetector:
             confidence_threshold: 감지 신뢰도 임계값
         """
         print("Loading YOLO model...")
-        self.model = YOLO(model_path)
+        self.engine = DetectorEngine(
+            UltralyticsBackend(model_path),
+            conf_threshold=confidence_threshold,
+            nms_threshold=0.7  # ultralytics 기본값
+        )
         self.confidence_threshold = confidence_threshold
         self.detection_history = []
 
@@ -41,22 +48,17 @@ class SmokingDetector:
         Returns:
             list: 감지된 사람들의 정보 [(x1, y1, x2, y2, confidence), ...]
         """
-        results = self.model(frame, verbose=False)
+        detections = self.engine.detect(frame)[0]
 
         persons = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # class_id 0 = person in COCO dataset
-                if int(box.cls[0]) == 0:
-                    confidence = float(box.conf[0])
-                    if confidence >= self.confidence_threshold:
-                        # 바운딩 박스 좌표
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        persons.append({
-                            'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                            'confidence': confidence
-                        })
+        for box, confidence, class_id in zip(*detections):
+            if class_id == PERSON_CLASS_ID and confidence >= self.confidence_threshold:
+                # 바운딩 박스 좌표
+                x1, y1, x2, y2 = box
+                persons.append({
+                    'bbox': [int(x1), int(y1), int(x2), int(y2)],
+                    'confidence': float(confidence)
+                })
 
         return persons
 
@@ -0,0 +1,163 @@
+"""
+시간 구간 기반 감지 누적기 (경고 판단용)
+클래스별로 "최근 Y초 중 몇 초 동안 보였는지"를 고정 크기 배열에 누적해서,
+프레임 속도와 상관없이 상수 시간에 "최근 Y초 중 X초 이상 보였음"을 판단합니다.
+
+시간을 bucket초 단위 칸으로 나누고 칸마다 보였는지만 기록하므로, 같은 칸에서 여러 번 보여도
+한 번으로 셉니다. 샘플에서 보인 클래스는 다음 샘플 직전까지(max_gap초 이하) 계속 보인 것으로
+채우므로 FPS가 낮거나 흔들려도 같은 결과가 나옵니다.
+
+누적 개수(prefix sum)를 링 배열로 유지하므로 조회는 두 칸의 차이만 계산합니다.
+
+사용 예:
+    presence = TemporalAggregator(["Person", "Cigarette"], window=10.0)
+    presence.update(timestamp, {"Person"})
+    if presence.present_for("Person", 3.0, 10.0): ...
+"""
+
+import math
+import threading
+
+import numpy as np
+
+
+class TemporalAggregator:
+    """클래스별 시간 구간 출현 누적기"""
+
+    def __init__(self, keys, window=10.0, bucket=0.1, max_gap=1.0):
+        """
+        Args:
+            keys: 클래스 이름 목록
+            window: 조회 가능한 최대 구간 (초)
+            bucket: 시간 칸 크기 (초)
+            max_gap: 샘플에서 보인 클래스를 다음 샘플까지 보인 것으로 채우는 최대 간격 (초)
+        """
+        self.keys = list(keys)
+        self.window = window
+        self.bucket = bucket
+        self.max_gap = max_gap
+        self._index = {key: i for i, key in enumerate(self.keys)}
+
+        # 현재 칸을 포함해 window초를 담을 수 있도록 1칸 여유
+        self.num_buckets = int(math.ceil(window / bucket)) + 1
+        self._marked = np.zeros((len(self.keys), self.num_buckets), dtype=bool)
+        self._counts = np.zeros((len(self.keys), self.num_buckets), dtype=np.int64)  # 칸까지의 누적 개수
+        self._current = None  # 현재 칸 번호 (timestamp // bucket)
+        self._last_marked = np.full(len(self.keys), -1, dtype=np.int64)  # 키별 마지막으로 표시한 칸 번호
+        self._last_sample = -1  # 마지막 샘플의 칸 번호
+        self._lock = threading.Lock()
+
+    def _advance(self, bucket_index):
+        """현재 칸을 bucket_index까지 이동 (지나간 칸은 비움, 이동 칸 수만큼만 처리)"""
+        if self._current is None:
+            self._current = bucket_index
+            return
+        steps = bucket_index - self._current
+        if steps <= 0:
+            return
+
+        current_counts = self._counts[:, self._current % self.num_buckets]
+        if steps >= self.num_buckets:
+            self._counts[:] = current_counts[:, None]
+            self._marked[:] = False
+        else:
+            for index in range(self._current + 1, bucket_index + 1):
+                slot = index % self.num_buckets
+                self._counts[:, slot] = current_counts
+                self._marked[:, slot] = False
+        self._current = bucket_index
+
+    def _mark(self, row, bucket_index):
+        """현재 칸에 키 출현 표시 (이미 표시했으면 무시)"""
+        slot = bucket_index % self.num_buckets
+        if not self._marked[row, slot]:
+            self._marked[row, slot] = True
+            self._counts[row, slot] += 1
+
+    def update(self, timestamp, present):
+        """
+        샘플 1개 기록
+
+        직전 샘플에서 보인 클래스는 이번 샘플 직전까지 계속 보인 것으로 채웁니다
+        (두 샘플 간격이 max_gap초 이하일 때만).
+
+        Args:
+            timestamp: 샘플 시각 (초)
+            present: 이 샘플에서 보인 클래스 이름 집합
+        """
+        bucket_index = int(timestamp // self.bucket)
+        gap_buckets = int(round(self.max_gap / self.bucket))
+        with self._lock:
+            if self._current is not None and bucket_index < self._current:
+                return  # 이미 지나간 시각의 샘플은 무시
+            self._advance(bucket_index)
+
+            rows = [self._index[key] for key in present if key in self._index]
+            # 직전 샘플에서 보였던 클래스는 그 사이 칸도 채움 (FPS와 무관하게 시간 비율 유지)
+            for row in np.flatnonzero(self._last_marked >= 0):
+                last = self._last_marked[row]
+                if last == self._last_sample and 0 < bucket_index - last <= gap_buckets:
+                    for index in range(max(last + 1, bucket_index - self.num_buckets + 1), bucket_index):
+                        self._fill(row, index)
+            for row in rows:
+                self._mark(row, bucket_index)
+                self._last_marked[row] = bucket_index
+            self._last_sample = bucket_index
+
+    def _fill(self, row, bucket_index):
+        """지나간 칸에 출현 표시 (이후 칸의 누적 개수도 함께 증가)"""
+        slot = bucket_index % self.num_buckets
+        if self._marked[row, slot]:
+            return
+        self._marked[row, slot] = True
+        for index in range(bucket_index, self._current + 1):
+            self._counts[row, index % self.num_buckets] += 1
+
+    def presence(self, key, seconds=None):
+        """
+        최근 seconds초 동안 key가 보인 시간 (상수 시간)
+
+        Args:
+            key: 클래스 이름
+            seconds: 조회 구간 (초, 기본값/최대값: window)
+
+        Returns:
+            float: 보인 시간 (초)
+        """
+        seconds = self.window if seconds is None else min(seconds, self.window)
+        with self._lock:
+            if self._current is None:
+                return 0.0
+            row = self._index[key]
+            span = int(round(seconds / self.bucket))
+            latest = self._counts[row, self._current % self.num_buckets]
+            before = self._counts[row, (self._current - span) % self.num_buckets]
+            return float(latest - before) * self.bucket
+
+    def present_for(self, key, duration, within=None):
+        """
+        최근 within초 중 duration초 이상 보였는지 여부
+
+        Args:
+            key: 클래스 이름
+            duration: 필요한 출현 시간 (초)
+            within: 조회 구간 (초, 기본값: window)
+
+        Returns:
+            bool: 조건 만족 여부
+        """
+        # 칸 단위 반올림 오차 허용
+        return self.presence(key, within) + 1e-9 >= duration
+
+    def reset(self):
+        """모든 기록 삭제"""
+        with self._lock:
+            self._marked[:] = False
+            self._counts[:] = 0
+            self._current = None
+            self._last_marked[:] = -1
+            self._last_sample = -1
+
+    def snapshot(self, seconds=None):
+        """모든 키의 최근 seconds초 출현 시간"""
+        return {key: round(self.presence(key, seconds), 2) for key in self.keys}
@@ -0,0 +1,10 @@
+"""
+운영 서버 진입점 (gunicorn)
+
+사용 방법:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from camera_server import app, init_server
+
+init_server()